@@ -0,0 +1,142 @@
+import gzip
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 前端檔案輸出 (build_viewer_data.py、generate_index.py)
+# 以靜態檔案方式放在 CDN 或檔案分享時，可同時產生預先壓縮的 .gz / .br 檔，
+# 伺服器依 Accept-Encoding 直接送出壓縮檔，不必每次即時壓縮。
+# 壓縮檔不含時間戳記，內容相同時重新建置的結果也相同。
+
+COMPRESSIONS = {"gzip": ".gz", "br": ".br"}
+
+def _gzip(data: bytes) -> bytes:
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+def _brotli(data: bytes) -> bytes:
+    return brotli.compress(data, quality=11)
+
+class ArtifactWriter:
+    """
+    寫出前端檔案並記錄大小
+    minify:   JSON 不縮排、不留空白
+    compress: 要產生的預先壓縮格式 ("gzip" / "br")；未安裝 brotli 套件時略過 br
+    previous: 上一次建置寫出的檔案 (path -> artifacts 中的記錄，見 BuildCache.outputs)，
+              內容雜湊相同且檔案仍在時不重寫、不重新壓縮
+    """
+
+    def __init__(self, minify: bool = False, compress: Iterable[str] = (),
+                 previous: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.minify = minify
+        self.previous = previous or {}
+        self.written = 0
+        self.compress = []
+        for name in compress or ():
+            if name not in COMPRESSIONS:
+                raise ValueError(f"不支援的壓縮格式: {name}")
+            if name == "br" and brotli is None:
+                print("未安裝 brotli 套件 (pip install brotli)，略過 .br 壓縮檔")
+                continue
+            if name not in self.compress:
+                self.compress.append(name)
+        self.artifacts: List[Dict[str, Any]] = []
+
+    def dumps(self, data: Any, indent: Optional[int] = None) -> str:
+        """
+        序列化 JSON；minify 時一律使用最精簡的格式，否則沿用呼叫端原本的格式 (indent)
+        """
+        if self.minify:
+            return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        return json.dumps(data, ensure_ascii=False, indent=indent)
+
+    def _unchanged(self, path: str, digest: str) -> Optional[Dict[str, Any]]:
+        entry = self.previous.get(path)
+        if not entry or entry.get("sha1") != digest or not os.path.exists(path):
+            return None
+        for name, suffix in COMPRESSIONS.items():
+            if (name in self.compress) != os.path.exists(path + suffix) or (name in self.compress and name not in entry):
+                return None
+        return {k: v for k, v in entry.items() if k in ("path", "bytes", "sha1") or
+                any(k.startswith(name) for name in self.compress)}
+
+    def write(self, path: str, content: str):
+        raw = content.encode("utf-8")
+        digest = hashlib.sha1(raw).hexdigest()
+        entry = self._unchanged(path, digest)
+        if entry is not None:
+            self.artifacts.append(entry)
+            return
+        with open(path, "wb") as f:
+            f.write(raw)
+        self.written += 1
+        entry = {"path": path, "bytes": len(raw), "sha1": digest}
+        for name, suffix in COMPRESSIONS.items():
+            if name in self.compress:
+                packed = _gzip(raw) if name == "gzip" else _brotli(raw)
+                with open(path + suffix, "wb") as f:
+                    f.write(packed)
+                entry[name] = len(packed)
+                entry[f"{name}_ratio"] = round(len(packed) / len(raw), 4) if raw else None
+            elif os.path.exists(path + suffix):
+                # 上一次建置留下的壓縮檔已與內容不符
+                os.remove(path + suffix)
+        self.artifacts.append(entry)
+
+    @staticmethod
+    def remove(path: str):
+        """刪除不再產生的檔案與其壓縮檔"""
+        for p in [path] + [path + suffix for suffix in COMPRESSIONS.values()]:
+            if os.path.exists(p):
+                os.remove(p)
+
+    def summary(self, group_dirs: Iterable[str] = ()) -> List[Dict[str, Any]]:
+        """
+        每個檔案一列的大小與壓縮率 (壓縮後 / 原始)
+        group_dirs: 位於這些目錄中的檔案合併為一列 (例如分片目錄)
+        """
+        group_dirs = {os.path.normpath(d) for d in group_dirs}
+        groups: Dict[str, Dict[str, Any]] = {}
+        for entry in self.artifacts:
+            key = entry["path"]
+            parent = os.path.dirname(os.path.normpath(key))
+            if parent in group_dirs:
+                key = parent + os.sep
+            row = groups.setdefault(key, {"path": key, "files": 0, "bytes": 0,
+                                          **{name: 0 for name in self.compress}})
+            row["files"] += 1
+            row["bytes"] += entry["bytes"]
+            for name in self.compress:
+                row[name] += entry[name]
+        rows = list(groups.values())
+        for row in rows:
+            for name in self.compress:
+                row[f"{name}_ratio"] = round(row[name] / row["bytes"], 4) if row["bytes"] else None
+        return rows
+
+    def report(self, group_dirs: Iterable[str] = ()):
+        rows = self.summary(group_dirs)
+        if not rows:
+            return
+        # 中文標題在終端機佔兩格，欄寬扣除標題字數
+        header = f"{'檔案':<36}{'數量':>4}{'原始大小':>10}"
+        for name in self.compress:
+            header += f"{name:>14}{'比例':>6}"
+        print(header)
+        for row in rows:
+            line = f"{row['path']:<38}{row['files']:>6}{row['bytes']:>14,}"
+            for name in self.compress:
+                ratio = row[f"{name}_ratio"]
+                line += f"{row[name]:>14,}{(f'{ratio:.1%}' if ratio is not None else '-'):>8}"
+            print(line)
+
+    def save_report(self, path: str):
+        """每個檔案的大小與壓縮率另存為 JSON"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"compress": self.compress, "minify": self.minify, "artifacts": self.artifacts},
+                      f, ensure_ascii=False, indent=2)
@@ -0,0 +1,123 @@
+"""
+下載與解析狀態檢查的基準測試 (check_status.audit)
+  legacy  原本的做法：每個系列各掃描一次檔名，缺號以 `i not in ids` 對清單逐一檢查
+  audit   check_status.series_index：檔名只掃描一次，號碼集合與缺號區間
+以合成檔名 (多個字號系列、隨機缺號) 放大語料比較耗時，並確認兩者找到的缺號相同；
+另以合成的下載目錄與解析記錄量測完整稽核 (含 mtime / hash 新舊檢查) 的耗時。
+
+用法：
+    python benchmarks/bench_check_status.py [--scale 1000 5000 20000] [--files 2000] [--output results.json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from check_status import audit, series_index
+from parse_cache import ParseCache
+
+SERIES = ["促轉司字", "促轉復查字", "促轉賠字"]
+
+def synthetic_names(count, seed=0):
+    rng = random.Random(seed)
+    names = []
+    for i in range(count):
+        series = SERIES[i % len(SERIES)]
+        if rng.random() < 0.05:
+            continue  # 缺號
+        names.append(f"{series}第{i // len(SERIES) + 1}號_當事人{i}.pdf")
+    return names
+
+def legacy_gaps(pdfs):
+    missing = {}
+    for series in SERIES:
+        ids = []
+        for pdf in pdfs:
+            match = re.search(series + r"第(\d+)號", pdf)
+            if match:
+                ids.append(int(match.group(1)))
+        if ids:
+            ids.sort()
+            missing[series] = [i for i in range(ids[0], ids[-1] + 1) if i not in ids]
+    return missing
+
+def expand(intervals):
+    return [n for a, b in intervals for n in range(a, b + 1)]
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+def bench_audit(files):
+    """合成下載目錄 + 解析結果 + 解析記錄，其中 1% 的 PDF 修改時間改變、其中一半內容也改變"""
+    with tempfile.TemporaryDirectory() as tmp:
+        download_dir, parsed_dir = os.path.join(tmp, "downloads"), os.path.join(tmp, "parsed")
+        os.makedirs(download_dir)
+        os.makedirs(parsed_dir)
+        manifest = ParseCache(os.path.join(tmp, "manifest.jsonl"), "bench")
+        names = synthetic_names(files)
+        for name in names:
+            path = os.path.join(download_dir, name)
+            with open(path, "wb") as f:
+                f.write(name.encode("utf-8") * 2000)
+            with open(os.path.join(parsed_dir, name[:-4] + ".json"), "w", encoding="utf-8") as f:
+                f.write("{}")
+            manifest.record(path)
+        time.sleep(0.01)
+        for k, name in enumerate(names[::100]):
+            path = os.path.join(download_dir, name)
+            if k % 2:
+                with open(path, "ab") as f:
+                    f.write(b"x")
+            else:
+                os.utime(path)
+
+        results = {}
+        for mode in ("off", "mtime", "hash"):
+            with contextlib.redirect_stdout(io.StringIO()):
+                seconds, report = timed(audit, download_dir, parsed_dir, manifest.manifest_path, mode)
+            results[mode] = {"ms": round(seconds * 1000, 3), "stale": report["counts"]["stale"]}
+    return len(names), results
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="下載與解析狀態檢查的基準測試")
+    arg_parser.add_argument("--scale", type=int, nargs="+", default=[1000, 5000, 20000], help="合成檔名數")
+    arg_parser.add_argument("--files", type=int, default=2000, help="完整稽核的合成 PDF 數")
+    arg_parser.add_argument("--output", help="將結果另存為 JSON")
+    args = arg_parser.parse_args(argv)
+
+    gaps = []
+    mismatched = []
+    for count in args.scale:
+        names = synthetic_names(count)
+        legacy_s, legacy = timed(legacy_gaps, names)
+        audit_s, index = timed(series_index, names)
+        if legacy != {s: expand(v["missing"]) for s, v in index.items()}:
+            mismatched.append(count)
+        gaps.append({"names": len(names), "legacy_ms": round(legacy_s * 1000, 3),
+                     "audit_ms": round(audit_s * 1000, 3)})
+        print(f"  {len(names):>7} 個檔名  legacy {legacy_s * 1000:>10.1f} ms  audit {audit_s * 1000:>8.1f} ms")
+    print("缺號" + ("相同" if not mismatched else f"不同: {mismatched}"))
+
+    files, full = bench_audit(args.files)
+    print(f"完整稽核 ({files} 個 PDF):")
+    for mode, r in full.items():
+        print(f"  freshness={mode:<6} {r['ms']:>9.1f} ms  過期 {r['stale']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"gaps": gaps, "audit": {"files": files, **full}}, f, indent=2)
+    return 0 if not mismatched else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
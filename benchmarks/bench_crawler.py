@@ -0,0 +1,320 @@
+"""
+爬蟲下載流程的本機替身伺服器測試 (EYCrawler(base_url=...))
+以 http.server 架一個模擬的列表頁與檔案伺服器，透過實際的 EYCrawler 程式碼逐一檢查：
+  fresh         全新下載，內容正確；同時連線數不超過 per_host_limit
+  revalidate    再次執行以 If-None-Match / If-Modified-Since 驗證，全部 304，不傳輸內容
+  ignore_cond   伺服器忽略條件式標頭回應 200：長度與 ETag 相同時不重新下載，--stop-after-known 照常停止
+  changed       內容變動 (ETag、長度不同) 時重新下載
+  resume        本地只有部分檔案 -> Range 續傳 (206)
+  complete      本地檔案已完整但不在下載清單中 -> 416，不重新下載
+  range_unknown 416 的 Content-Range 為 bytes */* (總長度未知) -> 改以一般請求確認，不算下載失敗
+  no_range      伺服器不支援 Range -> 200 完整內容覆寫
+  incremental   增量模式下新項目下載失敗時不更新停止點，下次重試
+另以每個請求固定的延遲比較依序下載 (max_workers=1) 與並行下載的耗時。
+任一檢查失敗時以非 0 結束。
+
+用法：
+    python benchmarks/bench_crawler.py [--files 24] [--size 200000] [--latency 0.05] [--output results.json]
+"""
+import argparse
+import contextlib
+import hashlib
+import http.server
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+from urllib.parse import parse_qs, urlparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ey_crawler import EYCrawler
+
+LISTING_PATH = "/tjb/list"
+
+def file_body(file_id, version, size):
+    """檔案內容：由編號與版本決定，版本不同時長度也不同"""
+    seed = hashlib.sha256(f"{file_id}-{version}".encode()).digest()
+    size += version
+    return (seed * (size // len(seed) + 1))[:size]
+
+class SiteState:
+    """替身網站的內容與行為設定，以及請求統計"""
+
+    def __init__(self, files, size, page_size):
+        self.size = size
+        self.page_size = page_size
+        self.order = list(range(files, 0, -1))  # 列表由新到舊
+        self.versions = {i: 0 for i in self.order}
+        self.ignore_conditional = False
+        self.support_range = True
+        self.range_total_unknown = False
+        self.fail = set()
+        self.latency = 0.0
+        self.lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.statuses = {}
+        self.listing_requests = 0
+        self.body_bytes = 0
+        self.active = 0
+        self.max_active = 0
+
+    def add_items(self, count):
+        new = list(range(max(self.order) + 1, max(self.order) + count + 1))
+        for i in new:
+            self.versions[i] = 0
+        self.order = new[::-1] + self.order
+        return new
+
+    def body(self, file_id):
+        return file_body(file_id, self.versions[file_id], self.size)
+
+    def etag(self, file_id):
+        return f'"{file_id}-{self.versions[file_id]}"'
+
+    def last_modified(self, file_id):
+        return formatdate(1_600_000_000 + self.versions[file_id] * 86400, usegmt=True)
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=b"", headers=None, listing=False):
+        state = self.server.state
+        with state.lock:
+            if listing:
+                state.listing_requests += 1
+            else:
+                # 只統計檔案請求
+                state.statuses[status] = state.statuses.get(status, 0) + 1
+                state.body_bytes += len(body)
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # 用戶端只看標頭就關閉連線 (判定未變動)
+            pass
+
+    def do_GET(self):
+        state = self.server.state
+        url = urlparse(self.path)
+        if url.path == LISTING_PATH:
+            query = parse_qs(url.query)
+            page, size = int(query["page"][0]), int(query["PS"][0])
+            ids = state.order[(page - 1) * size:page * size]
+            items = "".join(f'<li class="new_img"><a class="words_a" href="/files/{i}.pdf" title="x">'
+                            f'<div class="title2"><i>新</i>促轉司字第{i}號_測試</div></a></li>' for i in ids)
+            self._send(200, f"<html><body><ul>{items}</ul></body></html>".encode("utf-8"),
+                       {"Content-Type": "text/html; charset=utf-8"}, listing=True)
+            return
+
+        file_id = int(os.path.basename(url.path)[:-len(".pdf")])
+        with state.lock:
+            state.active += 1
+            state.max_active = max(state.max_active, state.active)
+        try:
+            time.sleep(state.latency)
+            if file_id in state.fail:
+                self._send(500)
+                return
+            body, etag, modified = state.body(file_id), state.etag(file_id), state.last_modified(file_id)
+            validators = {"ETag": etag, "Last-Modified": modified}
+            if not state.ignore_conditional and (self.headers.get("If-None-Match") == etag
+                                                 or self.headers.get("If-Modified-Since") == modified):
+                self._send(304, headers=validators)
+                return
+            byte_range = self.headers.get("Range")
+            if state.support_range and byte_range:
+                start = int(byte_range[len("bytes="):].rstrip("-"))
+                if start >= len(body):
+                    total = "*" if state.range_total_unknown else len(body)
+                    self._send(416, headers={"Content-Range": f"bytes */{total}"})
+                    return
+                self._send(206, body[start:], {**validators,
+                                               "Content-Range": f"bytes {start}-{len(body) - 1}/{len(body)}"})
+                return
+            self._send(200, body, validators)
+        finally:
+            with state.lock:
+                state.active -= 1
+
+class _Server(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # 用戶端提前關閉連線屬正常情況 (只讀標頭就判定未變動)，不印出 traceback
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+class StandInSite:
+    def __init__(self, files, size, page_size):
+        self.state = SiteState(files, size, page_size)
+        self.server = _Server(("127.0.0.1", 0), Handler)
+        self.server.state = self.state
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}{LISTING_PATH}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def crawl(site, download_dir, **kwargs):
+    """執行一次爬取 (不顯示爬蟲的輸出)，Returns: (交出的檔名, 爬蟲, 耗時秒數)"""
+    site.state.reset_stats()
+    options = {"page_size": site.state.page_size, "max_workers": 4, "per_host_limit": 2, **kwargs}
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        crawler = EYCrawler(download_dir=download_dir, base_url=site.base_url, **options)
+        names = [os.path.basename(p) for p in crawler.fetch_new_files(max_pages=100)]
+    return names, crawler, time.perf_counter() - start
+
+def local_name(file_id):
+    return f"促轉司字第{file_id}號_測試.pdf"
+
+def local_path(download_dir, file_id):
+    return os.path.join(download_dir, local_name(file_id))
+
+def contents_match(site, download_dir, ids):
+    for i in ids:
+        with open(local_path(download_dir, i), "rb") as f:
+            if f.read() != site.state.body(i):
+                return False
+    return True
+
+def forget(crawler, download_dir, file_id):
+    """自下載清單移除一個檔案 (模擬下載中斷、尚未記錄)"""
+    crawler.manifest = {url: e for url, e in crawler.manifest.items() if e["filename"] != local_name(file_id)}
+    crawler._save_manifest()
+
+def run_checks(args):
+    results = {}
+
+    def check(name, ok, detail=""):
+        results[name] = {"ok": bool(ok), "detail": detail}
+        print(f"  [{'OK' if ok else 'X'}] {name:<13} {detail}")
+
+    site = StandInSite(args.files, args.size, page_size=10)
+    state = site.state
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            ids = list(state.order)
+
+            names, crawler, _ = crawl(site, tmp, max_workers=4, per_host_limit=2)
+            check("fresh", len(names) == len(ids) and contents_match(site, tmp, ids)
+                  and state.statuses == {200: len(ids)} and 1 < state.max_active <= 2,
+                  f"{len(names)} 個檔案，同時連線數最多 {state.max_active} (上限 2)")
+
+            names, crawler, _ = crawl(site, tmp)
+            check("revalidate", state.statuses.get(304) == len(ids) and state.body_bytes == 0,
+                  f"304 x {state.statuses.get(304, 0)}，檔案內容傳輸 0")
+
+            mtimes = {i: os.stat(local_path(tmp, i)).st_mtime_ns for i in ids}
+            state.ignore_conditional = True
+            names, crawler, _ = crawl(site, tmp, stop_after_known=5)
+            rewritten = [i for i in ids if os.stat(local_path(tmp, i)).st_mtime_ns != mtimes[i]]
+            check("ignore_cond", not rewritten and state.listing_requests == 1 and len(names) == 5,
+                  f"重新寫入 {len(rewritten)} 個，列表頁請求 {state.listing_requests} 次 (連續 5 個未變動即停止)")
+            state.ignore_conditional = False
+
+            changed = ids[:3]
+            for i in changed:
+                state.versions[i] += 1
+            names, crawler, _ = crawl(site, tmp)
+            check("changed", contents_match(site, tmp, ids) and state.statuses.get(200) == len(changed),
+                  f"重新下載 {state.statuses.get(200, 0)} 個 (變動 {len(changed)} 個)")
+
+            partial, complete = ids[3:6], ids[6:8]
+            for i in partial:
+                with open(local_path(tmp, i), "r+b") as f:
+                    f.truncate(len(state.body(i)) // 3)
+            for i in partial + complete:
+                forget(crawler, tmp, i)
+            names, crawler, _ = crawl(site, tmp)
+            check("resume", state.statuses.get(206) == len(partial) and contents_match(site, tmp, partial),
+                  f"206 x {state.statuses.get(206, 0)}，續傳 {state.body_bytes // 1024} KB")
+            check("complete", state.statuses.get(416) == len(complete) and contents_match(site, tmp, complete),
+                  f"416 x {state.statuses.get(416, 0)}")
+
+            state.range_total_unknown = True
+            mtimes = {i: os.stat(local_path(tmp, i)).st_mtime_ns for i in complete}
+            for i in complete:
+                forget(crawler, tmp, i)
+            names, crawler, _ = crawl(site, tmp)
+            rewritten = [i for i in complete if os.stat(local_path(tmp, i)).st_mtime_ns != mtimes[i]]
+            check("range_unknown", state.statuses.get(416) == len(complete) and len(names) == len(state.order)
+                  and contents_match(site, tmp, complete) and not rewritten,
+                  f"416 (bytes */*) x {state.statuses.get(416, 0)}，改以一般請求確認，重新寫入 {len(rewritten)} 個")
+            state.range_total_unknown = False
+
+            state.support_range = False
+            for i in partial:
+                with open(local_path(tmp, i), "r+b") as f:
+                    f.truncate(len(state.body(i)) // 2)
+                forget(crawler, tmp, i)
+            names, crawler, _ = crawl(site, tmp)
+            check("no_range", contents_match(site, tmp, partial) and 206 not in state.statuses,
+                  f"200 完整內容覆寫 {len(partial)} 個")
+            state.support_range = True
+
+            new = state.add_items(4)
+            state.fail = {new[1]}
+            names, crawler, _ = crawl(site, tmp, incremental=True)
+            newest_url = f"{site.base_url.rsplit(LISTING_PATH, 1)[0]}/files/{new[-1]}.pdf"
+            kept = crawler.newest_seen[0] != newest_url
+            state.fail = set()
+            names2, crawler, _ = crawl(site, tmp, incremental=True)
+            check("incremental", kept and local_name(new[1]) in names2 and contents_match(site, tmp, new)
+                  and crawler.newest_seen[0] == newest_url,
+                  f"失敗後保留停止點，下次重試取得 {local_name(new[1])}")
+    finally:
+        site.close()
+    return results
+
+def run_timing(args):
+    """每個檔案請求延遲 latency 秒時，依序與並行下載的耗時"""
+    site = StandInSite(args.files, args.size, page_size=args.files)
+    site.state.latency = args.latency
+    timings = {}
+    try:
+        for workers in (1, 4):
+            with tempfile.TemporaryDirectory() as tmp:
+                names, _, seconds = crawl(site, tmp, max_workers=workers, per_host_limit=workers)
+            timings[f"workers_{workers}"] = {"files": len(names), "ms": round(seconds * 1000, 3)}
+            print(f"  max_workers={workers}  {len(names)} 個檔案  {seconds * 1000:>8.1f} ms")
+    finally:
+        site.close()
+    return timings
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="爬蟲下載流程的本機替身伺服器測試")
+    arg_parser.add_argument("--files", type=int, default=24, help="替身網站的檔案數")
+    arg_parser.add_argument("--size", type=int, default=200000, help="每個檔案的大小 (bytes)")
+    arg_parser.add_argument("--latency", type=float, default=0.05, help="耗時比較時每個檔案請求的延遲 (秒)")
+    arg_parser.add_argument("--output", help="將結果另存為 JSON")
+    args = arg_parser.parse_args(argv)
+
+    print("下載流程檢查:")
+    checks = run_checks(args)
+    print(f"耗時比較 (每個請求延遲 {args.latency * 1000:.0f} ms):")
+    timings = run_timing(args)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"checks": checks, "timings": timings}, f, ensure_ascii=False, indent=2)
+    return 0 if all(c["ok"] for c in checks.values()) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+名冊前處理 + 擷取：兩階段流程與 --fused 的比較
+  two_step  preprocess_pdfs.process_pdfs (移除首頁、旋轉後另存 processed_list/) + extract_tables.run_extraction
+  fused     extract_tables.run_extraction(fused=True)：直接讀取 list/，移除首頁與旋轉在擷取時套用
+量測總耗時與寫入磁碟的位元組數，並確認兩者的 all_revocations.json 完全相同。
+名冊以 synthetic_pdf 產生 (含公告首頁、頁面帶 /Rotate)，也可指定現有的 list/ 目錄。
+
+用法：
+    python benchmarks/bench_fused_extraction.py [--src-dir list] [--files 4 --rows 600] [--output results.json]
+"""
+import argparse
+import contextlib
+import filecmp
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import extract_tables
+import preprocess_pdfs
+from synthetic_pdf import write_roster
+
+def dir_bytes(path):
+    if not os.path.isdir(path):
+        return 0
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="名冊前處理 + 擷取：兩階段流程與 --fused 的比較")
+    arg_parser.add_argument("--src-dir", default=None, help="原始名冊目錄 (未指定時產生合成名冊)")
+    arg_parser.add_argument("--files", type=int, default=4, help="合成名冊的檔案數")
+    arg_parser.add_argument("--rows", type=int, default=600, help="合成名冊每個檔案的資料列數")
+    arg_parser.add_argument("--output", help="將結果另存為 JSON")
+    args = arg_parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src_dir = os.path.abspath(args.src_dir) if args.src_dir else os.path.join(tmp, "list")
+        if not args.src_dir:
+            for i in range(args.files):
+                # 原始檔案為直式頁面 (/Rotate 270)，前處理旋轉 90 度後成為正向；最後一個檔案不需旋轉
+                name = f"roster{i:02d}(不需).pdf" if i == args.files - 1 else f"roster{i:02d}.pdf"
+                write_roster(os.path.join(src_dir, name), categories=(1, 2), rows_per_category=args.rows // 2,
+                             seed=i, cover_page=True, rotate=0 if "不需" in name else 270)
+        files = [f for f in os.listdir(src_dir) if f.lower().endswith(".pdf")]
+        if not files:
+            print(f"找不到 PDF: {src_dir}")
+            return 1
+        source_bytes = dir_bytes(src_dir)
+
+        results = {}
+        processed_dir = os.path.join(tmp, "processed_list")
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            preprocess_pdfs.process_pdfs(source_dir=src_dir, output_dir=processed_dir)
+            preprocessed = time.perf_counter()
+            extract_tables.run_extraction(src_dir=processed_dir, output_file=os.path.join(tmp, "two_step.json"),
+                                          log_path=os.path.join(tmp, "two_step.jsonl"))
+        end = time.perf_counter()
+        results["two_step"] = {
+            "ms": round((end - start) * 1000, 3),
+            "preprocess_ms": round((preprocessed - start) * 1000, 3),
+            "bytes_written": dir_bytes(processed_dir) + os.path.getsize(os.path.join(tmp, "two_step.json"))
+                             + os.path.getsize(os.path.join(tmp, "two_step.jsonl")),
+        }
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            extract_tables.run_extraction(src_dir=src_dir, output_file=os.path.join(tmp, "fused.json"),
+                                          log_path=os.path.join(tmp, "fused.jsonl"), fused=True)
+        end = time.perf_counter()
+        results["fused"] = {
+            "ms": round((end - start) * 1000, 3),
+            "bytes_written": os.path.getsize(os.path.join(tmp, "fused.json"))
+                             + os.path.getsize(os.path.join(tmp, "fused.jsonl")),
+        }
+        same = filecmp.cmp(os.path.join(tmp, "two_step.json"), os.path.join(tmp, "fused.json"), shallow=False)
+        with open(os.path.join(tmp, "fused.json"), encoding="utf-8") as f:
+            rows = len(json.load(f))
+
+    print(f"名冊: {len(files)} 個檔案 ({source_bytes:,} bytes)，{rows} 筆")
+    for name, r in results.items():
+        extra = f"  (前處理 {r['preprocess_ms']:.1f} ms)" if "preprocess_ms" in r else ""
+        print(f"  {name:<10} {r['ms']:>9.1f} ms  寫入 {r['bytes_written']:>12,} bytes{extra}")
+    print(f"輸出{'相同' if same else '不同'}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"files": len(files), "source_bytes": source_bytes, "rows": rows, **results}, f, indent=2)
+    return 0 if same else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
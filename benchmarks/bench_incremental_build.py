@@ -0,0 +1,97 @@
+"""
+增量建置基準測試：build_viewer_data.py 的建置快取 (build_cache.py)
+將 parsed_results/ 與撤銷名冊複製到暫存目錄後依序量測：
+  cold       沒有快取，全部讀取與序列化
+  warm       沒有任何變動
+  one_change 修改一份決定書的內文 (當事人不變，名冊連結不受影響)
+  no_cache   --no-cache (每次都全部重新處理，即原本的做法)
+並確認快取建置的輸出與不使用快取時完全相同。
+
+用法：
+    python benchmarks/bench_incremental_build.py [--output results.json]
+"""
+import argparse
+import contextlib
+import filecmp
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import build_viewer_data
+from storage import JsonStore
+
+def timed_build(**kwargs):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        build_viewer_data.build_data_js(**kwargs)
+    return time.perf_counter() - start
+
+def tree_diff(a, b):
+    """兩個目錄中內容不同或只存在一邊的檔案"""
+    cmp = filecmp.dircmp(a, b)
+    diff = [os.path.join(a, f) for f in cmp.left_only + cmp.right_only]
+    _, mismatch, errors = filecmp.cmpfiles(a, b, cmp.common_files, shallow=False)
+    diff += [os.path.join(a, f) for f in mismatch + errors]
+    for sub in cmp.common_dirs:
+        diff += tree_diff(os.path.join(a, sub), os.path.join(b, sub))
+    return diff
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="build_viewer_data 增量建置基準測試")
+    arg_parser.add_argument("--json-dir", default=os.path.join(ROOT, "parsed_results"))
+    arg_parser.add_argument("--revocations", default=os.path.join(ROOT, "all_revocations.json"))
+    arg_parser.add_argument("--output", help="將結果另存為 JSON")
+    args = arg_parser.parse_args(argv)
+
+    source = JsonStore(args.json_dir, revocations_file=None)
+    if not len(source):
+        print(f"找不到語料: {args.json_dir}")
+        return 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store_dir = os.path.join(tmp, "parsed_results")
+        shutil.copytree(args.json_dir, store_dir)
+        if os.path.exists(args.revocations):
+            shutil.copy(args.revocations, os.path.join(tmp, "all_revocations.json"))
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            cached = dict(store_path=store_dir, cache_path=os.path.join(tmp, "build_cache.db"))
+            timings = {"cold": timed_build(**cached), "warm": timed_build(**cached)}
+
+            store = JsonStore(store_dir)
+            target = store.filenames()[len(store) // 2]
+            result = store.get(target)
+            result["content"]["full_text"] = (result["content"].get("full_text") or "") + "\n(benchmark)"
+            with contextlib.redirect_stdout(io.StringIO()):
+                store.add(result)
+            timings["one_change"] = timed_build(**cached)
+            timings["no_cache"] = timed_build(store_path=store_dir, cache_path=None,
+                                              output_dir=os.path.join(tmp, "fresh"),
+                                              index_file=os.path.join(tmp, "fresh_index.json"))
+
+            diff = tree_diff(build_viewer_data.VIEWER_DATA_DIR, "fresh")
+            if not filecmp.cmp(build_viewer_data.INDEX_FILE, "fresh_index.json", shallow=False):
+                diff.append(build_viewer_data.INDEX_FILE)
+        finally:
+            os.chdir(cwd)
+
+    print(f"語料: {len(source)} 份決定書")
+    for name, seconds in timings.items():
+        print(f"  {name:<12} {seconds * 1000:>9.1f} ms")
+    print(f"輸出與不使用快取時{'相同' if not diff else '不同: ' + ', '.join(diff[:5])}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({k: round(v * 1000, 3) for k, v in timings.items()}, f, indent=2)
+    return 0 if not diff else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""
+列表頁解析效能測試
+對 benchmarks/fixtures/ 下每個列表頁 HTML，以每個可用的後端解析，
+先確認輸出與 BeautifulSoup 版本一致，再量測每秒可處理的項目數。
+
+可將實際網站的列表頁另存到 fixtures/ 一併測試：
+    curl -A "Mozilla/5.0" "https://www.ey.gov.tw/tjb/AAF17F8B016C031A?page=1&PS=100" \\
+        -o benchmarks/fixtures/listing_page1.html
+
+用法：
+    python benchmarks/bench_listing.py [--repeat 50] [--output results.json]
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from listing_parser import BACKENDS
+
+FIXTURE_DIR = os.path.join(ROOT, "benchmarks", "fixtures")
+
+def bench_backend(extract, html, repeat):
+    # 先暖身一次，排除 import / 快取建立的成本
+    items, _ = extract(html)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        extract(html)
+    elapsed = time.perf_counter() - start
+    return items, elapsed
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="列表頁解析後端效能比較")
+    arg_parser.add_argument("--repeat", type=int, default=50, help="每個後端重複解析次數")
+    arg_parser.add_argument("--output", help="將結果另存為 JSON")
+    args = arg_parser.parse_args(argv)
+
+    fixtures = sorted(glob.glob(os.path.join(FIXTURE_DIR, "listing_*.html")))
+    if not fixtures:
+        print(f"找不到列表頁樣本: {FIXTURE_DIR}")
+        return 1
+
+    results = []
+    mismatch = False
+    for path in fixtures:
+        with open(path, "r", encoding="utf-8") as f:
+            html = f.read()
+        name = os.path.basename(path)
+        print(f"\n{name} ({len(html) / 1024:.1f} KB)")
+
+        reference = BACKENDS["bs4"](html)
+        for backend, extract in BACKENDS.items():
+            items, elapsed = bench_backend(extract, html, args.repeat)
+            same = extract(html) == reference
+            mismatch |= not same
+            items_per_sec = len(items) * args.repeat / elapsed if elapsed else 0
+            ms_per_page = elapsed / args.repeat * 1000
+            print(f"  {backend:<11} {items_per_sec:>10.0f} items/s  {ms_per_page:>8.2f} ms/page"
+                  f"  {'OK' if same else '輸出與 bs4 不一致!'}")
+            results.append({
+                "fixture": name,
+                "backend": backend,
+                "items": len(items),
+                "items_per_sec": round(items_per_sec, 1),
+                "ms_per_page": round(ms_per_page, 3),
+                "matches_bs4": same
+            })
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n結果已寫入 {args.output}")
+    return 1 if mismatch else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""
+低記憶體解析模式的記憶體基準測試 (DecisionParser(low_memory=True))
+以 synthetic_pdf.write_decision 產生長篇決定書 (預設約 200 頁：本文約 170 頁 + 30 頁附表)，
+每種模式在獨立的子行程中解析一次，量測最大常駐記憶體 (ru_maxrss，扣除載入模組後的基準)，
+--tracemalloc 時另記錄 Python 配置的峰值 (解析會明顯變慢)。
+並確認兩種模式寫出的 JSON 完全相同 (低記憶體模式以 storage.expand_sections 展開章節)。
+
+用法：
+    python benchmarks/bench_low_memory.py [--pages 170 --tables 30] [--pdf 檔案] [--tracemalloc] [--output results.json]
+"""
+import argparse
+import hashlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MODES = ("default", "low_memory")
+
+def child(mode, pdf_path, trace):
+    """子行程：解析一次並以 JSON 輸出量測結果"""
+    import tracemalloc
+    from pdf_parser import DecisionParser
+    from storage import expand_sections
+
+    parser = DecisionParser(low_memory=mode == "low_memory")
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result = parser.parse(pdf_path)
+    elapsed = time.perf_counter() - start
+    report = {
+        "mode": mode,
+        "ms": round(elapsed * 1000, 3),
+        "rss_baseline_kb": baseline,
+        "rss_peak_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "pages": result.get("page_count"),
+        "chars": len(result["content"]["full_text"]),
+    }
+    if trace:
+        report["tracemalloc_peak_kb"] = tracemalloc.get_traced_memory()[1] // 1024
+        tracemalloc.stop()
+    output = json.dumps(expand_sections(result), ensure_ascii=False, indent=2)
+    report["output_sha256"] = hashlib.sha256(output.encode("utf-8")).hexdigest()
+    print(json.dumps(report))
+
+def run_child(mode, pdf_path, trace):
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", mode, "--pdf", pdf_path]
+    if trace:
+        cmd.append("--tracemalloc")
+    out = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="低記憶體解析模式的記憶體基準測試")
+    arg_parser.add_argument("--pdf", default=None, help="改用現有的 PDF (未指定時產生合成決定書)")
+    arg_parser.add_argument("--pages", type=int, default=170, help="合成決定書的本文頁數")
+    arg_parser.add_argument("--tables", type=int, default=30, help="附表數 (每個一頁)")
+    arg_parser.add_argument("--table-rows", type=int, default=20, help="每個附表的資料列數")
+    arg_parser.add_argument("--tracemalloc", action="store_true", help="另以 tracemalloc 記錄 Python 配置的峰值")
+    arg_parser.add_argument("--output", help="將結果另存為 JSON")
+    arg_parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = arg_parser.parse_args(argv)
+
+    if args.child:
+        child(args.child, args.pdf, args.tracemalloc)
+        return 0
+
+    from synthetic_pdf import write_decision
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = args.pdf
+        if not pdf_path:
+            pdf_path = os.path.join(tmp, "促轉復查字第1號_long.pdf")
+            write_decision(pdf_path, pages=args.pages, heading_depth=4, tables=args.tables,
+                           table_rows=args.table_rows, seed=1)
+        reports = [run_child(mode, pdf_path, args.tracemalloc) for mode in MODES]
+
+    same = reports[0]["output_sha256"] == reports[1]["output_sha256"]
+    print(f"文件: {reports[0]['pages']} 頁、{reports[0]['chars']:,} 字")
+    for r in reports:
+        tm = f"  tracemalloc 峰值 {r['tracemalloc_peak_kb'] / 1024:>7.1f} MB" if "tracemalloc_peak_kb" in r else ""
+        print(f"  {r['mode']:<11} {r['ms']:>9.1f} ms  RSS 峰值 {r['rss_peak_kb'] / 1024:>7.1f} MB "
+              f"(解析增加 {(r['rss_peak_kb'] - r['rss_baseline_kb']) / 1024:>6.1f} MB){tm}")
+    print(f"輸出{'相同' if same else '不同'}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
+    return 0 if same else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
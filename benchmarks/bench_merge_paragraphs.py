@@ -0,0 +1,135 @@
+"""
+merge_paragraphs 一致性檢查與基準測試
+1. 以 parsed_results/ 中的決定書 (原文與切回 PDF 行寬的版本) 以及數個邊界案例，
+   確認目前的實作與舊版 (+= 串接) 輸出逐字元相同，不同時以非零狀態結束。
+2. 以合成的 10,000 行文件比較新舊版本的耗時。
+   CPython 對 += 有就地擴充的最佳化，行尾乾淨時舊版仍接近線性；
+   行尾帶空白時 strip() 每行都會複製整個段落，段落越長越接近平方時間 (--trailing-space)。
+
+用法：
+    python benchmarks/bench_merge_paragraphs.py [--lines 10000] [--para-lines 500] [--trailing-space] [--output results.json]
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pdf_parser import DecisionParser
+from bench_parser_methods import rewrap
+
+_LEGACY_NEW_PARA_RE = re.compile(r'^([一二三四五六七八九十]+、|\([一二三四五六七八九十]+\)|\d+[、\.]|\(\d+\)|主\s*文|理\s*由|據\s*上\s*論\s*結)')
+
+def legacy_merge_paragraphs(text):
+    """舊版實作 (逐行 += 串接)，作為比對基準"""
+    if not text:
+        return ""
+    lines = text.split('\n')
+    merged_lines = []
+    current_paragraph = lines[0]
+    for i in range(1, len(lines)):
+        line = lines[i]
+        if _LEGACY_NEW_PARA_RE.match(line) or current_paragraph.strip().endswith(('。', '：', ':')):
+            merged_lines.append(current_paragraph)
+            current_paragraph = line
+        else:
+            current_paragraph += line
+    merged_lines.append(current_paragraph)
+    return "\n".join(merged_lines)
+
+EDGE_CASES = [
+    "",
+    "\n",
+    "\n\n\n",
+    "單行",
+    "結尾句號。\n下一行",
+    "結尾句號。  \n下一行",
+    "冒號：\n \n接續",
+    "半形冒號:\t\n接續",
+    "   \n。\n   \n接續",
+    "一、標題\n內容\n(一)子標題\n1.項目\n(1)細項\n據 上 論 結\n主 文\n理由",
+    "甲\n\n乙。\n\n丙",
+    "全形空白　。　\n接續",
+]
+
+def synthetic_document(n_lines, para_lines, width=36, trailing=""):
+    """合成 n_lines 行的理由段落，每 para_lines 行才出現一次句號 (即長段落)，每行結尾加上 trailing"""
+    filler = "聲請人主張其於戒嚴時期遭受不法審判並經判處有期徒刑之事實應予平復"
+    lines = []
+    for i in range(n_lines):
+        line = (filler * 2)[i % len(filler):][:width]
+        if i % para_lines == para_lines - 1:
+            line = line[:-1] + "。"
+        elif i % (para_lines * 4) == 0:
+            line = f"{i // para_lines + 1}." + line[2:]
+        lines.append(line + trailing)
+    return "\n".join(lines)
+
+def check_identity(parser, texts):
+    mismatches = 0
+    for text in texts:
+        if parser.merge_paragraphs(text) != legacy_merge_paragraphs(text):
+            mismatches += 1
+            print(f"  [不一致] {text[:40]!r}")
+    return mismatches
+
+def best_time(func, text, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="merge_paragraphs 一致性檢查與基準測試")
+    arg_parser.add_argument("--results-dir", default=os.path.join(ROOT, "parsed_results"))
+    arg_parser.add_argument("--lines", type=int, default=10000, help="合成文件行數")
+    arg_parser.add_argument("--para-lines", type=int, default=500, help="合成文件每段行數")
+    arg_parser.add_argument("--trailing-space", action="store_true", help="合成文件每行結尾加一個空白")
+    arg_parser.add_argument("--repeat", type=int, default=5, help="重複次數 (取最佳值)")
+    arg_parser.add_argument("--output", help="將結果另存為 JSON")
+    args = arg_parser.parse_args(argv)
+
+    parser = DecisionParser()
+
+    texts = list(EDGE_CASES)
+    for path in sorted(glob.glob(os.path.join(args.results_dir, "*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            full_text = json.load(f).get("content", {}).get("full_text") or ""
+        texts.extend([full_text, rewrap(full_text)])
+    mismatches = check_identity(parser, texts)
+    print(f"一致性檢查: {len(texts)} 份輸入，{mismatches} 份不一致")
+
+    doc = synthetic_document(args.lines, args.para_lines, trailing=" " if args.trailing_space else "")
+    if parser.merge_paragraphs(doc) != legacy_merge_paragraphs(doc):
+        mismatches += 1
+        print("  [不一致] 合成文件")
+    legacy = best_time(legacy_merge_paragraphs, doc, args.repeat)
+    current = best_time(parser.merge_paragraphs, doc, args.repeat)
+    print(f"合成文件: {args.lines} 行，每段 {args.para_lines} 行，{len(doc)} 字"
+          + ("，行尾帶空白" if args.trailing_space else ""))
+    print(f"  舊版 {legacy * 1000:>9.2f} ms")
+    print(f"  新版 {current * 1000:>9.2f} ms  ({legacy / current:.1f}x)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "inputs_checked": len(texts),
+                "mismatches": mismatches,
+                "lines": args.lines,
+                "para_lines": args.para_lines,
+                "trailing_space": args.trailing_space,
+                "legacy_ms": round(legacy * 1000, 3),
+                "current_ms": round(current * 1000, 3)
+            }, f, ensure_ascii=False, indent=2)
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
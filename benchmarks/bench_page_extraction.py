@@ -0,0 +1,92 @@
+"""
+逐頁擷取成本比較
+原本的流程 (extract_text + extract_tables) 與 DecisionParser.extract_page (沒有格線的頁面略過 TableFinder)，
+逐頁量測耗時並確認兩者輸出一致。每次量測前都清除頁面快取，確保包含版面分析的成本。
+
+用法：
+    python benchmarks/bench_page_extraction.py [PDF 目錄] [--limit 20] [--output results.json]
+"""
+import argparse
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+
+import pdfplumber
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pdf_parser import DecisionParser
+
+def legacy_extract(page):
+    return page.extract_text(), page.extract_tables()
+
+def timed(func, page):
+    page.close()  # 清除版面與文字快取
+    start = time.perf_counter()
+    result = func(page)
+    return result, time.perf_counter() - start
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="逐頁擷取成本比較")
+    arg_parser.add_argument("pdf_dir", nargs="?", default=os.path.join(ROOT, "downloads_ey_tjb"))
+    arg_parser.add_argument("--limit", type=int, default=0, help="最多測試幾個檔案 (0 為全部)")
+    arg_parser.add_argument("--output", help="將結果另存為 JSON")
+    args = arg_parser.parse_args(argv)
+
+    files = sorted(glob.glob(os.path.join(args.pdf_dir, "*.pdf")))
+    if args.limit:
+        files = files[:args.limit]
+    if not files:
+        print(f"找不到 PDF: {args.pdf_dir}")
+        return 1
+
+    parser = DecisionParser()
+    samples = {"text_only": {"legacy": [], "single_pass": []},
+               "with_rulings": {"legacy": [], "single_pass": []}}
+    mismatches = 0
+
+    for path in files:
+        with pdfplumber.open(path) as pdf:
+            for i, page in enumerate(pdf.pages):
+                # 交替先後順序，避免檔案快取等因素偏向某一方
+                if i % 2:
+                    new, t_new = timed(parser.extract_page, page)
+                    old, t_old = timed(legacy_extract, page)
+                else:
+                    old, t_old = timed(legacy_extract, page)
+                    new, t_new = timed(parser.extract_page, page)
+                if old != new:
+                    mismatches += 1
+                    print(f"  [不一致] {os.path.basename(path)} 第 {i + 1} 頁")
+                kind = "with_rulings" if page.edges else "text_only"
+                samples[kind]["legacy"].append(t_old)
+                samples[kind]["single_pass"].append(t_new)
+                page.close()
+
+    print(f"{len(files)} 個檔案")
+    summary = {"files": len(files), "mismatches": mismatches, "pages": {}}
+    for kind, data in samples.items():
+        if not data["legacy"]:
+            continue
+        old_ms = statistics.mean(data["legacy"]) * 1000
+        new_ms = statistics.mean(data["single_pass"]) * 1000
+        print(f"  {kind:<13} {len(data['legacy']):>5} 頁  原本 {old_ms:7.2f} ms/頁  "
+              f"extract_page {new_ms:7.2f} ms/頁  ({(new_ms - old_ms) / old_ms * 100:+.1f}%)")
+        summary["pages"][kind] = {
+            "count": len(data["legacy"]),
+            "legacy_ms_per_page": round(old_ms, 3),
+            "single_pass_ms_per_page": round(new_ms, 3)
+        }
+    print(f"輸出不一致的頁數: {mismatches}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
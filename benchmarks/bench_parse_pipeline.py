@@ -0,0 +1,210 @@
+"""
+決定書解析流程的分階段基準測試
+以 synthetic_pdf.write_decision 產生固定的合成語料 (頁數、標題層數、附表數、章節組合的組合，
+同樣的參數每次產生相同的 PDF)，逐份量測 DecisionParser 各階段的耗時：
+  page_extraction       pdfplumber 開檔與逐頁 extract_page (版面分析、文字、表格)
+  clean_text            逐頁清洗
+  merge_paragraphs      段落合併
+  locate_sections       章節位置 (extract_metadata 與 extract_sections 共用)
+  extract_metadata / extract_sections / build_hierarchy_tree
+另量測一次完整的 parse 作為對照。結果寫成 JSON (含 commit 與套件版本)，
+以 --compare 與先前的結果比較，各階段變慢超過 --threshold 倍時以非 0 結束。
+
+用法：
+    python benchmarks/bench_parse_pipeline.py [--pages 2 10 40] [--depth 2 4] [--tables 0 2]
+                                              [--layouts decision simple] [--repeat 3]
+                                              [--output results.json] [--compare baseline.json]
+    python benchmarks/bench_parse_pipeline.py --pdf-dir downloads_ey_tjb --limit 10
+"""
+import argparse
+import glob
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import pdfplumber
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pdf_parser import DecisionParser, PARSER_VERSION
+from synthetic_pdf import DECISION_LAYOUTS, write_decision
+
+STAGES = ["page_extraction", "clean_text", "merge_paragraphs", "locate_sections",
+          "extract_metadata", "extract_sections", "build_hierarchy_tree"]
+
+def generate_corpus(directory, pages, depths, tables, layouts):
+    corpus = []
+    for n, (p, d, t, layout) in enumerate(itertools.product(pages, depths, tables, layouts), 1):
+        name = f"促轉司字第{n}號_p{p}_d{d}_t{t}_{layout}.pdf"
+        total = write_decision(os.path.join(directory, name), pages=p, heading_depth=d, tables=t,
+                               layout=layout, case_no=n, seed=n)
+        corpus.append({"file": name, "pages": total, "heading_depth": d, "tables": t, "layout": layout})
+    return corpus
+
+def run_stages(parser, path):
+    """依 extract_pages / build_result 的順序執行各階段，Returns: (各階段秒數, 全文字數)"""
+    clock = time.perf_counter
+    timings = {}
+
+    start = clock()
+    raw = []
+    with pdfplumber.open(path) as pdf:
+        for page in pdf.pages:
+            raw.append(parser.extract_page(page))
+    timings["page_extraction"] = clock() - start
+
+    start = clock()
+    texts = [parser.clean_text(text) for text, _ in raw if text]
+    timings["clean_text"] = clock() - start
+
+    start = clock()
+    merged = parser.merge_paragraphs("\n".join(texts))
+    timings["merge_paragraphs"] = clock() - start
+
+    start = clock()
+    spans = parser.locate_sections(merged)
+    timings["locate_sections"] = clock() - start
+
+    start = clock()
+    parser.extract_metadata(merged, spans)
+    timings["extract_metadata"] = clock() - start
+
+    start = clock()
+    sections = parser.extract_sections(merged, spans)
+    timings["extract_sections"] = clock() - start
+
+    start = clock()
+    parser.build_hierarchy_tree(sections.get("reasoning", ""))
+    timings["build_hierarchy_tree"] = clock() - start
+    return timings, len(merged)
+
+def bench_document(parser, path, repeat):
+    """各階段與完整 parse 取 repeat 次中的最小值 (毫秒)"""
+    best = {}
+    chars = 0
+    for _ in range(repeat):
+        timings, chars = run_stages(parser, path)
+        for stage, seconds in timings.items():
+            best[stage] = min(best.get(stage, seconds), seconds)
+    parse_best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parser.parse(path)
+        elapsed = time.perf_counter() - start
+        parse_best = elapsed if parse_best is None else min(parse_best, elapsed)
+    return {stage: round(best[stage] * 1000, 3) for stage in STAGES}, round(parse_best * 1000, 3), chars
+
+def summarize(documents):
+    total_chars = sum(d["chars"] for d in documents)
+    total_ms = sum(sum(d["stages"].values()) for d in documents)
+    summary = {}
+    for stage in STAGES:
+        ms = sum(d["stages"][stage] for d in documents)
+        summary[stage] = {
+            "total_ms": round(ms, 3),
+            "share": round(ms / total_ms, 4) if total_ms else 0,
+            "chars_per_sec": round(total_chars / (ms / 1000)) if ms else 0,
+        }
+    return summary
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline_path, threshold):
+    """Returns: 變慢超過 threshold 倍的階段"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\n與 {baseline_path} (commit {baseline['meta'].get('commit')}) 比較：")
+    regressed = []
+    for stage in STAGES + ["parse"]:
+        old = baseline["stages"].get(stage, {}).get("total_ms")
+        new = results["stages"][stage]["total_ms"]
+        if not old:
+            continue
+        ratio = new / old
+        flag = ""
+        if ratio > threshold:
+            regressed.append(stage)
+            flag = "  <- 變慢"
+        print(f"  {stage:<22} {old:>10.1f} -> {new:>10.1f} ms  ({ratio:.2f}x){flag}")
+    if baseline.get("corpus") != results["corpus"]:
+        print("  注意：語料參數不同，比較僅供參考")
+    return regressed
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="決定書解析流程的分階段基準測試")
+    arg_parser.add_argument("--pdf-dir", default=None, help="改用現有的 PDF 目錄 (未指定時產生合成語料)")
+    arg_parser.add_argument("--limit", type=int, default=0, help="--pdf-dir 最多測試幾個檔案 (0 為全部)")
+    arg_parser.add_argument("--pages", type=int, nargs="+", default=[2, 10, 40], help="合成決定書的本文頁數")
+    arg_parser.add_argument("--depth", type=int, nargs="+", default=[2, 4], help="理由的標題層數 (1-4)")
+    arg_parser.add_argument("--tables", type=int, nargs="+", default=[0, 2], help="附表數")
+    arg_parser.add_argument("--layouts", nargs="+", default=["decision"], choices=sorted(DECISION_LAYOUTS))
+    arg_parser.add_argument("--repeat", type=int, default=3, help="重複次數 (取最佳值)")
+    arg_parser.add_argument("--output", help="將結果另存為 JSON")
+    arg_parser.add_argument("--compare", help="與先前的結果 (--output 產生的 JSON) 比較")
+    arg_parser.add_argument("--threshold", type=float, default=1.2, help="--compare 時視為變慢的倍數")
+    args = arg_parser.parse_args(argv)
+
+    parser = DecisionParser()
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.pdf_dir:
+            pdf_dir = args.pdf_dir
+            files = sorted(os.path.basename(f) for f in glob.glob(os.path.join(pdf_dir, "*.pdf")))
+            if args.limit:
+                files = files[:args.limit]
+            corpus = [{"file": f} for f in files]
+        else:
+            pdf_dir = tmp
+            corpus = generate_corpus(tmp, args.pages, args.depth, args.tables, args.layouts)
+        if not corpus:
+            print(f"找不到 PDF: {args.pdf_dir}")
+            return 1
+
+        documents = []
+        for item in corpus:
+            stages, parse_ms, chars = bench_document(parser, os.path.join(pdf_dir, item["file"]), args.repeat)
+            documents.append({**item, "chars": chars, "stages": stages, "parse_ms": parse_ms})
+
+    stages = summarize(documents)
+    stages["parse"] = {"total_ms": round(sum(d["parse_ms"] for d in documents), 3)}
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "parser_version": PARSER_VERSION,
+            "python": platform.python_version(),
+            "pdfplumber": pdfplumber.__version__,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "repeat": args.repeat,
+        },
+        "corpus": {"pdf_dir": args.pdf_dir} if args.pdf_dir else
+                  {"pages": args.pages, "depth": args.depth, "tables": args.tables, "layouts": args.layouts},
+        "stages": stages,
+        "documents": documents,
+    }
+
+    pages = sum(d.get("pages", 0) for d in documents)
+    chars = sum(d["chars"] for d in documents)
+    print(f"語料: {len(documents)} 份決定書" + (f"、{pages} 頁" if pages else "") + f"、{chars:,} 字")
+    for stage in STAGES:
+        s = stages[stage]
+        print(f"  {stage:<22} {s['total_ms']:>10.1f} ms  {s['share'] * 100:>5.1f}%  {s['chars_per_sec']:>12,} 字/秒")
+    print(f"  {'parse (完整流程)':<22} {stages['parse']['total_ms']:>10.1f} ms")
+
+    regressed = compare(results, args.compare, args.threshold) if args.compare else []
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return 1 if regressed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+DecisionParser 各方法的微基準測試
+以 parsed_results/ 中實際決定書的文字為輸入，分別量測：
+clean_text、merge_paragraphs、extract_metadata、extract_sections、
+get_line_level (逐行)、build_hierarchy_tree，以及 build_result 中
+MetaData 與章節共用一次 locate_sections 的組合。
+clean_text / merge_paragraphs 的輸入會先切回 PDF 行寬 (見 rewrap)。
+
+用法：
+    python benchmarks/bench_parser_methods.py [--repeat 5] [--output results.json]
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pdf_parser import DecisionParser
+
+def load_corpus(results_dir):
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(results_dir, "*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            content = json.load(f).get("content", {})
+        if content.get("full_text"):
+            corpus.append(content)
+    return corpus
+
+def rewrap(text, width=36):
+    """
+    將已合併的段落切回 PDF 每行約 width 字的樣子，
+    模擬 clean_text / merge_paragraphs 實際收到的逐行文字
+    """
+    lines = []
+    for para in text.split("\n"):
+        lines.extend(para[i:i + width] for i in range(0, len(para), width))
+    return "\n".join(lines)
+
+def bench(name, func, inputs, repeat):
+    """回傳 (名稱, 呼叫次數, 每次呼叫的平均微秒數, 總字元數)"""
+    func(inputs[0])  # 暖身
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in inputs:
+            func(item)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return {
+        "method": name,
+        "calls": len(inputs),
+        "us_per_call": round(best / len(inputs) * 1e6, 3),
+        "chars_per_sec": round(sum(len(x) for x in inputs) / best) if best else 0
+    }
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="DecisionParser 方法微基準測試")
+    arg_parser.add_argument("--results-dir", default=os.path.join(ROOT, "parsed_results"))
+    arg_parser.add_argument("--repeat", type=int, default=5, help="重複次數 (取最佳值)")
+    arg_parser.add_argument("--output", help="將結果另存為 JSON")
+    args = arg_parser.parse_args(argv)
+
+    corpus = load_corpus(args.results_dir)
+    if not corpus:
+        print(f"找不到語料: {args.results_dir}")
+        return 1
+
+    parser = DecisionParser()
+    full_texts = [c["full_text"] for c in corpus]
+    raw_texts = [rewrap(t) for t in full_texts]
+    reasonings = [c.get("reasoning") or c["full_text"] for c in corpus]
+    lines = [line for text in reasonings for line in text.split("\n") if line.strip()]
+
+    def metadata_and_sections(text):
+        spans = parser.locate_sections(text)
+        parser.extract_metadata(text, spans)
+        parser.extract_sections(text, spans)
+
+    cases = [
+        ("clean_text", parser.clean_text, raw_texts),
+        ("merge_paragraphs", parser.merge_paragraphs, raw_texts),
+        ("extract_metadata", parser.extract_metadata, full_texts),
+        ("extract_sections", parser.extract_sections, full_texts),
+        ("metadata+sections", metadata_and_sections, full_texts),
+        ("get_line_level", parser.get_line_level, lines),
+        ("build_hierarchy_tree", parser.build_hierarchy_tree, reasonings),
+    ]
+
+    print(f"語料: {len(corpus)} 份決定書，{sum(map(len, full_texts))} 字，{len(lines)} 行理由")
+    results = []
+    for name, func, inputs in cases:
+        r = bench(name, func, inputs, args.repeat)
+        results.append(r)
+        print(f"  {name:<22} {r['calls']:>6} 次  {r['us_per_call']:>10.2f} µs/次  {r['chars_per_sec']:>12,} 字/秒")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
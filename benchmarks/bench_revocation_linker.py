@@ -0,0 +1,93 @@
+"""
+撤銷名冊連結基準測試 (revocation_linker.py)
+  1. 實際語料：連結統計，並與舊做法 (整個當事人字串完全相符、取第一個候選) 比較連結筆數
+  2. 放大語料：名冊與決定書複製 k 份 (案號的號碼錯開，名冊全部視為第二類)，
+     量測建立索引 + 連結的時間，確認時間約與資料量成正比
+
+用法：
+    python benchmarks/bench_revocation_linker.py [--scale 1 4 16] [--output results.json]
+"""
+import argparse
+import copy
+import json
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from build_viewer_data import decision_sort_key
+from revocation_linker import RevocationLinker, decision_record, format_stats
+from storage import open_store
+
+def legacy_link(decisions, revocations):
+    """舊做法：當事人字串完全相符 (只移除空白)"""
+    by_subject = {}
+    for d in decisions:
+        subject = re.sub(r"[\s　]", "", (d.get("metadata") or {}).get("subject") or "")
+        if subject:
+            by_subject.setdefault(subject, d)
+    return sum(1 for r in revocations
+               if r.get("category") == 2 and re.sub(r"[\s　]", "", r.get("name") or "") in by_subject)
+
+def scaled(records, revocations, k):
+    """複製 k 份，第 i 份的案號號碼加上 i * 100000"""
+    out_records, out_revocations = [], []
+    for i in range(k):
+        shift = i * 100000
+        for d in records:
+            out_records.append({"id": f"{d['id']}#{i}", "parties": d["parties"],
+                                "case_refs": [[y, w, n + shift] for y, w, n in d["case_refs"]]})
+        for r in revocations:
+            r = copy.copy(r)
+            r["category"] = 2
+            r["case_id"] = [re.sub(r"(\d+)號", lambda m: f"{int(m.group(1)) + shift}號", c)
+                            for c in r.get("case_id") or []]
+            out_revocations.append(r)
+    return out_records, out_revocations
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="撤銷名冊連結基準測試")
+    arg_parser.add_argument("--store", default=None, help="解析結果來源 (同 build_viewer_data.py)")
+    arg_parser.add_argument("--scale", type=int, nargs="+", default=[1, 4, 16])
+    arg_parser.add_argument("--output", help="將結果另存為 JSON")
+    args = arg_parser.parse_args(argv)
+
+    store = open_store(args.store)
+    try:
+        decisions = sorted(store.iter_decisions(), key=decision_sort_key)
+        revocations = store.revocations()
+    finally:
+        store.close()
+    if not decisions or not revocations:
+        print("找不到決定書或撤銷名冊")
+        return 1
+
+    records = [decision_record(d) for d in decisions]
+    stats = RevocationLinker(records).link(copy.deepcopy(revocations))
+    legacy = legacy_link(decisions, revocations)
+    print(f"語料: {len(decisions)} 份決定書、{len(revocations)} 筆名冊")
+    print(f"  {format_stats(stats)}")
+    print(f"  舊做法連結 {legacy} 筆")
+
+    results = {"stats": stats, "legacy_linked": legacy, "scale": []}
+    print(f"{'倍數':>4}{'決定書':>8}{'名冊':>10}{'時間 (ms)':>12}{'每筆 (µs)':>12}")
+    for k in args.scale:
+        big_records, big_revocations = scaled(records, revocations, k)
+        start = time.perf_counter()
+        RevocationLinker(big_records).link(big_revocations)
+        seconds = time.perf_counter() - start
+        per_record = seconds / len(big_revocations) * 1e6
+        print(f"{k:>6}{len(big_records):>11}{len(big_revocations):>12}{seconds * 1000:>14.1f}{per_record:>14.2f}")
+        results["scale"].append({"k": k, "decisions": len(big_records), "revocations": len(big_revocations),
+                                 "ms": round(seconds * 1000, 3), "us_per_record": round(per_record, 3)})
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+撤銷名冊附加資料的成本比較 (revocation_log.py)
+  rewrite  原本 extract_special 的做法：讀入整份 all_revocations.json、附加後整份重寫 (indent=2)
+  append   append_to_array：只在檔案結尾寫入新增的資料列
+  log      逐頁附加到擷取記錄 (JSON Lines，含檢查點)
+並確認 append 的結果與整份重寫完全相同。
+
+用法：
+    python benchmarks/bench_revocation_log.py [--revocations all_revocations.json] [--rows 100] [--output results.json]
+"""
+import argparse
+import filecmp
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from revocation_log import RevocationLog, append_to_array
+
+def rewrite(path, records):
+    with open(path, "r", encoding="utf-8") as f:
+        all_results = json.load(f)
+    all_results.extend(records)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(all_results, f, ensure_ascii=False, indent=2)
+
+def timed(func, *args, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="撤銷名冊附加資料的成本比較")
+    arg_parser.add_argument("--revocations", default=os.path.join(ROOT, "all_revocations.json"))
+    arg_parser.add_argument("--rows", type=int, default=100, help="每次附加的資料列數")
+    arg_parser.add_argument("--output", help="將結果另存為 JSON")
+    args = arg_parser.parse_args(argv)
+
+    if not os.path.exists(args.revocations):
+        print(f"找不到名冊: {args.revocations}")
+        return 1
+    with open(args.revocations, encoding="utf-8") as f:
+        existing = json.load(f)
+    new_rows = [dict(r, source="benchmark.pdf") for r in existing[:args.rows]]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, "base.json")
+        with open(base, "w", encoding="utf-8") as f:
+            json.dump(existing, f, ensure_ascii=False, indent=2)
+
+        def fresh(name):
+            path = os.path.join(tmp, name)
+            shutil.copy(base, path)
+            return path
+
+        timings = {
+            "rewrite": timed(lambda: rewrite(fresh("rewrite.json"), new_rows)),
+            "append": timed(lambda: append_to_array(fresh("append.json"), new_rows)),
+        }
+
+        def log_pages():
+            log = RevocationLog(os.path.join(tmp, "log.jsonl"), reset=True)
+            for k in range(0, len(new_rows), 20):
+                log.append_page("benchmark.pdf", k // 20, new_rows[k:k + 20], {"header_names": []})
+            log.finish("benchmark.pdf")
+            log.close()
+        timings["log"] = timed(log_pages)
+        same = filecmp.cmp(os.path.join(tmp, "rewrite.json"), os.path.join(tmp, "append.json"), shallow=False)
+
+    print(f"既有 {len(existing)} 筆 ({os.path.getsize(args.revocations) / 1e6:.1f} MB)，附加 {len(new_rows)} 筆")
+    for name, seconds in timings.items():
+        print(f"  {name:<8} {seconds * 1000:>9.2f} ms")
+    print(f"append 結果與整份重寫{'相同' if same else '不同'}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"existing": len(existing), "rows": len(new_rows),
+                       "ms": {k: round(v * 1000, 3) for k, v in timings.items()}}, f, indent=2)
+    return 0 if same else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+全文檢索基準測試：bigram 索引 (search_index.py) 與逐份子字串掃描
+以 parsed_results/ 建立暫存索引，對同一組查詢詞比較兩者耗時，並確認結果相同。
+
+用法：
+    python benchmarks/bench_search_index.py [--repeat 5] [--output results.json]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from search_index import SearchIndex, FIELDS, normalize
+from storage import JsonStore
+
+QUERIES = ["叛亂", "有期徒刑", "死刑", "中華民國", "懲治叛亂條例", "臺灣警備總司令部", "駁回", "國"]
+
+def scan(docs, term):
+    """原本的做法：逐份決定書做子字串比對"""
+    term = normalize(term)
+    return {d["filename"] for d in docs if any(term in d["_norm"][f] for f in FIELDS)}
+
+def best_time(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="全文檢索索引與線性掃描比較")
+    arg_parser.add_argument("--json-dir", default=os.path.join(ROOT, "parsed_results"))
+    arg_parser.add_argument("--repeat", type=int, default=5, help="重複次數 (取最佳值)")
+    arg_parser.add_argument("--output", help="將結果另存為 JSON")
+    args = arg_parser.parse_args(argv)
+
+    docs = list(JsonStore(args.json_dir, revocations_file=None).iter_decisions())
+    if not docs:
+        print(f"找不到語料: {args.json_dir}")
+        return 1
+    for d in docs:
+        d["_norm"] = {f: normalize(d["content"].get(f) or "") for f in FIELDS}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = SearchIndex(os.path.join(tmp, "bench.db"))
+        start = time.perf_counter()
+        index.sync(docs)
+        build_time = time.perf_counter() - start
+        size = os.path.getsize(index.db_path)
+        print(f"語料: {len(docs)} 份決定書，建立索引 {build_time:.2f} 秒，{size / 1024 / 1024:.1f} MB")
+
+        results = []
+        mismatches = 0
+        for term in QUERIES:
+            hits = {f for f, _ in index.search(term)}
+            expected = scan(docs, term)
+            if hits != expected:
+                mismatches += 1
+            index_ms = best_time(lambda: index.search(term), args.repeat) * 1000
+            scan_ms = best_time(lambda: scan(docs, term), args.repeat) * 1000
+            results.append({"query": term, "hits": len(hits), "match": hits == expected,
+                            "index_ms": round(index_ms, 3), "scan_ms": round(scan_ms, 3)})
+            print(f"  {term:<10} {len(hits):>4} 份  索引 {index_ms:>8.2f} ms  掃描 {scan_ms:>8.2f} ms"
+                  + ("" if hits == expected else "  [結果不一致]"))
+        index.close()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"build_seconds": round(build_time, 3), "index_bytes": size, "queries": results},
+                      f, ensure_ascii=False, indent=2)
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
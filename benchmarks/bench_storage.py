@@ -0,0 +1,72 @@
+"""
+儲存層基準測試：JSON 目錄 (JsonStore) 與 SQLite (DecisionStore)
+以 parsed_results/ 匯入暫存資料庫後，比較：
+  list_metadata  列出所有決定書的 MetaData (generate_index)
+  find_subject   依受裁判人查詢
+  iter_decisions 讀出所有完整結果 (build_viewer_data)
+
+用法：
+    python benchmarks/bench_storage.py [--repeat 5] [--output results.json]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from storage import JsonStore, DecisionStore
+
+def best_time(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="JSON 目錄與 SQLite 儲存層基準測試")
+    arg_parser.add_argument("--json-dir", default=os.path.join(ROOT, "parsed_results"))
+    arg_parser.add_argument("--repeat", type=int, default=5, help="重複次數 (取最佳值)")
+    arg_parser.add_argument("--output", help="將結果另存為 JSON")
+    args = arg_parser.parse_args(argv)
+
+    json_store = JsonStore(args.json_dir, revocations_file=None)
+    if not len(json_store):
+        print(f"找不到語料: {args.json_dir}")
+        return 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DecisionStore(os.path.join(tmp, "bench.db"), batch_size=500, revocations_file=None)
+        start = time.perf_counter()
+        db.add_many(json_store.iter_decisions())
+        import_time = time.perf_counter() - start
+
+        subject = json_store.list_metadata()[len(json_store) // 2]["metadata"].get("subject")
+        cases = [
+            ("list_metadata", json_store.list_metadata, db.list_metadata),
+            ("find_subject", lambda: json_store.find(subject=subject), lambda: db.find(subject=subject)),
+            ("iter_decisions", lambda: list(json_store.iter_decisions()), lambda: list(db.iter_decisions())),
+        ]
+
+        print(f"語料: {len(db)} 份決定書，匯入 SQLite 耗時 {import_time * 1000:.1f} ms")
+        results = []
+        for name, json_func, db_func in cases:
+            json_ms = best_time(json_func, args.repeat) * 1000
+            db_ms = best_time(db_func, args.repeat) * 1000
+            results.append({"operation": name, "json_ms": round(json_ms, 3), "sqlite_ms": round(db_ms, 3)})
+            print(f"  {name:<16} JSON {json_ms:>9.2f} ms   SQLite {db_ms:>9.2f} ms  ({json_ms / db_ms:.1f}x)")
+        db.close()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+撤銷名冊表格擷取基準測試 (extract_tables.run_extraction)
+以 synthetic_pdf 產生名冊 PDF (或指定現有的 processed_list/)，比較依序處理與不同子行程數的平行模式耗時，
+並確認平行模式的 all_revocations.json 與依序處理完全相同。
+
+用法：
+    python benchmarks/bench_table_extraction.py [--src-dir processed_list] [--files 4 --rows 600]
+                                                [--workers 2 4] [--output results.json]
+"""
+import argparse
+import contextlib
+import filecmp
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import extract_tables
+from synthetic_pdf import write_roster
+
+def timed_run(src_dir, output_file, **kwargs):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        extract_tables.run_extraction(src_dir=src_dir, output_file=output_file, **kwargs)
+    return time.perf_counter() - start
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="撤銷名冊表格擷取基準測試")
+    arg_parser.add_argument("--src-dir", default=None, help="名冊 PDF 目錄 (未指定時產生合成名冊)")
+    arg_parser.add_argument("--files", type=int, default=4, help="合成名冊的檔案數")
+    arg_parser.add_argument("--rows", type=int, default=600, help="合成名冊每個檔案的資料列數")
+    arg_parser.add_argument("--workers", type=int, nargs="+", default=[2, 4])
+    arg_parser.add_argument("--pages-per-task", type=int, default=extract_tables.PAGES_PER_TASK)
+    arg_parser.add_argument("--output", help="將結果另存為 JSON")
+    args = arg_parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src_dir = args.src_dir
+        if not src_dir:
+            src_dir = os.path.join(tmp, "processed_list")
+            for i in range(args.files):
+                # 兩個類別各半，最後一個檔案只有第二種
+                name = f"roster{i:02d}(只有第二種).pdf" if i == args.files - 1 else f"roster{i:02d}.pdf"
+                write_roster(os.path.join(src_dir, name), categories=(1, 2),
+                             rows_per_category=args.rows // 2, seed=i)
+        files = [f for f in os.listdir(src_dir) if f.lower().endswith(".pdf")]
+        if not files:
+            print(f"找不到 PDF: {src_dir}")
+            return 1
+        pages = sum(extract_tables._page_count(os.path.join(src_dir, f)) for f in files)
+
+        serial_file = os.path.join(tmp, "serial.json")
+        timings = {"serial": timed_run(src_dir, serial_file)}
+        mismatched = []
+        for workers in args.workers:
+            output_file = os.path.join(tmp, f"workers{workers}.json")
+            timings[f"workers={workers}"] = timed_run(src_dir, output_file, workers=workers,
+                                                      pages_per_task=args.pages_per_task)
+            if not filecmp.cmp(serial_file, output_file, shallow=False):
+                mismatched.append(workers)
+        with open(serial_file, encoding="utf-8") as f:
+            rows = len(json.load(f))
+
+    print(f"名冊: {len(files)} 個檔案、{pages} 頁、{rows} 筆 (CPU {os.cpu_count()} 核)")
+    for name, seconds in timings.items():
+        print(f"  {name:<12} {seconds * 1000:>9.1f} ms  ({timings['serial'] / seconds:.2f}x)")
+    print("平行模式輸出與依序處理" + ("相同" if not mismatched else f"不同: workers={mismatched}"))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"files": len(files), "pages": pages, "rows": rows,
+                       "ms": {k: round(v * 1000, 3) for k, v in timings.items()}}, f, indent=2)
+    return 0 if not mismatched else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+閱讀器載入基準測試：單一 decision_data.js 與分片 viewer_data/
+以同一份解析結果分別輸出兩種格式到暫存目錄，用 Node.js 執行 index.html 的程式碼
+(benchmarks/viewer_load.js，簡化的 DOM)，比較到首次顯示為止：
+  first_render_ms   載入資料並顯示名冊第一頁的耗時
+  bytes             首次顯示前載入的 JS 檔案大小
+  peak_heap_bytes   載入過程中 JS heap 用量的最大值 (相對於開始前)
+  retained_heap     首次顯示後 (GC 後) 仍保留的 heap
+瀏覽器的版面配置、繪製與下載時間不在量測範圍內。
+
+用法：
+    python benchmarks/bench_viewer_load.py [--repeat 5] [--output results.json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import build_viewer_data
+
+def measure(directory, repeat):
+    """執行 repeat 次，取首次顯示耗時最短的一次"""
+    best = None
+    for _ in range(repeat):
+        out = subprocess.run(["node", "--expose-gc", os.path.join(ROOT, "benchmarks", "viewer_load.js"), directory],
+                             check=True, capture_output=True, text=True).stdout
+        result = json.loads(out)
+        if best is None or result["first_render_ms"] < best["first_render_ms"]:
+            best = result
+    return best
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="閱讀器首次顯示耗時與 JS heap 用量 (單一檔案 vs 分片)")
+    arg_parser.add_argument("--store", default=None, help="解析結果來源 (同 build_viewer_data.py)")
+    arg_parser.add_argument("--repeat", type=int, default=5, help="重複次數 (取最佳值)")
+    arg_parser.add_argument("--output", help="將結果另存為 JSON")
+    args = arg_parser.parse_args(argv)
+
+    if not shutil.which("node"):
+        print("需要 Node.js (node) 才能執行此基準測試")
+        return 1
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        single = os.path.join(tmp, "single")
+        sharded = os.path.join(tmp, "sharded")
+        for directory in (single, sharded):
+            os.makedirs(directory)
+            shutil.copy(os.path.join(ROOT, "index.html"), directory)
+        with contextlib.redirect_stdout(io.StringIO()):
+            build_viewer_data.build_data_js(store_path=args.store, single_file=True, cache_path=None, index_file=None,
+                                            data_file=os.path.join(single, build_viewer_data.DATA_FILE),
+                                            search_index_file=os.path.join(single, build_viewer_data.SEARCH_INDEX_FILE))
+            build_viewer_data.build_data_js(store_path=args.store, cache_path=None, index_file=None,
+                                            output_dir=os.path.join(sharded, build_viewer_data.VIEWER_DATA_DIR))
+        with open(os.path.join(sharded, build_viewer_data.VIEWER_DATA_DIR, build_viewer_data.MANIFEST_FILE),
+                  encoding="utf-8") as f:
+            manifest = json.loads(f.read().split("=", 1)[1].rstrip(";"))
+
+        print(f"資料: {len(manifest['decisions'])} 份決定書，{manifest['revocations']['total']} 筆名冊")
+        for label, directory in (("single-file", single), ("sharded", sharded)):
+            r = measure(directory, args.repeat)
+            r["layout"] = label
+            results.append(r)
+            print(f"  {label:<12} 首次顯示 {r['first_render_ms']:>8.1f} ms   載入 {r['scripts']:>3} 個檔案 "
+                  f"{r['bytes'] / 1e6:>6.2f} MB   heap 峰值 {r['peak_heap_bytes'] / 1e6:>6.1f} MB   "
+                  f"保留 {r['retained_heap_bytes'] / 1e6:>6.1f} MB")
+
+    before, after = results
+    print(f"首次顯示 {before['first_render_ms'] / after['first_render_ms']:.1f}x，"
+          f"heap 峰值 {before['peak_heap_bytes'] / max(1, after['peak_heap_bytes']):.1f}x")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,310 @@
+"""
+合成 PDF 產生器 (基準測試用，不需要額外套件)
+直接寫出 PDF 物件：文字使用 Adobe CNS1 預設字型 (MSung-Light, UniCNS-UCS2-H，不內嵌字型檔)，
+表格以線段畫出格線，pdfplumber 可照常擷取文字與表格。
+
+    builder = PdfBuilder()
+    builder.add_page(lines=["公告名冊（一）"], tables=[Table(rows, widths)])
+    builder.save("roster.pdf")
+
+撤銷公告名冊見 write_roster，決定書 (主文 / 事實 / 理由、多層標題、附表) 見 write_decision。
+"""
+import os
+import random
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+A4 = (595, 842)
+A4_LANDSCAPE = (842, 595)
+
+def _hex(text: str) -> str:
+    # UCS-2 編碼 (BMP 以外的字以全形問號代替)
+    return "".join(f"{ord(c):04X}" if ord(c) < 0x10000 else "FF1F" for c in text)
+
+@dataclass
+class Table:
+    """rows[0] 通常為標題列；每格文字過長時自動換行 (列高隨行數增加)"""
+    rows: List[List[str]]
+    widths: List[int]
+    font_size: int = 9
+    padding: int = 3
+
+    def line_width(self, col: int) -> int:
+        """每行可容納的字數 (字寬等於字級)"""
+        return max(1, (self.widths[col] - 2 * self.padding) // self.font_size)
+
+    def cell_lines(self, row: int, col: int) -> List[str]:
+        text = self.rows[row][col] if col < len(self.rows[row]) else ""
+        n = self.line_width(col)
+        return [text[i:i + n] for i in range(0, len(text), n)] or [""]
+
+    def row_height(self, row: int) -> int:
+        lines = max(len(self.cell_lines(row, c)) for c in range(len(self.widths)))
+        return lines * (self.font_size + 2) + 2 * self.padding
+
+    def height(self) -> int:
+        return sum(self.row_height(r) for r in range(len(self.rows)))
+
+@dataclass
+class _Page:
+    size: Tuple[int, int]
+    ops: List[str] = field(default_factory=list)
+    rotate: int = 0
+
+class PdfBuilder:
+    def __init__(self, size: Tuple[int, int] = A4, margin: int = 40):
+        self.size = size
+        self.margin = margin
+        self.pages: List[_Page] = []
+
+    def add_page(self, lines: Sequence[str] = (), tables: Sequence[Table] = (), font_size: int = 12,
+                 leading: Optional[int] = None, rotate: int = 0, size: Optional[Tuple[int, int]] = None):
+        """
+        lines:  由上而下的文字行 (不自動換行)
+        tables: 接在文字之後，由上而下排列
+        rotate: 頁面的 /Rotate (順時針角度，內容座標不變)
+        """
+        width, height = size or self.size
+        page = _Page((width, height), rotate=rotate)
+        leading = leading or font_size + 4
+        y = height - self.margin - font_size
+        if lines:
+            page.ops.append(f"BT /F1 {font_size} Tf {leading} TL {self.margin} {y} Td")
+            for line in lines:
+                page.ops.append(f"<{_hex(line)}> Tj T*")
+            page.ops.append("ET")
+            y -= leading * len(lines)
+        for table in tables:
+            y = self._draw_table(page, table, self.margin, y) - leading
+        self.pages.append(page)
+        return page
+
+    @staticmethod
+    def _draw_table(page: _Page, table: Table, x0: int, top: int) -> int:
+        """畫出表格，回傳表格下緣的 y 座標"""
+        xs = [x0]
+        for w in table.widths:
+            xs.append(xs[-1] + w)
+        ys = [top]
+        for r in range(len(table.rows)):
+            ys.append(ys[-1] - table.row_height(r))
+        page.ops.append("0.5 w")
+        for y in ys:
+            page.ops.append(f"{xs[0]} {y} m {xs[-1]} {y} l S")
+        for x in xs:
+            page.ops.append(f"{x} {ys[-1]} m {x} {ys[0]} l S")
+        size = table.font_size
+        for r in range(len(table.rows)):
+            for c in range(len(table.widths)):
+                cell = table.cell_lines(r, c)
+                if cell == [""]:
+                    continue
+                page.ops.append(f"BT /F1 {size} Tf {size + 2} TL {xs[c] + table.padding} "
+                                f"{ys[r] - table.padding - size} Td")
+                for line in cell:
+                    page.ops.append(f"<{_hex(line)}> Tj T*")
+                page.ops.append("ET")
+        return ys[-1]
+
+    def to_bytes(self) -> bytes:
+        objs: List[bytes] = []
+
+        def add(obj) -> int:
+            objs.append(obj.encode("latin-1") if isinstance(obj, str) else obj)
+            return len(objs)
+
+        desc = add("<< /Type /FontDescriptor /FontName /MSung-Light /Flags 6 /FontBBox [0 -200 1000 900] "
+                   "/ItalicAngle 0 /Ascent 880 /Descent -120 /CapHeight 880 /StemV 93 >>")
+        cid = add(f"<< /Type /Font /Subtype /CIDFontType0 /BaseFont /MSung-Light /CIDSystemInfo "
+                  f"<< /Registry (Adobe) /Ordering (CNS1) /Supplement 0 >> /FontDescriptor {desc} 0 R /DW 1000 >>")
+        font = add(f"<< /Type /Font /Subtype /Type0 /BaseFont /MSung-Light /Encoding /UniCNS-UCS2-H "
+                   f"/DescendantFonts [{cid} 0 R] >>")
+        pages_id = len(objs) + 1 + 2 * len(self.pages)
+        kids = []
+        for page in self.pages:
+            stream = "\n".join(page.ops).encode("latin-1")
+            contents = add(f"<< /Length {len(stream)} >>\nstream\n".encode("latin-1") + stream + b"\nendstream")
+            rotate = f" /Rotate {page.rotate}" if page.rotate else ""
+            kids.append(add(f"<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 {page.size[0]} {page.size[1]}]"
+                            f"{rotate} /Resources << /Font << /F1 {font} 0 R >> >> /Contents {contents} 0 R >>"))
+        add(f"<< /Type /Pages /Kids [{' '.join(f'{k} 0 R' for k in kids)}] /Count {len(kids)} >>")
+        catalog = add(f"<< /Type /Catalog /Pages {pages_id} 0 R >>")
+
+        out = bytearray(b"%PDF-1.4\n")
+        offsets = []
+        for i, obj in enumerate(objs, 1):
+            offsets.append(len(out))
+            out += f"{i} 0 obj\n".encode("latin-1") + obj + b"\nendobj\n"
+        xref = len(out)
+        out += f"xref\n0 {len(objs) + 1}\n0000000000 65535 f \n".encode("latin-1")
+        for offset in offsets:
+            out += f"{offset:010d} 00000 n \n".encode("latin-1")
+        out += (f"trailer\n<< /Size {len(objs) + 1} /Root {catalog} 0 R >>\n"
+                f"startxref\n{xref}\n%%EOF\n").encode("latin-1")
+        return bytes(out)
+
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+# --- 撤銷公告名冊 ---
+# 版面同 processed_list/ 中的名冊：橫式表格，第一頁有標題「公告名冊（一）」，
+# 之後的頁面多半沒有標題列 (延續上一頁的欄位)，名冊（二）另起一頁。
+
+ROSTER_HEADER = ["序號", "姓名", "裁判機關", "裁判字號", "裁判案由", "判決"]
+ROSTER_WIDTHS = [50, 70, 150, 170, 200, 140]
+_SURNAMES = "陳林黃張李王吳劉蔡楊許鄭謝郭洪曾邱廖賴周"
+_GIVEN = "文明志金春榮添國清火水木土永德忠仁義英美"
+_COURTS = ["台灣省保安司令部", "台灣警備總司令部", "國防部", "台灣警備總司令部軍事法庭"]
+_WORDS = ["安潔", "安度", "審三", "審復", "勁功", "警審特"]
+_CRIMES = ["參加叛亂之組織", "連續以文字為有利於叛徒之宣傳", "明知為匪諜而不告密檢舉", "意圖以非法之方法顛覆政府"]
+_SENTENCES = ["有罪判決暨其刑之宣告", "有罪判決暨保安處分之宣告", "有罪判決暨其刑及褫奪公權之宣告"]
+
+def roster_rows(count: int, seed: int = 0, start: int = 1) -> List[List[str]]:
+    rng = random.Random(seed)
+    rows = []
+    for i in range(start, start + count):
+        name = rng.choice(_SURNAMES) + "".join(rng.choice(_GIVEN) for _ in range(rng.choice((1, 2, 2, 2))))
+        cases = [f"({rng.randint(38, 76)}){rng.choice(_WORDS)}字第{rng.randint(1, 3000)}號"
+                 for _ in range(rng.choice((1, 1, 1, 2)))]
+        rows.append([str(i).zfill(4), name, rng.choice(_COURTS), "、".join(cases),
+                     "、".join(rng.sample(_CRIMES, rng.choice((1, 1, 2)))), rng.choice(_SENTENCES)])
+    return rows
+
+def write_roster(path: str, categories: Sequence[int] = (1,), rows_per_category: int = 200,
+                 rows_per_page: int = 15, seed: int = 0, cover_page: bool = False, rotate: int = 0):
+    """
+    產生撤銷公告名冊 PDF
+    cover_page: 第一頁為公告本文 (原始的 list/ 檔案，preprocess_pdfs 會移除)
+    rotate:     每頁的 /Rotate (原始檔案的橫式頁面)
+    Returns: 資料列數
+    """
+    builder = PdfBuilder(A4_LANDSCAPE)
+    if cover_page:
+        builder.add_page(lines=["促進轉型正義委員會公告", "公告撤銷刑事有罪判決名冊"], rotate=rotate)
+    total = 0
+    for cat_no, category in enumerate(categories):
+        rows = roster_rows(rows_per_category, seed=seed * 100 + cat_no, start=total + 1)
+        title = "公告名冊（一）" if category == 1 else "公告名冊（二）"
+        for k in range(0, len(rows), rows_per_page):
+            chunk = rows[k:k + rows_per_page]
+            lines, table_rows = [], chunk
+            if k == 0:
+                lines = [title]
+                table_rows = [ROSTER_HEADER] + chunk
+            builder.add_page(lines=lines, tables=[Table(table_rows, ROSTER_WIDTHS)], rotate=rotate)
+        total += len(rows)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    builder.save(path)
+    return total
+
+# --- 決定書 ---
+# 版面同 downloads_ey_tjb/ 中的決定書：直式 A4，案號與當事人之後依序為各章節 (主文 / 事實 / 理由)，
+# 理由以「一、」「（一）」「1.」「（1）」分層，文末為署名、日期，附表接在最後。
+# 每行約 DECISION_LINE_WIDTH 字 (段落跨行、跨頁)，頁尾有頁碼。
+
+DECISION_LINE_WIDTH = 38
+DECISION_LINES_PER_PAGE = 40
+DECISION_LAYOUTS = {
+    "decision": ("主文", "事實", "理由"),
+    "simple": ("主文", "理由"),
+}
+ANNEX_HEADER = ["編號", "姓名", "原判決", "備註"]
+ANNEX_WIDTHS = [40, 80, 220, 175]
+_DIGITS = "一二三四五六七八九"
+# 內文用語：不含「主文」「事實」「理由」、署名與日期，避免影響章節的切分
+_PHRASES = ["依促進轉型正義條例之規定", "經本會重新調查", "原判決認定之犯罪事實", "卷附之偵訊筆錄",
+            "被告於偵查中之供述", "未經合法調查之證據", "違反正當法律程序", "侵害公平審判原則",
+            "應予平復司法不法", "威權統治時期", "軍事審判機關", "參加叛亂之組織", "非法之方法顛覆政府",
+            "自白之任意性", "相關檔案資料", "核閱卷證後"]
+
+def zh_number(n: int) -> str:
+    """1-99 -> 一 … 九十九"""
+    tens, ones = divmod(n, 10)
+    if not tens:
+        return _DIGITS[ones - 1]
+    return ("" if tens == 1 else _DIGITS[tens - 1]) + "十" + (_DIGITS[ones - 1] if ones else "")
+
+def heading_marker(level: int, n: int) -> str:
+    """標題層級 1-4 的編號 (pdf_parser 的 _LINE_LEVEL_RE)"""
+    if level == 1:
+        return zh_number(n) + "、"
+    if level == 2:
+        return f"（{zh_number(n)}）"
+    if level == 3:
+        return f"{n}."
+    return f"（{n}）"
+
+def _sentence(rng: random.Random) -> str:
+    return "，".join(rng.choice(_PHRASES) for _ in range(rng.randint(2, 4))) + "。"
+
+def _paragraph(rng: random.Random, sentences: Tuple[int, int] = (2, 5)) -> str:
+    return "".join(_sentence(rng) for _ in range(rng.randint(*sentences)))
+
+def wrap(text: str, width: int = DECISION_LINE_WIDTH) -> List[str]:
+    return [text[i:i + width] for i in range(0, len(text), width)] or [""]
+
+def _reasoning_lines(rng: random.Random, heading_depth: int, target: int) -> List[str]:
+    """理由：依深度優先排列各層標題，每個標題後接 1-2 段內文，到 target 行為止 (最後的標題段落會寫完)"""
+    lines: List[str] = []
+
+    def node(level: int, n: int):
+        lines.extend(wrap(heading_marker(level, n) + _sentence(rng)))
+        for _ in range(rng.randint(1, 2)):
+            lines.extend(wrap(_paragraph(rng)))
+        if level < heading_depth:
+            for k in range(1, rng.randint(2, 3) + 1):
+                if len(lines) >= target:
+                    return
+                node(level + 1, k)
+
+    n = 1
+    while len(lines) < target and n < 100:
+        node(1, n)
+        n += 1
+    return lines
+
+def decision_lines(pages: int = 5, heading_depth: int = 3, layout: str = "decision", case_no: int = 1,
+                   seed: int = 0, lines_per_page: int = DECISION_LINES_PER_PAGE) -> List[str]:
+    """決定書的文字行 (不含頁碼、附表)，行數約為 pages 頁"""
+    rng = random.Random(seed)
+    name = rng.choice(_SURNAMES) + rng.choice(_GIVEN) + rng.choice(_GIVEN)
+    court = rng.choice(_COURTS)
+    ref = f"（{rng.randint(38, 76)}）{rng.choice(_WORDS)}字第 {rng.randint(1, 3000)} 號"
+    lines = ["促進轉型正義委員會決定書", f"（107）促轉司字第 {case_no} 號", f"聲請人：{name}"]
+    lines += wrap(f"上列聲請人聲請平復司法不法案件，關於{name}受{court}{ref}刑事有罪判決，本會決定如下：")
+    body: Dict[str, List[str]] = {
+        "主文": wrap(f"{name}受{court}{ref}刑事有罪判決暨其刑之宣告，於促進轉型正義條例施行之日視為撤銷。"),
+        "事實": [line for _ in range(rng.randint(2, 4)) for line in wrap(_paragraph(rng))],
+    }
+    ending = ["促進轉型正義委員會", f"中華民國 {rng.randint(108, 111)} 年 {rng.randint(1, 12)} 月 {rng.randint(1, 28)} 日"]
+    for title in DECISION_LAYOUTS[layout]:
+        lines.append(title)
+        if title == "理由":
+            lines += _reasoning_lines(rng, heading_depth, max(1, pages * lines_per_page - len(lines) - len(ending)))
+        else:
+            lines += body[title]
+    return lines + ending
+
+def write_decision(path: str, pages: int = 5, heading_depth: int = 3, tables: int = 0, table_rows: int = 12,
+                   layout: str = "decision", case_no: int = 1, seed: int = 0,
+                   lines_per_page: int = DECISION_LINES_PER_PAGE) -> int:
+    """
+    產生決定書 PDF
+    pages:         本文的頁數 (附表另起新頁，每頁一個表格)
+    heading_depth: 理由的標題層數 (1-4)
+    tables:        附表數
+    layout:        DECISION_LAYOUTS 的章節組合
+    Returns: 總頁數
+    """
+    builder = PdfBuilder(A4)
+    lines = decision_lines(pages, heading_depth, layout, case_no, seed, lines_per_page)
+    for k in range(0, len(lines), lines_per_page):
+        builder.add_page(lines=lines[k:k + lines_per_page] + [str(len(builder.pages) + 1)])
+    for t in range(tables):
+        rows = [[str(i + 1), r[1], f"{r[2]}{r[3]}", r[5]] for i, r in enumerate(roster_rows(table_rows, seed=seed + t))]
+        builder.add_page(lines=[f"附表{zh_number(t + 1)}：" if tables > 1 else "附表："],
+                         tables=[Table([ANNEX_HEADER] + rows, ANNEX_WIDTHS)])
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    builder.save(path)
+    return len(builder.pages)
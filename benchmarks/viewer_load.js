@@ -0,0 +1,68 @@
+// 由 bench_viewer_load.py 呼叫：以最簡化的 DOM 在 Node.js 執行 index.html 的程式碼，
+// 量測到首次顯示 (window.VIEWER_TIMING 出現) 為止的耗時、載入的檔案大小與 JS heap 用量。
+// 不含瀏覽器的版面配置與繪製，只反映資料下載後的解析、執行與記憶體。
+// 用法: node --expose-gc benchmarks/viewer_load.js <含 index.html 的目錄>
+const fs = require('fs'), path = require('path'), vm = require('vm'), v8 = require('v8');
+
+const root = process.argv[2];
+const stats = { scripts: 0, bytes: 0, peak_heap_bytes: 0 };
+const sampleHeap = () => { stats.peak_heap_bytes = Math.max(stats.peak_heap_bytes, v8.getHeapStatistics().used_heap_size); };
+
+function element() {
+    return {
+        style: {}, classList: { add() {}, remove() {}, toggle() {} }, innerHTML: '', textContent: '', value: '',
+        appendChild() {}, addEventListener() {}, remove() {}
+    };
+}
+
+const elements = {};
+const ctx = { console: { error: console.error }, performance, setTimeout, location: { hash: '' } };
+ctx.window = ctx;
+
+function runScript(file) {
+    const code = fs.readFileSync(file, 'utf8');
+    stats.scripts++;
+    stats.bytes += Buffer.byteLength(code);
+    vm.runInContext(code, ctx, { filename: file });
+    sampleHeap();
+}
+
+ctx.document = {
+    getElementById: id => elements[id] || (elements[id] = element()),
+    createElement: () => element(),
+    head: {
+        appendChild(script) {
+            const file = path.join(root, script.src);
+            setImmediate(() => {
+                if (!fs.existsSync(file)) return script.onerror();
+                runScript(file);
+                script.onload();
+            });
+        }
+    }
+};
+vm.createContext(ctx);
+
+global.gc && global.gc();
+const baseHeap = process.memoryUsage().heapUsed;
+const start = performance.now();
+
+const html = fs.readFileSync(path.join(root, 'index.html'), 'utf8');
+for (const m of html.matchAll(/<script(?: src="([^"]+)")?>([\s\S]*?)<\/script>/g)) {
+    if (!m[1]) vm.runInContext(m[2], ctx);
+    else if (fs.existsSync(path.join(root, m[1]))) runScript(path.join(root, m[1]));
+}
+
+(function wait() {
+    if (!ctx.VIEWER_TIMING) return setImmediate(wait);
+    const elapsed = performance.now() - start;
+    global.gc && global.gc();
+    process.stdout.write(JSON.stringify({
+        mode: ctx.VIEWER_TIMING.mode,
+        first_render_ms: elapsed,
+        scripts: stats.scripts,
+        bytes: stats.bytes,
+        peak_heap_bytes: stats.peak_heap_bytes - baseHeap,
+        retained_heap_bytes: process.memoryUsage().heapUsed - baseHeap
+    }));
+})();
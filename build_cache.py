@@ -0,0 +1,107 @@
+import json
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_CACHE_PATH = "build_cache.db"
+
+class BuildCache:
+    """
+    前端資料增量建置快取 (SQLite)，build_viewer_data.py 與 generate_index.py 共用
+    decisions: 每份決定書的內容雜湊與由它產生的片段 (MetaData、搜尋用 bigram、序列化後的 JSON)
+    state:     其他輸入 (撤銷名冊) 的雜湊與衍生結果
+    outputs:   已寫出檔案的雜湊與大小，內容未變時不重寫、不重新壓縮
+    雜湊相同的決定書直接使用快取的片段，不必讀取、轉換與序列化；path 為 None 時只存在記憶體中。
+    """
+
+    SCHEMA_VERSION = 1
+
+    def __init__(self, path: Optional[str] = DEFAULT_CACHE_PATH):
+        self.path = path or ":memory:"
+        self.conn = sqlite3.connect(self.path, timeout=30)
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != self.SCHEMA_VERSION:
+            # 格式不同的舊快取直接捨棄，下次建置時重新產生
+            self.conn.executescript("""
+                DROP TABLE IF EXISTS decisions;
+                DROP TABLE IF EXISTS state;
+                DROP TABLE IF EXISTS outputs;
+            """)
+            self.conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS decisions (
+                filename TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                entry TEXT NOT NULL,
+                fragment_options TEXT,
+                fragment TEXT
+            );
+            CREATE TABLE IF NOT EXISTS state (
+                key TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS outputs (
+                path TEXT PRIMARY KEY,
+                entry TEXT NOT NULL
+            );
+        """)
+        self.conn.commit()
+
+    # --- 決定書 ---
+
+    def decisions(self, with_fragments: bool = True) -> Dict[str, Dict[str, Any]]:
+        """
+        filename -> {"fingerprint", "entry", "fragment_options", "fragment"}
+        with_fragments=False 時不讀取序列化後的 JSON (只需要 MetaData 時)
+        """
+        fragment_cols = "fragment_options, fragment" if with_fragments else "NULL, NULL"
+        rows = self.conn.execute(f"SELECT filename, fingerprint, entry, {fragment_cols} FROM decisions")
+        return {
+            filename: {"fingerprint": fingerprint, "entry": json.loads(entry),
+                       "fragment_options": options, "fragment": fragment}
+            for filename, fingerprint, entry, options, fragment in rows
+        }
+
+    def put_decision(self, filename: str, fingerprint: str, entry: Dict[str, Any],
+                     fragment_options: Optional[str] = None, fragment: Optional[str] = None):
+        self.conn.execute("INSERT OR REPLACE INTO decisions VALUES (?, ?, ?, ?, ?)",
+                          (filename, fingerprint, json.dumps(entry, ensure_ascii=False, separators=(",", ":")),
+                           fragment_options, fragment))
+
+    def put_fragment(self, filename: str, fragment_options: str, fragment: str):
+        """內容未變、只有輸出格式不同時，更新序列化後的 JSON"""
+        self.conn.execute("UPDATE decisions SET fragment_options = ?, fragment = ? WHERE filename = ?",
+                          (fragment_options, fragment, filename))
+
+    def remove_decisions(self, filenames: Iterable[str]):
+        self.conn.executemany("DELETE FROM decisions WHERE filename = ?", [(f,) for f in filenames])
+
+    # --- 其他輸入 ---
+
+    def get_state(self, key: str) -> Optional[Tuple[str, Any]]:
+        """Returns: (fingerprint, value) 或 None"""
+        row = self.conn.execute("SELECT fingerprint, value FROM state WHERE key = ?", (key,)).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def put_state(self, key: str, fingerprint: str, value: Any):
+        self.conn.execute("INSERT OR REPLACE INTO state VALUES (?, ?, ?)",
+                          (key, fingerprint, json.dumps(value, ensure_ascii=False, separators=(",", ":"))))
+
+    # --- 輸出檔案 ---
+
+    def outputs(self) -> Dict[str, Dict[str, Any]]:
+        return {path: json.loads(entry) for path, entry in self.conn.execute("SELECT path, entry FROM outputs")}
+
+    def put_outputs(self, entries: List[Dict[str, Any]]):
+        self.conn.executemany("INSERT OR REPLACE INTO outputs VALUES (?, ?)",
+                              [(e["path"], json.dumps(e, ensure_ascii=False)) for e in entries])
+
+    def remove_outputs(self, paths: Iterable[str]):
+        self.conn.executemany("DELETE FROM outputs WHERE path = ?", [(p,) for p in paths])
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
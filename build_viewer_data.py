@@ -1,103 +1,417 @@
-import os
 import json
+import os
 import re
+import hashlib
+import argparse
+import reasoning_tree
+from artifacts import ArtifactWriter, COMPRESSIONS
+from build_cache import BuildCache, DEFAULT_CACHE_PATH
+from revocation_linker import RevocationLinker, decision_record, format_stats
+from storage import open_store, json_name
+
+DATA_FILE = "decision_data.js"
+SEARCH_INDEX_FILE = "search_index.js"
+INDEX_FILE = "decisions_index.json"
+VIEWER_DATA_DIR = "viewer_data"
+MANIFEST_FILE = "manifest.js"
+MANIFEST_VERSION = 1
+REVOCATION_CHUNK_SIZE = 500
+
+# 建置規則 (片段的產生方式) 變動時遞增，使快取中的片段全部失效
+BUILD_VERSION = 2
+
+# --- 前端搜尋索引 (search_index.js) ---
+# 每筆記錄的搜尋文字轉小寫後取所有相鄰兩字 (bigram)，記錄每個 bigram 出現在哪些記錄。
+# 查詢字串的 bigram 全部出現的記錄才可能包含該字串，網頁只需再對這些候選記錄確認一次，
+# 不必掃描全部資料。搜尋文字的組成方式必須與 index.html 的 decisionSearchText / revocationSearchText 相同。
+# 決定書的主文、理由都是 full_text 的一部分，只需索引 full_text。
+
+SEARCH_INDEX_VERSION = 1
+
+def decision_search_text(d):
+    meta = d.get("metadata") or {}
+    parts = [meta.get(k) for k in ("case_no", "subject", "applicant", "date")]
+    parts.append((d.get("content") or {}).get("full_text"))
+    return "\n".join(p for p in parts if p).lower()
+
+def revocation_search_text(r):
+    parts = []
+    for v in r.values():
+        for item in (v if isinstance(v, list) else [v]):
+            if item is not None:
+                parts.append(str(item))
+    return "\n".join(parts).lower()
+
+def bigrams(text):
+    """文字中出現的 bigram (不重複)"""
+    return {text[j:j + 2] for j in range(len(text) - 1)}
+
+def postings_from_bigrams(gram_sets):
+    """
+    每筆記錄的 bigram 集合 -> bigram -> 記錄索引清單 (遞增，以差值編碼縮小體積)
+    """
+    postings = {}
+    for i, grams in enumerate(gram_sets):
+        for gram in grams:
+            postings.setdefault(gram, []).append(i)
+    encoded = {}
+    for gram in sorted(postings):
+        prev = 0
+        deltas = []
+        for i in postings[gram]:
+            deltas.append(i - prev)
+            prev = i
+        encoded[gram] = deltas
+    return encoded
+
+def bigram_postings(texts):
+    return postings_from_bigrams(bigrams(text) for text in texts)
+
+def compact_json(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+def decision_search_part(entries, cache):
+    """
+    決定書的搜尋索引 {"ids", "postings"} (序列化後)
+    所有決定書 (與其順序) 都未變動時直接使用快取，不重新合併 bigram
+    """
+    fingerprint = hashlib.sha1("\0".join(f"{e['id']}:{e['fingerprint']}" for e in entries).encode("utf-8")).hexdigest()
+    cached = cache.get_state("decision_search")
+    if cached and cached[0] == fingerprint:
+        return cached[1]
+    part = compact_json({
+        "ids": [e["id"] for e in entries],
+        "postings": postings_from_bigrams(e["bigrams"] for e in entries)
+    })
+    cache.put_state("decision_search", fingerprint, part)
+    return part
+
+def search_index_js(decisions_part, revocations_part):
+    """
+    組合搜尋索引 (與一次 json.dumps 整個索引的結果相同)
+    兩部分都是已序列化的 JSON ({"ids", "postings"} 與 {"count", "postings"})
+    """
+    return (f'window.SEARCH_INDEX = {{"version":{SEARCH_INDEX_VERSION},'
+            f'"decisions":{decisions_part},"revocations":{revocations_part}}};')
+
+# --- 決定書 (增量建置) ---
+# 每份決定書以內容雜湊 (store.fingerprints()) 判斷是否變動，未變動者直接使用 BuildCache 中的片段：
+#   entry:    id / filename / MetaData / 搜尋用 bigram (decisions_index.json、manifest、排序、連結、搜尋索引)
+#   fragment: 序列化後的完整決定書 JSON (decision_data.js 與分片)，依輸出格式 (fragment_options) 快取
+# 只有新增或變動的決定書需要讀取、轉換樹狀結構並序列化。
+
+def decision_sort_key(item):
+    case_no = item.get("metadata", {}).get("case_no", "") or ""
+    match = re.search(r"第(\d+)號", case_no)
+    num = int(match.group(1)) if match else 999999
+    # 司字優先 (0), 復查次之 (1)
+    type_order = 0 if "促轉司字" in case_no else (1 if "復查" in case_no else 2)
+    return (type_order, num)
+
+def prepare_decision(data, compact_tree=False):
+    """解析結果 -> 前端使用的格式 (加上 id，理由樹狀結構統一為單一格式)"""
+    filename = json_name(data["filename"])
+    data["filename"] = filename
+    data["id"] = filename.replace(".", "_")
+    # 理由樹狀結構統一為單一格式 (解析結果可能是巢狀或精簡格式)
+    if compact_tree:
+        if data.get("structured_reasoning") is not None:
+            reasoning = data.get("content", {}).get("reasoning") or ""
+            data["structured_reasoning_compact"] = reasoning_tree.from_nested(data["structured_reasoning"], reasoning)
+        data.pop("structured_reasoning", None)
+    else:
+        data["structured_reasoning"] = reasoning_tree.load_tree(data)
+        data.pop("structured_reasoning_compact", None)
+    return data
+
+def serialize_decision(data, minify):
+    return compact_json(data) if minify else json.dumps(data, ensure_ascii=False)
+
+def collect_decisions(store, cache, compact_tree=False, minify=None):
+    """
+    取得所有決定書的 entry (依案號排序)，minify 不為 None 時一併取得序列化後的 JSON (entry["fragment"])
+    minify=None 表示只需要 MetaData (generate_index)
+    """
+    options = None if minify is None else f"v{BUILD_VERSION};compact_tree={int(compact_tree)};minify={int(minify)}"
+    fingerprints = store.fingerprints()
+    cached = cache.decisions(with_fragments=options is not None)
+    print(f"Processing {len(fingerprints)} decision files...")
+
+    entries = []
+    reread = 0
+    for filename, fingerprint in fingerprints.items():
+        fingerprint = f"v{BUILD_VERSION}:{fingerprint}"
+        row = cached.get(filename)
+        if row and row["fingerprint"] == fingerprint and (options is None or row["fragment_options"] == options):
+            entry = row["entry"]
+            entry["fingerprint"] = fingerprint
+            if options is not None:
+                entry["fragment"] = row["fragment"]
+            entries.append(entry)
+            continue
 
-def normalize_name(name):
-    """移除姓名中的空白與特殊字元，方便比對"""
-    if not name: return ""
-    return re.sub(r'[\s　]', '', name)
-
-def build_data_js():
-    decisions_dir = "parsed_results"
-    revocations_file = "all_revocations.json"
-    output_file = "decision_data.js"
-    
-    # 1. 讀取決定書資料 (Decisions)
-    decisions_data = []
-    if os.path.exists(decisions_dir):
-        files = [f for f in os.listdir(decisions_dir) if f.lower().endswith(".json")]
-        print(f"Processing {len(files)} decision files...")
-
-        for filename in sorted(files):
-            file_path = os.path.join(decisions_dir, filename)
-            try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    data["filename"] = filename
-                    data["id"] = filename.replace(".", "_")
-                    decisions_data.append(data)
-            except Exception as e:
-                print(f"Skipping {filename}: {e}")
-    
-    # 排序決定書
-    def sort_key(item):
-        case_no = item.get("metadata", {}).get("case_no", "") or ""
-        match = re.search(r"第(\d+)號", case_no)
-        num = int(match.group(1)) if match else 999999
-        # 司字優先 (0), 復查次之 (1)
-        type_order = 0 if "促轉司字" in case_no else (1 if "復查" in case_no else 2)
-        return (type_order, num)
-
-    decisions_data.sort(key=sort_key)
-
-    # 2. 讀取撤銷名冊資料 (Revocations)
-    revocations_data = []
-    if os.path.exists(revocations_file):
         try:
-            with open(revocations_file, "r", encoding="utf-8") as f:
-                revocations_data = json.load(f)
-            print(f"Loaded {len(revocations_data)} revocation records.")
+            data = store.get(filename)
+            if data is None:
+                continue
+            record = decision_record(data)
+            entry = {
+                "id": record["id"],
+                "filename": json_name(data["filename"]),
+                "metadata": data.get("metadata", {}),
+                "bigrams": sorted(bigrams(decision_search_text(data))),
+                # 撤銷名冊連結用 (見 revocation_linker.py)
+                "parties": record["parties"],
+                "case_refs": record["case_refs"]
+            }
+            if options is None:
+                cache.put_decision(filename, fingerprint, entry)
+            else:
+                fragment = serialize_decision(prepare_decision(data, compact_tree), minify)
+                if row and row["fingerprint"] == fingerprint:
+                    cache.put_fragment(filename, options, fragment)
+                else:
+                    cache.put_decision(filename, fingerprint, entry, options, fragment)
+                entry["fragment"] = fragment
         except Exception as e:
-            print(f"Error loading revocations: {e}")
-
-    # 3. 建立連結 (Linking)
-    # 目標：在 revocations_data 中加入 `decision_id`，如果它屬於第二類且找得到決定書
-    # 建立索引：(姓名, 案號) -> Decision ID
-    decision_map = {}
-    for d in decisions_data:
-        meta = d.get("metadata", {})
-        # 主要 Key: 姓名 (Subject)
-        subject = normalize_name(meta.get("subject", ""))
-        case_no = meta.get("case_no", "")
-        
-        if subject:
-            if subject not in decision_map:
-                decision_map[subject] = []
-            decision_map[subject].append({
-                "id": d["id"],
-                "case_no": case_no
-            })
+            print(f"Skipping {json_name(filename)}: {e}")
+            continue
+        entry["fingerprint"] = fingerprint
+        reread += 1
+        entries.append(entry)
+
+    removed = set(cached) - set(fingerprints)
+    cache.remove_decisions(removed)
+    cache.commit()
+    print(f"Re-read {reread} new or changed decisions, reused {len(entries) - reread} from build cache"
+          + (f", dropped {len(removed)} removed" if removed else "") + ".")
+
+    # 排序決定書 (store 依檔名順序，排序為穩定排序，結果與全部重新讀取時相同)
+    entries.sort(key=decision_sort_key)
+    return entries
+
+def write_decisions_index(entries, writer, path=INDEX_FILE):
+    """decisions_index.json：只含 MetaData 的決定書清單 (與 manifest 同一份資料)"""
+    index_data = [{"id": e["id"], "filename": e["filename"], "metadata": e["metadata"]} for e in entries]
+    writer.write(path, writer.dumps(index_data, indent=2))
+    print(f"Generated {path} with {len(index_data)} entries.")
 
-    # 嘗試配對
-    link_count = 0
+# --- 撤銷名冊 ---
+
+def group_revocations(revocations_data):
+    """依類別分組 (依類別第一次出現的順序，類別內維持原順序)"""
+    groups = {}
     for r in revocations_data:
-        # 只針對第二類 (Category 2) 嘗試連結
-        if r.get("category") == 2:
-            r_name = normalize_name(r.get("name", ""))
-            
-            if r_name in decision_map:
-                candidates = decision_map[r_name]
-                # 簡單策略：如果只有一個候選人，直接連
-                # 如果有多個，理想上要比對案號，但名冊案號格式可能與決定書不同
-                # 這裡先取第一個匹配的，未來可優化
-                if candidates:
-                    r["linked_decision_id"] = candidates[0]["id"]
-                    link_count += 1
-
-    print(f"Linked {link_count} revocation records to decisions.")
-
-    # 4. 輸出 JS
-    final_payload = {
-        "decisions": decisions_data,
-        "revocations": revocations_data
-    }
-    
-    js_content = f"window.DATA_STORE = {json.dumps(final_payload, ensure_ascii=False)};"
-    
-    with open(output_file, "w", encoding="utf-8") as out:
-        out.write(js_content)
-        
+        groups.setdefault(r.get("category"), []).append(r)
+    return list(groups.items())
+
+def shard_js(path, data):
+    return f"window.VIEWER_SHARD({json.dumps(path)}, {compact_json(data)});"
+
+def collect_revocations(store, cache, entries, layout, writer, chunk_size=REVOCATION_CHUNK_SIZE):
+    """
+    讀取撤銷名冊、建立連結並產生輸出片段
+    名冊內容與連結對象 (決定書的當事人) 都未變動時直接使用快取，不讀取名冊
+    layout: "single" -> {"json"}；"sharded" -> {"chunks": [[路徑, 內容]], "categories"}
+    兩者皆另含 {"count", "link_stats", "search"} (search 為序列化後的名冊搜尋索引)
+    """
+    linker = RevocationLinker(entries)
+    fingerprint = hashlib.sha1("\0".join([
+        f"v{BUILD_VERSION}", layout, str(writer.minify), str(chunk_size),
+        store.revocations_fingerprint(), compact_json(linker.signature())
+    ]).encode("utf-8")).hexdigest()
+    state_key = f"revocations:{layout}"
+    cached = cache.get_state(state_key)
+    if cached and cached[0] == fingerprint:
+        value = cached[1]
+        print(f"Revocations unchanged ({value['count']} records, {value['link_stats']['linked']} linked), "
+              "reusing build cache.")
+        return value
+
+    # 讀取撤銷名冊資料 (Revocations)
+    revocations_data = []
+    try:
+        revocations_data = store.revocations()
+        if revocations_data:
+            print(f"Loaded {len(revocations_data)} revocation records.")
+    except Exception as e:
+        print(f"Error loading revocations: {e}")
+
+    link_stats = linker.link(revocations_data)
+    print(format_stats(link_stats))
+
+    value = {"count": len(revocations_data), "link_stats": link_stats}
+    if layout == "single":
+        value["json"] = writer.dumps(revocations_data)
+        ordered = revocations_data
+    else:
+        # 名冊在分片中依類別分組 (類別內維持原順序)，搜尋索引的名冊位置即為分組後的順序
+        ordered, chunks, categories = [], [], []
+        for group_no, (category, records) in enumerate(group_revocations(revocations_data)):
+            paths = []
+            for k in range(0, len(records), chunk_size):
+                path = f"revocations/{group_no}-{k // chunk_size}.js"
+                chunks.append([path, shard_js(path, records[k:k + chunk_size])])
+                paths.append(path)
+            categories.append({
+                "category": category,
+                "start": len(ordered),
+                "count": len(records),
+                "chunks": paths
+            })
+            ordered.extend(records)
+        value["chunks"] = chunks
+        value["categories"] = categories
+    value["search"] = compact_json({
+        "count": len(ordered),
+        "postings": bigram_postings(revocation_search_text(r) for r in ordered)
+    })
+    cache.put_state(state_key, fingerprint, value)
+    cache.commit()
+    return value
+
+# --- 輸出 ---
+
+def write_single_file(entries, revocations, search_part, writer,
+                      output_file=DATA_FILE, search_index_file=SEARCH_INDEX_FILE):
+    """舊版輸出：所有決定書與名冊放在同一個 window.DATA_STORE (由快取的片段組合)"""
+    if writer.minify:
+        js_content = ('window.DATA_STORE = {"decisions":[' + ",".join(e["fragment"] for e in entries)
+                      + '],"revocations":' + revocations["json"] + '};')
+    else:
+        js_content = ('window.DATA_STORE = {"decisions": [' + ", ".join(e["fragment"] for e in entries)
+                      + '], "revocations": ' + revocations["json"] + '};')
+    writer.write(output_file, js_content)
     print(f"Successfully wrote data to {output_file}")
 
+    # 搜尋索引 (另一個檔案，網頁載入後以索引查詢取代逐筆掃描)
+    writer.write(search_index_file, search_index_js(search_part, revocations["search"]))
+    print(f"Successfully wrote search index to {search_index_file}")
+
+# --- 分片輸出 (viewer_data/) ---
+# 單一 decision_data.js 必須整份下載、解析後網頁才能顯示。分片輸出改為：
+#   manifest.js                 window.VIEWER_MANIFEST：決定書 MetaData (同 decisions_index.json) 與名冊分頁資訊
+#   decisions/<hash>.js         每份決定書的全文、樹狀結構與表格
+#   revocations/<類別>-<頁>.js  名冊依類別分組，每 REVOCATION_CHUNK_SIZE 筆一個檔案
+#   search_index.js             搜尋索引，第一次搜尋時才載入
+# 分片以 window.VIEWER_SHARD(路徑, 資料) 登記，網頁以 <script> 動態載入 (file:// 下無法使用 fetch)。
+# 內容未變的分片不會重寫 (見 ArtifactWriter 的 previous)。
+
+def decision_shard_path(decision_id):
+    # 以 id 的雜湊命名：檔名只含 ASCII，且新增決定書時其他分片的路徑不變
+    return f"decisions/{hashlib.sha1(decision_id.encode('utf-8')).hexdigest()[:16]}.js"
+
+def write_sharded(entries, revocations, search_part, writer, output_dir=VIEWER_DATA_DIR):
+    """Returns: 刪除的舊分片路徑"""
+    for sub in ("decisions", "revocations"):
+        os.makedirs(os.path.join(output_dir, sub), exist_ok=True)
+
+    written = set()
+    def write(path, content):
+        full_path = os.path.join(output_dir, path)
+        writer.write(full_path, content)
+        written.add(full_path)
+
+    manifest_decisions = []
+    for e in entries:
+        shard = decision_shard_path(e["id"])
+        write(shard, f"window.VIEWER_SHARD({json.dumps(shard)}, {e['fragment']});")
+        manifest_decisions.append({
+            "id": e["id"],
+            "filename": e["filename"],
+            "metadata": e.get("metadata") or {},
+            "shard": shard
+        })
+
+    for path, content in revocations["chunks"]:
+        write(path, content)
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "decisions": manifest_decisions,
+        "revocations": {
+            "total": revocations["count"],
+            "chunk_size": REVOCATION_CHUNK_SIZE,
+            "categories": revocations["categories"]
+        },
+        "search_index": SEARCH_INDEX_FILE
+    }
+    write(MANIFEST_FILE, f"window.VIEWER_MANIFEST = {compact_json(manifest)};")
+    write(SEARCH_INDEX_FILE, search_index_js(search_part, revocations["search"]))
+
+    # 刪除已不存在的決定書 (或名冊頁) 留下的舊分片
+    removed = []
+    for sub in ("decisions", "revocations"):
+        directory = os.path.join(output_dir, sub)
+        for name in sorted(os.listdir(directory)):
+            base = re.sub(r"\.(gz|br)$", "", os.path.join(directory, name))
+            if base not in written and base not in removed:
+                ArtifactWriter.remove(base)
+                removed.append(base)
+
+    print(f"Successfully wrote {len(entries)} decision shards and "
+          f"{len(revocations['chunks'])} revocation chunks to {output_dir}/ "
+          f"({writer.written} files changed, {len(removed)} removed)")
+    return removed
+
+def build_data_js(compact_tree=False, store_path=None, single_file=False, output_dir=VIEWER_DATA_DIR,
+                  minify=False, compress=(), report_file=None, cache_path=DEFAULT_CACHE_PATH,
+                  data_file=DATA_FILE, search_index_file=SEARCH_INDEX_FILE, index_file=INDEX_FILE):
+    """
+    minify:      decision_data.js 的 JSON 不留空白 (分片、索引本來就是精簡格式)
+    compress:    同時輸出預先壓縮檔 ("gzip" -> .gz、"br" -> .br)
+    report_file: 每個檔案的大小與壓縮率另存為 JSON
+    cache_path:  增量建置快取 (None 表示不使用快取，全部重新處理)
+    index_file:  同時輸出 decisions_index.json (與 generate_index.py 相同)，None 表示不輸出
+    """
+    # 解析結果儲存層 (parsed_results/ 或 decisions.db，見 storage.py)
+    store = open_store(store_path)
+    cache = BuildCache(cache_path)
+    writer = ArtifactWriter(minify=minify, compress=compress, previous=cache.outputs())
+    try:
+        # 分片一律為精簡格式
+        entries = collect_decisions(store, cache, compact_tree=compact_tree, minify=minify or not single_file)
+        revocations = collect_revocations(store, cache, entries, "single" if single_file else "sharded", writer)
+        search_part = decision_search_part(entries, cache)
+        if single_file:
+            write_single_file(entries, revocations, search_part, writer,
+                              output_file=data_file, search_index_file=search_index_file)
+            removed = []
+        else:
+            removed = write_sharded(entries, revocations, search_part, writer, output_dir=output_dir)
+        if index_file:
+            write_decisions_index(entries, writer, index_file)
+        cache.put_outputs(writer.artifacts)
+        cache.remove_outputs(removed)
+    finally:
+        store.close()
+        cache.close()
+
+    if single_file:
+        writer.report()
+    else:
+        writer.report(group_dirs=[os.path.join(output_dir, "decisions"), os.path.join(output_dir, "revocations")])
+    if report_file:
+        writer.save_report(report_file)
+
 if __name__ == "__main__":
-    build_data_js()
\ No newline at end of file
+    arg_parser = argparse.ArgumentParser(description="彙整解析結果為前端使用的資料 (viewer_data/ 或 decision_data.js)")
+    arg_parser.add_argument("--compact-tree", action="store_true",
+                            help="理由樹狀結構以精簡格式輸出，由網頁在開啟決定書時還原")
+    arg_parser.add_argument("--store", default=None,
+                            help="解析結果來源：目錄 (JSON) 或 .db 檔 (SQLite)；預設為 parsed_results/ (與 pipeline 預設相同)")
+    arg_parser.add_argument("--single-file", action="store_true",
+                            help="輸出舊版單一檔案 decision_data.js + search_index.js，而非分片的 viewer_data/")
+    arg_parser.add_argument("--output-dir", default=VIEWER_DATA_DIR, help="分片輸出目錄")
+    arg_parser.add_argument("--minify", action="store_true", help="JSON 不縮排、不留空白")
+    arg_parser.add_argument("--compress", action="append", choices=sorted(COMPRESSIONS), default=[],
+                            help="同時輸出預先壓縮檔 (可重複，例: --compress gzip --compress br；br 需要 brotli 套件)")
+    arg_parser.add_argument("--report", default=None, help="將每個檔案的大小與壓縮率另存為 JSON")
+    arg_parser.add_argument("--cache", default=DEFAULT_CACHE_PATH,
+                            help="增量建置快取：只重新處理內容有變動的決定書與名冊")
+    arg_parser.add_argument("--no-cache", action="store_true", help="不使用快取，全部重新處理")
+    args = arg_parser.parse_args()
+    build_data_js(compact_tree=args.compact_tree, store_path=args.store,
+                  single_file=args.single_file, output_dir=args.output_dir,
+                  minify=args.minify, compress=args.compress, report_file=args.report,
+                  cache_path=None if args.no_cache else args.cache)
@@ -1,82 +1,220 @@
+import argparse
+import json
 import os
 import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-def check_status():
-    download_dir = "downloads_ey_tjb"
-    parsed_dir = "parsed_results"
-    
-    if not os.path.exists(download_dir) or not os.path.exists(parsed_dir):
-        print("Directory missing.")
-        return
+from parse_cache import ParseCache
+from storage import open_store, JsonStore
+
+# 下載與解析狀態檢查 (語料稽核)
+# 檔名只掃描一次，建立：
+#   PDF / 已解析檔名的 set      未解析與孤立 (PDF 已不存在) 的結果以集合運算取得
+#   各字號系列的號碼集合       "促轉司字第12號"、"促轉復查字第3號" 等任何「X字第N號」的系列，缺號以區間表示
+#   新舊檢查                   解析結果是否對應目前的 PDF (修改時間或內容雜湊，見 check_freshness)
+# 結果可另存為 JSON (--json)，供監控排程讀取。
+
+DEFAULT_DOWNLOAD_DIR = "downloads_ey_tjb"
+DEFAULT_MANIFEST_PATH = "parse_manifest.jsonl"
+REPORT_VERSION = 1
+
+# 字號系列：檔名中的「<系列>字第<號>號」，例: 促轉司字第12號_王某.pdf -> ("促轉司字", 12)
+_SERIES_RE = re.compile(r"([^\s_第]+字)第(\d+)號")
+
+def _stem(filename: str) -> str:
+    # 副檔名大小寫不同 (.PDF) 也視為同一份
+    return filename.rsplit(".", 1)[0]
 
-    pdfs = sorted([f for f in os.listdir(download_dir) if f.lower().endswith(".pdf")])
-    jsons = [f for f in os.listdir(parsed_dir) if f.lower().endswith(".json")]
-    
-    # 1. Check for unparsed PDFs
-    unparsed_files = []
+def missing_intervals(numbers: Iterable[int]) -> List[Tuple[int, int]]:
+    """已排序的號碼 -> 最小到最大之間缺少的區間 [(起, 迄)]"""
+    gaps = []
+    prev = None
+    for n in numbers:
+        if prev is not None and n > prev + 1:
+            gaps.append((prev + 1, n - 1))
+        prev = n
+    return gaps
+
+def format_intervals(intervals: Iterable[Tuple[int, int]]) -> str:
+    return ", ".join(str(a) if a == b else f"{a}-{b}" for a, b in intervals)
+
+def series_index(filenames: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    各字號系列的號碼範圍、缺號區間與重複的號碼 (同一號碼有多個檔案)
+    Returns: 系列 -> {"count", "min", "max", "missing", "missing_count", "duplicates"}
+    """
+    numbers: Dict[str, Dict[int, int]] = {}
+    for name in filenames:
+        m = _SERIES_RE.search(name)
+        if m:
+            counts = numbers.setdefault(m.group(1), {})
+            counts[int(m.group(2))] = counts.get(int(m.group(2)), 0) + 1
+    index = {}
+    for series, counts in sorted(numbers.items()):
+        ordered = sorted(counts)
+        gaps = missing_intervals(ordered)
+        index[series] = {
+            "count": len(ordered),
+            "min": ordered[0],
+            "max": ordered[-1],
+            "missing": [list(g) for g in gaps],
+            "missing_count": sum(b - a + 1 for a, b in gaps),
+            "duplicates": [n for n in ordered if counts[n] > 1],
+        }
+    return index
+
+def check_freshness(download_dir: str, pdfs: List[str], store, manifest_path: Optional[str],
+                    mode: str = "mtime", workers: int = 4) -> List[Dict[str, Any]]:
+    """
+    解析結果是否對應目前的 PDF
+      mtime: 大小與修改時間與解析記錄 (parse_manifest.jsonl) 相同即視為最新；沒有解析記錄時，
+             JSON 結果比 PDF 舊者視為過期 (SQLite 儲存無法比較，略過)
+      hash:  大小或修改時間不同時再比對 SHA-256 (以多執行緒計算)，只有內容真的變動才算過期
+    Returns: [{"filename", "reason"}]
+    """
+    entries = ParseCache(manifest_path, "").entries if manifest_path and os.path.exists(manifest_path) else {}
+    stale, to_hash = [], []
     for pdf in pdfs:
-        json_name = pdf.rsplit('.', 1)[0] + ".json"
-        if json_name not in jsons:
-            unparsed_files.append(pdf)
-            
-    print(f"Total PDFs: {len(pdfs)}")
-    print(f"Total JSONs: {len(jsons)}")
-    print(f"Unparsed PDFs ({len(unparsed_files)}):")
-    for f in unparsed_files:
+        path = os.path.join(download_dir, pdf)
+        st = os.stat(path)
+        entry = entries.get(pdf)
+        if entry:
+            if st.st_size == entry.get("size") and st.st_mtime_ns == entry.get("mtime_ns"):
+                continue
+            if mode == "hash":
+                to_hash.append((pdf, path, entry))
+            else:
+                stale.append({"filename": pdf, "reason": "modified"})
+        elif isinstance(store, JsonStore):
+            output = store.path_for(pdf)
+            if os.path.exists(output) and os.stat(output).st_mtime_ns < st.st_mtime_ns:
+                stale.append({"filename": pdf, "reason": "older_than_pdf"})
+
+    if to_hash:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            digests = pool.map(lambda item: ParseCache.file_digest(item[1]), to_hash)
+            for (pdf, _, entry), digest in zip(to_hash, digests):
+                if digest != entry.get("sha256"):
+                    stale.append({"filename": pdf, "reason": "content_changed"})
+    stale.sort(key=lambda s: s["filename"])
+    return stale
+
+def audit(download_dir: str = DEFAULT_DOWNLOAD_DIR, store_path: Optional[str] = None,
+          manifest_path: Optional[str] = DEFAULT_MANIFEST_PATH, freshness: str = "mtime",
+          workers: int = 4) -> Optional[Dict[str, Any]]:
+    """
+    Returns: 稽核結果 (可直接序列化為 JSON)；下載或結果目錄不存在時為 None
+    freshness: "mtime" / "hash" / "off"
+    """
+    # 解析結果儲存層 (parsed_results/ 或 decisions.db，見 storage.py)
+    store = open_store(store_path)
+    try:
+        if not os.path.exists(download_dir) or (isinstance(store, JsonStore) and not os.path.exists(store.directory)):
+            return None
+
+        pdfs = sorted(f for f in os.listdir(download_dir) if f.lower().endswith(".pdf"))
+        parsed = store.filenames()
+        parsed_stems = {_stem(f) for f in parsed}
+        pdf_stems = {_stem(f) for f in pdfs}
+
+        unparsed = [f for f in pdfs if _stem(f) not in parsed_stems]
+        orphans = [f for f in parsed if _stem(f) not in pdf_stems]
+        parsed_pdfs = [f for f in pdfs if _stem(f) in parsed_stems]
+        stale = [] if freshness == "off" else check_freshness(download_dir, parsed_pdfs, store, manifest_path,
+                                                               mode=freshness, workers=workers)
+    finally:
+        store.close()
+
+    series = series_index(pdfs)
+    return {
+        "version": REPORT_VERSION,
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "download_dir": download_dir,
+        "freshness": freshness,
+        "counts": {
+            "pdfs": len(pdfs),
+            "parsed": len(parsed),
+            "unparsed": len(unparsed),
+            "orphans": len(orphans),
+            "stale": len(stale),
+            "missing_numbers": sum(s["missing_count"] for s in series.values()),
+        },
+        "ok": not unparsed and not stale,
+        "unparsed": unparsed,
+        "orphans": orphans,
+        "stale": stale,
+        "series": series,
+    }
+
+def print_report(report: Dict[str, Any]):
+    counts = report["counts"]
+    print(f"Total PDFs: {counts['pdfs']}")
+    print(f"Total JSONs: {counts['parsed']}")
+    print(f"Unparsed PDFs ({counts['unparsed']}):")
+    for f in report["unparsed"]:
         print(f"  - {f}")
-        
-    # 2. Check for sequence gaps in "促轉司字第X號"
-    # Pattern: 促轉司字第(\d+)號
-    ids = []
-    for pdf in pdfs:
-        match = re.search(r"促轉司字第(\d+)號", pdf)
-        if match:
-            ids.append(int(match.group(1)))
-            
-    if ids:
-        ids.sort()
-        missing_ids = []
-        min_id = ids[0]
-        max_id = ids[-1]
-        
-        # Check gaps between min and max
-        for i in range(min_id, max_id + 1):
-            if i not in ids:
-                missing_ids.append(i)
-                
-        print(f"\nSequence range: {min_id} to {max_id}")
-        if missing_ids:
-            print(f"Missing numbers in sequence ({len(missing_ids)}): {missing_ids}")
+    if report["orphans"]:
+        print(f"Parsed results without PDF ({counts['orphans']}):")
+        for f in report["orphans"]:
+            print(f"  - {f}")
+    if report["freshness"] != "off":
+        print(f"Stale results ({counts['stale']}, checked by {report['freshness']}):")
+        for s in report["stale"]:
+            print(f"  - {s['filename']} ({s['reason']})")
+
+    for name, s in report["series"].items():
+        print(f"\n{name} sequence range: {s['min']} to {s['max']} ({s['count']} files)")
+        if s["missing"]:
+            print(f"Missing numbers in sequence ({s['missing_count']}): {format_intervals(s['missing'])}")
         else:
             print("No gaps in sequence.")
-            
+        if s["duplicates"]:
+            print(f"Numbers with more than one file: {s['duplicates']}")
         # Check if 1 is the start
-        if min_id > 1:
-            print(f"Note: Sequence starts at {min_id}, potentially missing 1-{min_id-1}")
+        if s["min"] > 1:
+            print(f"Note: Sequence starts at {s['min']}, potentially missing 1-{s['min'] - 1}")
 
-    # 3. Check for "復查決定書" sequence if applicable
-    # Pattern: 促轉復查字第(\d+)號
-    review_ids = []
-    for pdf in pdfs:
-        match = re.search(r"促轉復查字第(\d+)號", pdf)
-        if match:
-            review_ids.append(int(match.group(1)))
-            
-    if review_ids:
-        review_ids.sort()
-        missing_reviews = []
-        min_rev = review_ids[0]
-        max_rev = review_ids[-1]
-        
-        for i in range(min_rev, max_rev + 1):
-            if i not in review_ids:
-                missing_reviews.append(i)
-                
-        print(f"\nReview Sequence range: {min_rev} to {max_rev}")
-        if missing_reviews:
-            print(f"Missing review numbers ({len(missing_reviews)}): {missing_reviews}")
-        else:
-            print("No gaps in review sequence.")
+def check_status(store_path=None, download_dir=DEFAULT_DOWNLOAD_DIR, manifest_path=DEFAULT_MANIFEST_PATH,
+                 freshness="mtime", json_path=None, quiet=False, workers=4):
+    """
+    json_path: 稽核結果另存為 JSON ("-" 為輸出到 stdout，不列出文字報告)
+    Returns: 稽核結果 (目錄不存在時為 None)
+    """
+    report = audit(download_dir, store_path, manifest_path, freshness, workers)
+    if report is None:
+        print("Directory missing.")
+        return None
+    if json_path == "-":
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+        return report
+    if not quiet:
+        print_report(report)
+    if json_path:
+        # 先寫暫存檔再取代，監控程式不會讀到寫到一半的檔案
+        tmp_path = json_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, json_path)
+    return report
 
 if __name__ == "__main__":
-    check_status()
+    arg_parser = argparse.ArgumentParser(description="檢查下載與解析狀態")
+    arg_parser.add_argument("--store", default=None,
+                            help="解析結果來源：目錄 (JSON) 或 .db 檔 (SQLite)；預設為 parsed_results/ (與 pipeline 預設相同)")
+    arg_parser.add_argument("--download-dir", default=DEFAULT_DOWNLOAD_DIR)
+    arg_parser.add_argument("--manifest", default=DEFAULT_MANIFEST_PATH, help="pipeline 的解析記錄 (新舊檢查用)")
+    arg_parser.add_argument("--freshness", choices=("mtime", "hash", "off"), default="mtime",
+                            help="解析結果新舊檢查：mtime 比對大小與修改時間；hash 修改時間不同時再比對內容雜湊")
+    arg_parser.add_argument("--workers", type=int, default=4, help="計算雜湊的執行緒數")
+    arg_parser.add_argument("--json", default=None, help="稽核結果另存為 JSON (- 為輸出到 stdout)")
+    arg_parser.add_argument("--quiet", action="store_true", help="不列出文字報告 (搭配 --json)")
+    arg_parser.add_argument("--strict", action="store_true", help="有未解析或過期的檔案時以非 0 結束")
+    args = arg_parser.parse_args()
+    report = check_status(store_path=args.store, download_dir=args.download_dir, manifest_path=args.manifest,
+                          freshness=args.freshness, json_path=args.json, quiet=args.quiet, workers=args.workers)
+    if args.strict and (report is None or not report["ok"]):
+        sys.exit(1)
@@ -3,6 +3,8 @@ import pdfplumber
 import json
 import re
 
+from revocation_log import RevocationLog, DEFAULT_LOG_PATH, read_records, append_to_array
+
 # 嘗試從 extract_tables 匯入工具函數，如果失敗則自行定義
 try:
     from extract_tables import normalize_header, split_values
@@ -51,50 +53,57 @@ except ImportError:
         parts = re.split(r"[、，,；;\n]+", text)
         return [p.strip() for p in parts if p.strip()]
 
-def parse_special_pdf():
-    target_file = "list/1075300110B(只有第一種).pdf"
-    output_file = "all_revocations.json"
-    
+def parse_special_pdf(target_file="list/1075300110B(只有第一種).pdf", output_file="all_revocations.json",
+                      log_path=DEFAULT_LOG_PATH):
+    """
+    逐頁將資料列附加到擷取記錄 (revocation_log.py)，完成後只把新增的資料列附加到 output_file 結尾，
+    不必讀取與重寫整份既有資料；中途中斷時再次執行會由中斷處繼續。
+    """
     if not os.path.exists(target_file):
         print(f"找不到檔案: {target_file}")
         return
 
-    # 讀取現有的 json
-    all_results = []
-    if os.path.exists(output_file):
+    filename = os.path.basename(target_file)
+    log = RevocationLog(log_path)
+    # 尚無擷取記錄 (舊版產生的 all_revocations.json)：先匯入既有資料
+    if not log.count and not log.done and os.path.exists(output_file):
         try:
             with open(output_file, "r", encoding="utf-8") as f:
-                all_results = json.load(f)
-            print(f"已讀取現有資料: {len(all_results)} 筆")
+                existing = json.load(f)
+            log.import_records(existing)
+            print(f"已匯入現有資料: {len(existing)} 筆")
         except Exception as e:
             print(f"讀取 {output_file} 失敗: {e}")
-            all_results = []
 
-    new_results = []
-    filename = os.path.basename(target_file)
-    
-    print(f"開始專門解析: {filename}")
-    
+    if log.is_done(filename):
+        log.close()
+        print(f"{filename} 已在 {output_file} 中，略過")
+        return
+
+    start, state = log.resume_point(filename) or (0, {"header_names": []})
+    header_names = state["header_names"]
+    if start:
+        print(f"由第 {start + 1} 頁繼續解析: {filename}")
+    else:
+        print(f"開始專門解析: {filename}")
+
     try:
         with pdfplumber.open(target_file) as pdf:
             current_cat = 1 # 已知為第一種
-            header_names = []
-            
-            for i, page in enumerate(pdf.pages):
+
+            for i, page in enumerate(pdf.pages[start:], start):
                 # 依照使用者需求：第一頁有文字但不需要文字
                 # 我們直接提取表格即可，不呼叫 page.extract_text()
-                
+                page_results = []
                 tables = page.extract_tables()
-                if not tables:
-                    continue
-                
+
                 for tbl in tables:
                     if not tbl: continue
-                    
+
                     # 檢查這一桌是否包含標題列
                     first_row = [str(c) if c else "" for c in tbl[0]]
                     combined_row = "".join(first_row)
-                    
+
                     if "姓名" in combined_row or "序號" in combined_row:
                         header_names = normalize_header(first_row)
                         data_rows = tbl[1:]
@@ -107,38 +116,42 @@ def parse_special_pdf():
                     for row in data_rows:
                         # 過濾全空列
                         if not any(row): continue
-                        
+
                         entry = {
                             "source": filename,
                             "category": current_cat
                         }
-                        
+
                         # 填充資料
                         for j, cell in enumerate(row):
                             if j < len(header_names):
                                 field = header_names[j]
                                 val = str(cell).strip() if cell else ""
-                                
+
                                 if field in ["crime", "sentence", "case_id", "court"]:
                                     entry[field] = split_values(val)
                                 else:
                                     entry[field] = val
-                        
+
                         # 姓名是必要的
                         if entry.get("name") and entry["name"] != "姓名":
-                            new_results.append(entry)
-                            
+                            page_results.append(entry)
+
+                log.append_page(filename, i, page_results, {"header_names": header_names})
+                page.close()
+        log.finish(filename)
+
     except Exception as e:
-        print(f"解析過程中發生錯誤: {e}")
+        print(f"解析過程中發生錯誤: {e} (已完成的頁面保留在 {log_path}，再次執行時繼續)")
         return
+    finally:
+        log.close()
+
+    # 只附加新增的資料列
+    new_results = list(read_records(log_path, source=filename))
+    append_to_array(output_file, new_results)
 
-    # 合併並存檔
-    all_results.extend(new_results)
-    
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(all_results, f, ensure_ascii=False, indent=2)
-    
-    print(f"解析完成！新增 {len(new_results)} 筆資料，總計 {len(all_results)} 筆。")
+    print(f"解析完成！新增 {len(new_results)} 筆資料，總計 {log.count} 筆。")
 
 if __name__ == "__main__":
     parse_special_pdf()
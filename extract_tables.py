@@ -1,7 +1,17 @@
 import os
+import argparse
 import pdfplumber
-import json
 import re
+from concurrent.futures import ProcessPoolExecutor
+from pdfplumber.page import Page
+
+from preprocess_pdfs import page_transform
+from revocation_log import RevocationLog, DEFAULT_LOG_PATH, compact
+
+# 平行模式下每個工作的頁數 (每個工作各自開啟一次 PDF)
+PAGES_PER_TASK = 8
+RAW_DIR = "list"
+PROCESSED_DIR = "processed_list"
 
 def normalize_header(header):
     """標準化欄位名稱，將相似的欄位統一"""
@@ -58,72 +68,221 @@ def split_values(text):
     
     return [p.strip() for p in parts if p.strip()]
 
-def run_extraction():
-    src_dir = "processed_list"
-    output_file = "all_revocations.json"
-    all_results = []
+# --- 逐頁擷取與組合 ---
+# 版面分析 (extract_text / extract_tables) 是主要成本，且每頁互不相關，可交給 Process Pool 平行處理；
+# 類別 (current_cat) 與欄位名稱 (header_names) 會延續到下一頁 (續頁的表格沒有標題列)，
+# 因此組合成資料列一律在主行程依檔名、頁碼順序進行，結果與逐頁依序處理完全相同。
 
-    files = sorted([f for f in os.listdir(src_dir) if f.lower().endswith('.pdf')])
-    print(f"開始處理 {len(files)} 個檔案...")
+def new_state(filename):
+    """跨頁延續的狀態：檔名標註「只有第二種」者固定為第二類，否則依頁面標題切換"""
+    file_default_cat = 2 if "只有第二種" in filename else None
+    return {"filename": filename, "file_default_cat": file_default_cat,
+            "current_cat": file_default_cat, "header_names": []}
+
+def page_rows(text, tables, state):
+    """一頁的文字與表格 -> 資料列 (更新 state)"""
+    filename = state["filename"]
+    if not state["file_default_cat"]:
+        if "公告名冊（一）" in text:
+            state["current_cat"] = 1
+        elif "公告名冊（二）" in text or "公告名冊(二)" in text:
+            state["current_cat"] = 2
+
+    rows = []
+    for tbl in tables:
+        if not tbl: continue
+
+        raw_header = [str(c) if c else "" for c in tbl[0]]
+        if "姓名" in "".join(raw_header) or "序號" in "".join(raw_header):
+            state["header_names"] = normalize_header(raw_header)
+            data_rows = tbl[1:]
+        else:
+            if not state["header_names"]: continue
+            data_rows = tbl
+        header_names = state["header_names"]
+
+        for row in data_rows:
+            if not any(row): continue
+
+            entry = {
+                "source": filename,
+                "category": state["current_cat"] or 1
+            }
+
+            for i, cell in enumerate(row):
+                if i < len(header_names):
+                    field = header_names[i]
+                    val = str(cell).strip() if cell else ""
+
+                    # 現在連裁判機關 (court) 也進行分割處理
+                    if field in ["crime", "sentence", "case_id", "court"]:
+                        entry[field] = split_values(val)
+                    else:
+                        entry[field] = val
+
+            rows.append(entry)
+    return rows
+
+def _virtual_pages(pdf, transform):
+    """
+    前處理後的頁面 (移除首頁、旋轉，見 preprocess_pdfs.page_transform)，直接由原始檔案產生，不另存 PDF
+    旋轉與 pypdf 的 page.rotate 相同：/Rotate 加上角度，版面分析時由 pdfminer 套用
+    注意：平行模式下每個頁面範圍的工作都會載入整份 pdf.pages 並重建所有頁面物件
+    (doctop 需累計前面各頁的高度)，頁數很多時這部分的成本隨工作數倍增。
+    """
+    if transform is None:
+        return pdf.pages
+    skip, rotation = transform
+    pages = []
+    doctop = 0
+    for page in pdf.pages[skip:]:
+        if rotation:
+            page_obj = page.page_obj
+            page_obj.attrs = dict(page_obj.attrs, Rotate=page.rotation + rotation)
+            page_obj.rotate = (page_obj.rotate + rotation) % 360
+            page = Page(pdf, page_obj, page_number=len(pages) + 1, initial_doctop=doctop)
+        pages.append(page)
+        doctop += page.height
+    return pages
+
+def iter_pages(path, start=0, stop=None, transform=None):
+    """
+    依序擷取 [start, stop) 頁的 (文字, 表格)，處理完的頁面即釋放版面快取
+    transform: (移除前幾頁, 旋轉角度)，頁碼為套用後的頁碼
+    """
+    with pdfplumber.open(path) as pdf:
+        for page in _virtual_pages(pdf, transform)[start:stop]:
+            text = page.extract_text() or ""
+            tables = page.extract_tables()
+            page.close()
+            yield text, tables
+
+def _extract_range(task):
+    """
+    子行程：擷取一段頁面
+    Returns: (逐頁輸出, 錯誤訊息)；發生錯誤時回傳錯誤之前已擷取的頁面 (同依序處理時保留前面的資料列)
+    """
+    path, start, stop, transform = task
+    pages = []
+    try:
+        for page in iter_pages(path, start, stop, transform):
+            pages.append(page)
+    except Exception as e:
+        return pages, str(e)
+    return pages, None
 
+def _page_count(path, transform=None):
+    with pdfplumber.open(path) as pdf:
+        return max(0, len(pdf.pages) - (transform[0] if transform else 0))
+
+def _start(log, filename):
+    """由記錄檔的進度決定起始頁與狀態 (未處理過則從第一頁開始)"""
+    resume = log.resume_point(filename)
+    return resume if resume else (0, new_state(filename))
+
+def extract_serial(src_dir, files, log, transforms=None):
+    for filename in files:
+        if log.is_done(filename):
+            continue
+        start, state = _start(log, filename)
+        transform = transforms[filename] if transforms else None
+        try:
+            for page_no, (text, tables) in enumerate(iter_pages(os.path.join(src_dir, filename), start,
+                                                                transform=transform), start):
+                log.append_page(filename, page_no, page_rows(text, tables, state), state)
+            log.finish(filename)
+        except Exception as e:
+            print(f"  [錯誤] {filename}: {e}")
+
+def extract_parallel(src_dir, files, workers, log, pages_per_task=PAGES_PER_TASK, transforms=None):
+    """
+    平行模式：每個檔案切成每 pages_per_task 頁一個工作交給 Process Pool，
+    結果依提交順序 (檔名、頁碼) 取回後在主行程組合
+    """
+    tasks, owners = [], []
+    states, page_counts = {}, {}
     for filename in files:
+        if log.is_done(filename):
+            continue
         path = os.path.join(src_dir, filename)
-        file_default_cat = 2 if "只有第二種" in filename else None
-        
+        transform = transforms[filename] if transforms else None
         try:
-            with pdfplumber.open(path) as pdf:
-                current_cat = file_default_cat
-                header_names = []
-                
-                for page in pdf.pages:
-                    text = page.extract_text() or ""
-                    
-                    if not file_default_cat:
-                        if "公告名冊（一）" in text:
-                            current_cat = 1
-                        elif "公告名冊（二）" in text or "公告名冊(二)" in text:
-                            current_cat = 2
-                    
-                    tables = page.extract_tables()
-                    for tbl in tables:
-                        if not tbl: continue
-                        
-                        raw_header = [str(c) if c else "" for c in tbl[0]]
-                        if "姓名" in "".join(raw_header) or "序號" in "".join(raw_header):
-                            header_names = normalize_header(raw_header)
-                            data_rows = tbl[1:]
-                        else:
-                            if not header_names: continue
-                            data_rows = tbl
-
-                        for row in data_rows:
-                            if not any(row): continue 
-                            
-                            entry = {
-                                "source": filename,
-                                "category": current_cat or 1
-                            }
-                            
-                            for i, cell in enumerate(row):
-                                if i < len(header_names):
-                                    field = header_names[i]
-                                    val = str(cell).strip() if cell else ""
-                                    
-                                    # 現在連裁判機關 (court) 也進行分割處理
-                                    if field in ["crime", "sentence", "case_id", "court"]:
-                                        entry[field] = split_values(val)
-                                    else:
-                                        entry[field] = val
-                            
-                            all_results.append(entry)
-                            
+            count = _page_count(path, transform)
         except Exception as e:
             print(f"  [錯誤] {filename}: {e}")
+            continue
+        first, states[filename] = _start(log, filename)
+        page_counts[filename] = count
+        for start in range(first, count, pages_per_task):
+            tasks.append((path, start, min(start + pages_per_task, count), transform))
+            owners.append(filename)
+        if first >= count:
+            log.finish(filename)
 
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(all_results, f, ensure_ascii=False, indent=2)
-    
-    print(f"處理完成！共提取 {len(all_results)} 筆資料。")
+    failed = set()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for filename, task, (pages, error) in zip(owners, tasks, pool.map(_extract_range, tasks)):
+            if filename in failed:
+                continue
+            state = states[filename]
+            try:
+                for page_no, (text, tables) in enumerate(pages, task[1]):
+                    log.append_page(filename, page_no, page_rows(text, tables, state), state)
+            except Exception as e:
+                error = str(e)
+            if error is not None:
+                print(f"  [錯誤] {filename}: {error}")
+                failed.add(filename)
+            elif task[2] == page_counts[filename]:
+                log.finish(filename)
+
+def run_extraction(src_dir=None, output_file="all_revocations.json", workers=0,
+                   pages_per_task=PAGES_PER_TASK, log_path=DEFAULT_LOG_PATH, resume=False, fused=False):
+    """
+    src_dir:  名冊目錄，預設為 processed_list/ (fused 時為原始的 list/)
+    fused:    直接讀取原始名冊，前處理 (移除首頁、旋轉) 在擷取時套用，不需先執行 preprocess_pdfs.py
+    workers:  平行擷取的子行程數 (0 為依序處理)
+    log_path: 逐頁附加的擷取記錄 (JSON Lines，見 revocation_log.py)，完成後整理為 output_file
+    resume:   保留記錄檔，由上次中斷處繼續 (已完成的頁面不重新擷取)；
+              中斷處之前的檔案有錯誤而重試時，該檔案的資料列會排在其他檔案之後
+    """
+    src_dir = src_dir or (RAW_DIR if fused else PROCESSED_DIR)
+    files = sorted([f for f in os.listdir(src_dir) if f.lower().endswith('.pdf')])
+    transforms = None
+    if fused:
+        transforms = {f: page_transform(f) for f in files}
+        files = [f for f in files if transforms[f] is not None]
+    print(f"開始處理 {len(files)} 個檔案...")
+
+    log = RevocationLog(log_path, reset=not resume)
+    if resume and log.count:
+        print(f"由上次中斷處繼續：已完成 {len(log.done)} 個檔案、{log.count} 筆資料")
+    try:
+        if workers > 0:
+            print(f"平行擷取: {workers} 個子行程，每 {pages_per_task} 頁一個工作")
+            extract_parallel(src_dir, files, workers, log, pages_per_task, transforms)
+        else:
+            extract_serial(src_dir, files, log, transforms)
+    finally:
+        log.close()
+
+    count = compact(log_path, output_file)
+    print(f"處理完成！共提取 {count} 筆資料。")
 
 if __name__ == "__main__":
-    run_extraction()
+    arg_parser = argparse.ArgumentParser(description="擷取撤銷公告名冊的表格 (processed_list/*.pdf -> all_revocations.json)")
+    arg_parser.add_argument("--src-dir", default=None,
+                            help="名冊 PDF 目錄 (預設為 preprocess_pdfs.py 的輸出 processed_list/，--fused 時為 list/)")
+    arg_parser.add_argument("--fused", action="store_true",
+                            help="直接讀取原始名冊 (list/)，移除首頁與旋轉在擷取時套用，不需先產生 processed_list/")
+    arg_parser.add_argument("--output", default="all_revocations.json")
+    arg_parser.add_argument("--workers", type=int, default=0,
+                            help="平行擷取的子行程數 (0 為依序處理；輸出順序與依序處理相同)")
+    arg_parser.add_argument("--pages-per-task", type=int, default=PAGES_PER_TASK,
+                            help="平行模式下每個工作的頁數")
+    arg_parser.add_argument("--log", default=DEFAULT_LOG_PATH, help="逐頁附加的擷取記錄 (JSON Lines)")
+    arg_parser.add_argument("--resume", action="store_true", help="由上次中斷處繼續 (保留擷取記錄)")
+    args = arg_parser.parse_args()
+    run_extraction(src_dir=args.src_dir, output_file=args.output, workers=args.workers,
+                   pages_per_task=max(1, args.pages_per_task), log_path=args.log, resume=args.resume,
+                   fused=args.fused)
@@ -1,95 +1,237 @@
 import os
+import json
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
+from requests.adapters import HTTPAdapter
+from listing_parser import get_extractor
+from instrumentation import NULL_INSTRUMENTATION
+from urllib.parse import urljoin, urlparse
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import threading
 import time
 import re
-from typing import Generator, Tuple
+from typing import Any, Dict, Generator, List, Optional, Tuple
 
 class EYCrawler:
     """
     行政院轉型正義決策書爬蟲
     功能：遍歷目標網站，下載 PDF，並以 Generator 形式即時回傳下載完成的檔案路徑。
+    下載透過共用連線池的 Session 並行進行，同一主機的同時連線數有上限。
     """
     
     BASE_URL = "https://www.ey.gov.tw/tjb/AAF17F8B016C031A"
     USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
 
-    def __init__(self, download_dir: str = "downloads_ey_tjb", page_size: int = 100):
+    MANIFEST_NAME = ".crawl_manifest.json"
+    # 增量模式記住上次列表最前面的幾個項目 (只記一個的話，該項目下架就找不到停止點)
+    NEWEST_KEEP = 5
+
+    def __init__(self, download_dir: str = "downloads_ey_tjb", page_size: int = 100,
+                 max_workers: int = 4, per_host_limit: int = 4, base_url: Optional[str] = None,
+                 stop_after_known: int = 0, incremental: bool = False,
+                 listing_backend: Optional[str] = None, instrumentation=None):
         self.download_dir = download_dir
         self.page_size = page_size
+        self.max_workers = max(1, max_workers)
+        self.per_host_limit = max(1, per_host_limit)
+        # 可指向本機測試伺服器
+        self.base_url = base_url or self.BASE_URL
+        # 連續遇到 N 個已知且未變動的項目就停止翻頁，0 表示不提前停止
+        self.stop_after_known = stop_after_known
+        # 增量模式：翻頁到上次看過的最新項目就停止
+        self.incremental = incremental
+        # 列表頁解析後端 (selectolax / lxml / bs4)，None 表示自動選擇可用的最快者
+        self.extract_listing = get_extractor(listing_backend)
+        # 請求延遲量測 (instrumentation.Instrumentation)，每個回應送出一筆 "request" 事件
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
         
         if not os.path.exists(self.download_dir):
             os.makedirs(self.download_dir)
 
+        # 下載清單：
+        #   files: 每個網址的 ETag / Last-Modified / Content-Length，用於條件式請求
+        #   newest: 上次完整爬取時列表最前面的項目網址，用於增量模式
+        self.manifest_path = os.path.join(self.download_dir, self.MANIFEST_NAME)
+        state = self._load_manifest()
+        self.manifest: Dict[str, Dict[str, Any]] = state.get("files", {})
+        self.newest_seen: List[str] = state.get("newest", [])
+        self._manifest_lock = threading.Lock()
+
+        # 共用 Session：所有請求重複使用同一組連線
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = self.USER_AGENT
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(self.max_workers, self.per_host_limit))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        # 每個主機一個 Semaphore，限制同時連線數
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_lock = threading.Lock()
+
+    def _hooks(self, kind: str) -> Dict[str, Any]:
+        """請求的 response hook (kind: "listing" / "download")，未啟用量測時為空"""
+        if self.instrumentation is NULL_INSTRUMENTATION:
+            return {}
+        return {"response": functools.partial(self._record_response, kind)}
+
+    def _record_response(self, kind: str, r: requests.Response, *args, **kwargs):
+        # 收到回應標頭時呼叫 (下載內容之前)，elapsed 即為請求延遲
+        size = r.headers.get("content-length")
+        self.instrumentation.request(kind, r.url, status=r.status_code, latency=r.elapsed.total_seconds(),
+                                     size=int(size) if size and size.isdigit() else None)
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc
+        with self._host_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_slots[host]
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        if not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"[警告] 無法讀取下載清單，將重新建立: {e}")
+            return {}
+
+    def _save_manifest(self):
+        with self._manifest_lock:
+            tmp_path = self.manifest_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"files": self.manifest, "newest": self.newest_seen}, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.manifest_path)
+
+    def _remember(self, url: str, filename: str, response: requests.Response, local_path: str):
+        """記錄遠端檔案的驗證資訊，供下次條件式請求使用"""
+        entry = {
+            "filename": filename,
+            "etag": response.headers.get('etag'),
+            "last_modified": response.headers.get('last-modified'),
+            "content_length": os.path.getsize(local_path)
+        }
+        with self._manifest_lock:
+            old = self.manifest.get(url, {})
+            # 304 / 416 回應不一定帶驗證資訊，保留舊值
+            entry["etag"] = entry["etag"] or old.get("etag")
+            entry["last_modified"] = entry["last_modified"] or old.get("last_modified")
+            self.manifest[url] = entry
+
+    @staticmethod
+    def _content_range_total(header: Optional[str]) -> Optional[int]:
+        """416 回應的 Content-Range (bytes */<總長度>) 中的總長度；沒有該標頭、格式不符或為 * 時為 None"""
+        total = (header or "").rpartition('/')[2].strip()
+        return int(total) if total.isdigit() else None
+
+    @staticmethod
+    def _validators_match(known: Dict[str, Any], response: requests.Response) -> bool:
+        """回應的 ETag / Last-Modified 與清單記錄相同 (任一方沒有該欄位時不比較)"""
+        for header, field in (('etag', 'etag'), ('last-modified', 'last_modified')):
+            value = response.headers.get(header)
+            if value and known.get(field) and value != known[field]:
+                return False
+        return True
+
     def _sanitize_filename(self, filename: str) -> str:
         """移除檔名中的非法字元"""
         return re.sub(r'[\\/*?:\"<>|]', "", filename).strip()
 
-    def _download_file(self, url: str, filename: str) -> str:
+    def _download_file(self, url: str, filename: str) -> Tuple[Optional[str], bool]:
         """
-        下載檔案
+        下載檔案 (單一請求完成完整性檢查、續傳與下載)
+        1. 本地檔案與清單記錄的大小一致時，以 If-None-Match / If-Modified-Since 重新驗證，
+           304 表示未變動，不傳輸任何內容；伺服器忽略條件式標頭而回應 200 時，
+           長度相同且 ETag / Last-Modified 未變也視為未變動，不重新下載。
+        2. 本地已有部分檔案時直接以 Range 請求剩餘部分：
+           206 表示續傳、416 表示本地檔案已完整、200 表示伺服器不支援續傳。
         Returns: 
-            str: 本地檔案絕對路徑
+            (本地檔案路徑，失敗時為 None；是否為已知且未變動的檔案)
         """
         local_path = os.path.join(self.download_dir, filename)
-        headers = {'User-Agent': self.USER_AGENT}
-        
-        # 1. 取得遠端檔案資訊
-        try:
-            with requests.get(url, headers=headers, stream=True) as r:
-                r.raise_for_status()
-                total_size = int(r.headers.get('content-length', 0))
-                accept_ranges = r.headers.get('accept-ranges', 'none')
-        except Exception as e:
-            print(f"[錯誤] 無法取得檔案資訊: {filename} - {e}")
-            return None
+        downloaded_size = os.path.getsize(local_path) if os.path.exists(local_path) else 0
+        known = self.manifest.get(url)
 
-        # 2. 檢查本地檔案 (去重/續傳檢查)
-        downloaded_size = 0
-        if os.path.exists(local_path):
-            downloaded_size = os.path.getsize(local_path)
-            
-            if downloaded_size == total_size and total_size > 0:
-                # 檔案已完整
-                return local_path
-            elif downloaded_size > total_size:
-                # 異常，重新下載
-                downloaded_size = 0
-            # else: 需要續傳
-
-        # 3. 處理續傳 Headers
-        resume_header = headers.copy()
-        mode = 'wb'
-        
-        if downloaded_size > 0 and accept_ranges == 'bytes':
-            resume_header['Range'] = f'bytes={downloaded_size}-'
-            mode = 'ab'
-        else:
-            downloaded_size = 0 
+        headers = {}
+        conditional = bool(known and downloaded_size > 0 and downloaded_size == known.get("content_length")
+                           and (known.get("etag") or known.get("last_modified")))
+        if conditional:
+            if known.get("etag"):
+                headers['If-None-Match'] = known["etag"]
+            if known.get("last_modified"):
+                headers['If-Modified-Since'] = known["last_modified"]
+        elif downloaded_size > 0:
+            headers['Range'] = f'bytes={downloaded_size}-'
 
-        # 4. 執行下載
         try:
-            with requests.get(url, headers=resume_header, stream=True) as r:
-                r.raise_for_status()
-                
-                if r.status_code == 200: # 伺服器不支援續傳，重頭來
-                    mode = 'wb'
-                    downloaded_size = 0
-                
-                with open(local_path, mode) as f:
+            with self._host_slot(url):
+                r = self.session.get(url, headers=headers, stream=True, hooks=self._hooks("download"))
+                try:
+                    if r.status_code == 304:
+                        # 未變動
+                        self._remember(url, filename, r, local_path)
+                        return local_path, True
+
+                    if r.status_code == 416:
+                        total_size = self._content_range_total(r.headers.get('content-range'))
+                        if total_size is not None and total_size == downloaded_size:
+                            # 檔案已完整
+                            self._remember(url, filename, r, local_path)
+                            return local_path, known is not None
+                        # 本地檔案比遠端大 (異常)，或無法得知遠端大小：改以一般請求取得完整內容
+                        # (無法得知大小時仍保留本地大小，回應長度相同就不重新寫入)
+                        r.close()
+                        r = self.session.get(url, stream=True, hooks=self._hooks("download"))
+                        if total_size is not None:
+                            downloaded_size = 0
+
+                    r.raise_for_status()
+
+                    if r.status_code == 206:
+                        mode = 'ab'
+                    else:
+                        # 完整內容 (條件式請求判定已變動，或伺服器不支援續傳)
+                        total_size = int(r.headers.get('content-length', 0))
+                        if (downloaded_size > 0 and downloaded_size == total_size
+                                and (not conditional or self._validators_match(known, r))):
+                            # 檔案已完整 (伺服器忽略條件式標頭時，以大小與 ETag / Last-Modified 判斷未變動)
+                            self._remember(url, filename, r, local_path)
+                            return local_path, known is not None
+                        mode = 'wb'
+
                     # 只有真正下載時才顯示進度，避免洗版
-                    if mode == 'wb' or (mode == 'ab' and downloaded_size < total_size):
-                        print(f"[下載中] {filename} ...")
-                        
-                    for chunk in r.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
-            return local_path
+                    print(f"[下載中] {filename} ...")
+                    with open(local_path, mode) as f:
+                        for chunk in r.iter_content(chunk_size=8192):
+                            if chunk:
+                                f.write(chunk)
+                    self._remember(url, filename, r, local_path)
+                finally:
+                    r.close()
+            return local_path, False
             
         except Exception as e:
             print(f"[失敗] 下載中斷: {filename} - {e}")
-            return None
+            return None, False
+
+    def _parse_listing(self, html: str) -> Tuple[List[Tuple[str, str]], int]:
+        """
+        解析列表頁
+        Returns:
+            (檔名, 完整網址) 清單，以及頁面上的項目總數 (用於判斷是否還有下一頁)
+        """
+        raw_items, item_count = self.extract_listing(html)
+        items = []
+        for raw_title, href in raw_items:
+            if not raw_title.lower().endswith('.pdf'):
+                raw_title += ".pdf"
+                
+            filename = self._sanitize_filename(raw_title)
+            
+            if href:
+                items.append((filename, urljoin(self.base_url, href)))
+        return items, item_count
 
     def fetch_new_files(self, max_pages: int = 10) -> Generator[str, None, None]:
         """
@@ -97,68 +239,93 @@ class EYCrawler:
         
         Args:
             max_pages: 最大爬取頁數，防止無限迴圈
+                       (若設定 stop_after_known，遇到連續未變動的項目也會提前停止；
+                        增量模式下到達上次看過的最新項目即停止，該項目之後的檔案不再檢查)
             
         Yields:
             str: 下載完成的檔案路徑 (絕對路徑)
         """
         page = 1
         has_next_page = True
+        # 是否已涵蓋到上次的停止點 (或列表結尾)，只有此時才能更新停止點
+        caught_up = False
         
-        print(f"啟動爬蟲: {self.BASE_URL}")
+        print(f"啟動爬蟲: {self.base_url}")
         
-        while has_next_page and page <= max_pages:
-            target_url = f"{self.BASE_URL}?page={page}&PS={self.page_size}"
-            # print(f"正在分析第 {page} 頁...")
-            
-            try:
-                response = requests.get(target_url, headers={'User-Agent': self.USER_AGENT})
-                response.raise_for_status()
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                item_list = soup.find_all("li", class_="new_img")
+        # 連續未變動的項目數 (跨頁累計)
+        known_run = 0
+        # 本次列表最前面的項目，爬取順利結束後成為下次增量模式的停止點
+        newest = []
+        # 有項目下載失敗時不更新停止點，否則下次增量模式會停在失敗項目之前，永遠不再重試
+        failed = 0
+        known_newest = set(self.newest_seen) if self.incremental else set()
+        # 下載交給執行緒池並行處理，依列表順序交出結果
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            while has_next_page and page <= max_pages:
+                target_url = f"{self.base_url}?page={page}&PS={self.page_size}"
+                # print(f"正在分析第 {page} 頁...")
                 
-                if not item_list:
-                    has_next_page = False
-                    break
-                    
-                for item in item_list:
-                    link_tag = item.find("a", class_="words_a")
-                    if not link_tag:
-                        continue
+                try:
+                    with self._host_slot(target_url):
+                        response = self.session.get(target_url, hooks=self._hooks("listing"))
+                    response.raise_for_status()
+                    items, item_count = self._parse_listing(response.text)
                     
-                    # 處理標題
-                    title_div = link_tag.find("div", class_="title2")
-                    if title_div:
-                        for tag in title_div.find_all("i"):
-                            tag.decompose()
-                        raw_title = title_div.get_text(strip=True)
-                    else:
-                        raw_title = link_tag.get("title", "unknown_file")
+                    if not item_count:
+                        has_next_page = False
+                        caught_up = True
+                        break
 
-                    if not raw_title.lower().endswith('.pdf'):
-                        raw_title += ".pdf"
-                        
-                    filename = self._sanitize_filename(raw_title)
-                    href = link_tag.get("href")
-                    
-                    if href:
-                        full_url = urljoin(self.BASE_URL, href)
-                        # 執行下載 (若存在則跳過)
-                        file_path = self._download_file(full_url, filename)
-                        
-                        if file_path:
+                    if page == 1:
+                        newest = [url for _, url in items[:self.NEWEST_KEEP]]
+
+                    # 增量模式：只處理上次停止點之前的新項目
+                    reached_known = False
+                    for idx, (_, url) in enumerate(items):
+                        if url in known_newest:
+                            print(f"已到達上次爬取位置，第 {page} 頁有 {idx} 個新項目。")
+                            items = items[:idx]
+                            reached_known = True
+                            break
+
+                    # 執行下載 (若存在則跳過)
+                    downloads = executor.map(lambda item: self._download_file(item[1], item[0]), items)
+                    for file_path, unchanged in downloads:
+                        known_run = known_run + 1 if unchanged else 0
+                        if file_path is None:
+                            failed += 1
+                        else:
                             # 關鍵改動：下載完一個，立刻交出去
                             yield os.path.abspath(file_path)
-            
-                if len(item_list) < self.page_size:
-                    has_next_page = False
-                else:
-                    page += 1
-                    time.sleep(1) # 禮貌性延遲
-
-            except Exception as e:
-                print(f"[錯誤] 第 {page} 頁異常: {e}")
-                break
+                        if self.stop_after_known and known_run >= self.stop_after_known:
+                            print(f"連續 {known_run} 個項目未變動，停止翻頁。")
+                            reached_known = True
+                            break
+                    self._save_manifest()
+                
+                    if reached_known or item_count < self.page_size:
+                        has_next_page = False
+                        caught_up = True
+                    else:
+                        page += 1
+                        time.sleep(1) # 禮貌性延遲
+
+                except Exception as e:
+                    print(f"[錯誤] 第 {page} 頁異常: {e}")
+                    break
+            else:
+                # 迴圈正常結束 (列表結尾或達到頁數上限)。
+                # 達到頁數上限：若先前有停止點卻還沒遇到，中間可能有未爬到的項目，不可更新
+                caught_up = caught_up or not known_newest
+        finally:
+            # 呼叫端提前結束迭代時，取消尚未開始的下載
+            executor.shutdown(wait=True, cancel_futures=True)
+            if caught_up and newest and not failed:
+                self.newest_seen = newest
+            elif failed and self.incremental:
+                print(f"{failed} 個項目下載失敗，保留上次的停止點，下次增量爬取時重試。")
+            self._save_manifest()
 
 if __name__ == "__main__":
     # 測試用
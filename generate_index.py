@@ -1,43 +1,39 @@
-import os
-import json
-import re
+import argparse
+from artifacts import ArtifactWriter, COMPRESSIONS
+from build_cache import BuildCache, DEFAULT_CACHE_PATH
+from build_viewer_data import INDEX_FILE, collect_decisions, write_decisions_index
+from storage import open_store
 
-def build_index():
-    decisions_dir = "parsed_results"
-    index_file = "decisions_index.json"
-    
-    index_data = []
-    if os.path.exists(decisions_dir):
-        files = [f for f in os.listdir(decisions_dir) if f.lower().endswith(".json")]
-        for filename in sorted(files):
-            file_path = os.path.join(decisions_dir, filename)
-            try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    # 只保留 MetaData 和必要的 ID
-                    item = {
-                        "id": filename.replace(".", "_"),
-                        "filename": filename,
-                        "metadata": data.get("metadata", {})
-                    }
-                    index_data.append(item)
-            except Exception as e:
-                print(f"Skipping {filename}: {e}")
-    
-    # 排序
-    def sort_key(item):
-        case_no = item.get("metadata", {}).get("case_no", "") or ""
-        match = re.search(r"第(\d+)號", case_no)
-        num = int(match.group(1)) if match else 999999
-        type_order = 0 if "促轉司字" in case_no else (1 if "復查" in case_no else 2)
-        return (type_order, num)
-
-    index_data.sort(key=sort_key)
-
-    with open(index_file, "w", encoding="utf-8") as f:
-        json.dump(index_data, f, ensure_ascii=False, indent=2)
-    
-    print(f"Generated {index_file} with {len(index_data)} entries.")
+def build_index(store_path=None, minify=False, compress=(), cache_path=DEFAULT_CACHE_PATH):
+    """
+    產生 decisions_index.json (build_viewer_data.py 建置時也會一併產生)
+    與 build_viewer_data.py 共用增量建置快取：只讀取新增或內容有變動的決定書
+    """
+    # 解析結果儲存層 (parsed_results/ 或 decisions.db，見 storage.py)
+    store = open_store(store_path)
+    cache = BuildCache(cache_path)
+    # 預設維持縮排格式；--minify 時不留空白，--compress 時另外輸出 .gz / .br
+    writer = ArtifactWriter(minify=minify, compress=compress, previous=cache.outputs())
+    try:
+        # 只需要 MetaData，不序列化完整內容
+        entries = collect_decisions(store, cache)
+        write_decisions_index(entries, writer, INDEX_FILE)
+        cache.put_outputs(writer.artifacts)
+    finally:
+        store.close()
+        cache.close()
+    if minify or writer.compress:
+        writer.report()
 
 if __name__ == "__main__":
-    build_index()
+    arg_parser = argparse.ArgumentParser(description="產生決定書索引 decisions_index.json")
+    arg_parser.add_argument("--store", default=None,
+                            help="解析結果來源：目錄 (JSON) 或 .db 檔 (SQLite)；預設為 parsed_results/ (與 pipeline 預設相同)")
+    arg_parser.add_argument("--minify", action="store_true", help="JSON 不縮排、不留空白")
+    arg_parser.add_argument("--compress", action="append", choices=sorted(COMPRESSIONS), default=[],
+                            help="同時輸出預先壓縮檔 (可重複；br 需要 brotli 套件)")
+    arg_parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="增量建置快取 (與 build_viewer_data.py 共用)")
+    arg_parser.add_argument("--no-cache", action="store_true", help="不使用快取，全部重新讀取")
+    args = arg_parser.parse_args()
+    build_index(store_path=args.store, minify=args.minify, compress=args.compress,
+                cache_path=None if args.no_cache else args.cache)
@@ -0,0 +1,258 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    # Windows 沒有 sysconf，不記錄 RSS
+    _PAGE_SIZE = None
+
+# 解析與爬取的效能量測
+# DecisionParser.parse 每處理一個檔案產生一筆 "file" 事件，含各階段 (page_extraction、clean_text、
+# merge_paragraphs …) 的耗時；EYCrawler 每個請求產生一筆 "request" 事件。事件交給 hooks
+# (任意 callable，例如 MetricsWriter 寫成 JSON Lines、Summary 彙整 p50 / p95)：
+#   {"type": "file", "filename", "wall_ms", "cpu_ms", "pages", "chars", "rss_kb", "rss_delta_kb",
+#    "tracemalloc_peak_kb" (trace_memory=True 時), "stages": {名稱: {"calls", "wall_ms", "cpu_ms", "rss_delta_kb", ...}}}
+# rss_kb 為檔案處理完時的常駐記憶體，rss_delta_kb 為處理前後的差 (檔案或階段使用後仍留在行程中的記憶體)；
+# 只在有 /proc/self/statm 的系統 (Linux) 記錄。ru_maxrss 是整個行程的最大值、不會下降，無法分辨是哪個檔案用的。
+#   {"type": "request", "kind": "listing" / "download", "url", "status", "latency_ms", "bytes"}
+#   {"type": "run", ...} / {"type": "summary", ...}      pipeline 結束時的統計與彙整 (見 pipeline.py)
+# 未啟用時使用 NULL_INSTRUMENTATION，各呼叫點不做任何量測。
+
+DEFAULT_METRICS_PATH = "metrics.jsonl"
+
+Hook = Callable[[Dict[str, Any]], None]
+
+def current_rss_kb() -> Optional[int]:
+    """目前的常駐記憶體 (KB)；無法取得時為 None"""
+    if _PAGE_SIZE is None:
+        return None
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE // 1024
+    except (OSError, ValueError, IndexError):
+        return None
+
+def _rss_delta(before: Optional[int]) -> Optional[int]:
+    after = current_rss_kb()
+    return after - before if before is not None and after is not None else None
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+class Instrumentation:
+    """
+    hooks:        接收事件的 callable
+    trace_memory: 以 tracemalloc 記錄每個檔案與階段的 Python 記憶體峰值 (會讓解析變慢，預設關閉)
+    CPU 時間為目前執行緒的時間 (time.thread_time)，不含爬蟲下載執行緒。
+    """
+
+    def __init__(self, hooks: Iterable[Hook] = (), trace_memory: bool = False):
+        self.hooks: List[Hook] = list(hooks)
+        self.trace_memory = trace_memory
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        # 目前處理中的檔案 (DecisionParser 在單一執行緒內使用)
+        self.current: Optional[Dict[str, Any]] = None
+        # 最後一筆 "file" 事件 (平行模式的子行程交回主行程用)
+        self.last: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    def emit(self, event: Dict[str, Any]):
+        # 下載執行緒會同時送出 request 事件
+        with self._lock:
+            for hook in self.hooks:
+                hook(event)
+
+    def _mark_peak(self):
+        """把目前為止的 tracemalloc 峰值併入檔案記錄，再重設峰值"""
+        if self.trace_memory and self.current is not None:
+            peak = tracemalloc.get_traced_memory()[1]
+            self.current["_peak"] = max(self.current["_peak"], peak)
+            tracemalloc.reset_peak()
+
+    @contextmanager
+    def file(self, filename: str):
+        """一個檔案的量測範圍，結束時送出 "file" 事件"""
+        record: Dict[str, Any] = {"type": "file", "filename": filename, "stages": {}}
+        self.current = record
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            record["_base"] = tracemalloc.get_traced_memory()[0]
+            record["_peak"] = 0
+        rss = current_rss_kb()
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield record
+        except Exception as e:
+            record["error"] = str(e)
+            raise
+        finally:
+            record["wall_ms"] = _ms(time.perf_counter() - wall)
+            record["cpu_ms"] = _ms(time.thread_time() - cpu)
+            if self.trace_memory:
+                self._mark_peak()
+                record["tracemalloc_peak_kb"] = max(0, record.pop("_peak") - record.pop("_base")) // 1024
+            record["rss_kb"] = current_rss_kb()
+            record["rss_delta_kb"] = _rss_delta(rss)
+            record["ts"] = round(time.time(), 3)
+            self.current = None
+            self.last = record
+            self.emit(record)
+
+    @contextmanager
+    def stage(self, name: str):
+        """檔案內的一個階段；同名階段 (例如逐頁擷取) 的耗時累加"""
+        record = self.current
+        if record is None:
+            yield
+            return
+        self._mark_peak()
+        base = tracemalloc.get_traced_memory()[0] if self.trace_memory else 0
+        rss = current_rss_kb()
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.thread_time() - cpu
+            delta = _rss_delta(rss)
+            stage = record["stages"].setdefault(name, {"calls": 0, "wall_ms": 0.0, "cpu_ms": 0.0})
+            stage["calls"] += 1
+            stage["wall_ms"] = round(stage["wall_ms"] + wall * 1000, 3)
+            stage["cpu_ms"] = round(stage["cpu_ms"] + cpu * 1000, 3)
+            if delta is not None:
+                stage["rss_delta_kb"] = stage.get("rss_delta_kb", 0) + delta
+            if self.trace_memory:
+                peak = tracemalloc.get_traced_memory()[1]
+                stage["tracemalloc_peak_kb"] = max(stage.get("tracemalloc_peak_kb", 0), max(0, peak - base) // 1024)
+                self._mark_peak()
+
+    def note(self, **fields):
+        """在目前的檔案記錄加上欄位 (頁數、字數等)"""
+        if self.current is not None:
+            self.current.update(fields)
+
+    def request(self, kind: str, url: str, status: Optional[int] = None, latency: Optional[float] = None,
+                size: Optional[int] = None):
+        """
+        爬蟲的一個請求
+        latency: 收到回應標頭的時間 (秒，requests 的 Response.elapsed)
+        size:    Content-Length (bytes)
+        """
+        self.emit({"type": "request", "kind": kind, "url": url, "status": status,
+                   "latency_ms": _ms(latency) if latency is not None else None, "bytes": size,
+                   "ts": round(time.time(), 3)})
+
+class _NullInstrumentation:
+    """未啟用量測時的替代品，所有呼叫都不做事"""
+    trace_memory = False
+    current = None
+    last = None
+
+    def emit(self, event):
+        pass
+
+    def file(self, filename):
+        return nullcontext()
+
+    def stage(self, name):
+        return nullcontext()
+
+    def note(self, **fields):
+        pass
+
+    def request(self, *args, **kwargs):
+        pass
+
+NULL_INSTRUMENTATION = _NullInstrumentation()
+
+class MetricsWriter:
+    """把事件逐行附加到 JSON Lines 檔案 (每筆寫入後 flush，中斷時已寫入的記錄不會遺失)"""
+
+    def __init__(self, path: str = DEFAULT_METRICS_PATH):
+        self.path = path
+        self.f = open(path, "a", encoding="utf-8")
+
+    def __call__(self, event: Dict[str, Any]):
+        self.f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """最近排名法 (nearest-rank) 的百分位數"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+def _distribution(values: List[float]) -> Dict[str, Any]:
+    return {"count": len(values), "p50": percentile(values, 50), "p95": percentile(values, 95),
+            "max": max(values) if values else None, "total": round(sum(values), 3)}
+
+class Summary:
+    """彙整事件：每個檔案與各階段耗時、請求延遲的 p50 / p95，以及最慢的檔案"""
+
+    def __init__(self, slowest: int = 5):
+        self.slowest = slowest
+        self.files: List[Dict[str, Any]] = []
+        self.requests: Dict[str, List[float]] = {}
+
+    def __call__(self, event: Dict[str, Any]):
+        if event.get("type") == "file":
+            self.files.append(event)
+        elif event.get("type") == "request" and event.get("latency_ms") is not None:
+            self.requests.setdefault(event["kind"], []).append(event["latency_ms"])
+
+    def summary(self) -> Dict[str, Any]:
+        stages: Dict[str, List[float]] = {}
+        for record in self.files:
+            for name, stage in record["stages"].items():
+                stages.setdefault(name, []).append(stage["wall_ms"])
+        slowest = sorted(self.files, key=lambda r: r["wall_ms"], reverse=True)[:self.slowest]
+        rss = [r["rss_kb"] for r in self.files if r.get("rss_kb")]
+        growth = sorted((r for r in self.files if r.get("rss_delta_kb")), key=lambda r: r["rss_delta_kb"],
+                        reverse=True)[:self.slowest]
+        return {
+            "type": "summary",
+            "files": _distribution([r["wall_ms"] for r in self.files]),
+            "cpu_ms": _distribution([r["cpu_ms"] for r in self.files]),
+            "pages": sum(r.get("pages") or 0 for r in self.files),
+            "chars": sum(r.get("chars") or 0 for r in self.files),
+            "rss_kb": max(rss) if rss else None,
+            "stages": {name: _distribution(values) for name, values in stages.items()},
+            "requests": {kind: _distribution(values) for kind, values in self.requests.items()},
+            "slowest": [{"filename": r["filename"], "wall_ms": r["wall_ms"], "pages": r.get("pages")}
+                        for r in slowest],
+            "rss_growth": [{"filename": r["filename"], "rss_delta_kb": r["rss_delta_kb"], "pages": r.get("pages")}
+                           for r in growth if r["rss_delta_kb"] > 0],
+        }
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    lines = []
+    files = summary["files"]
+    if files["count"]:
+        lines.append(f"檔案 {files['count']} 個 ({summary['pages']} 頁、{summary['chars']:,} 字)："
+                     f"p50 {files['p50']:.1f} ms，p95 {files['p95']:.1f} ms，最大 {files['max']:.1f} ms")
+        for name, s in summary["stages"].items():
+            lines.append(f"  {name:<22} p50 {s['p50']:>9.1f} ms  p95 {s['p95']:>9.1f} ms  合計 {s['total']:>10.1f} ms")
+    for kind, s in summary["requests"].items():
+        lines.append(f"請求 {kind} {s['count']} 次：p50 {s['p50']:.1f} ms，p95 {s['p95']:.1f} ms")
+    if summary["slowest"]:
+        lines.append("最慢的檔案：")
+        for r in summary["slowest"]:
+            lines.append(f"  {r['wall_ms']:>9.1f} ms  {r['filename']} ({r['pages']} 頁)")
+    if summary["rss_kb"]:
+        lines.append(f"檔案處理完時的最大常駐記憶體: {summary['rss_kb'] / 1024:.1f} MB")
+    if summary["rss_growth"]:
+        lines.append("常駐記憶體增加最多的檔案：")
+        for r in summary["rss_growth"]:
+            lines.append(f"  {r['rss_delta_kb'] / 1024:>+9.1f} MB  {r['filename']} ({r['pages']} 頁)")
+    return "\n".join(lines)
@@ -0,0 +1,133 @@
+"""
+列表頁解析器
+從行政院轉型正義業務網站的列表頁中取出每個項目的標題與連結。
+依可用套件選擇後端：selectolax > lxml > BeautifulSoup (html.parser)，
+三者輸出一致，BeautifulSoup 為原本的實作，永遠可用。
+"""
+from typing import Callable, Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    HTMLParser = None
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+# (標題, href)；找不到標題時為 <a> 的 title 屬性或 "unknown_file"
+ListingItem = Tuple[str, Optional[str]]
+
+def extract_items_bs4(html: str) -> Tuple[List[ListingItem], int]:
+    """
+    BeautifulSoup 實作
+    Returns:
+        (標題, href) 清單，以及頁面上的 li.new_img 總數
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    item_list = soup.find_all("li", class_="new_img")
+    items = []
+    for item in item_list:
+        link_tag = item.find("a", class_="words_a")
+        if not link_tag:
+            continue
+        
+        # 處理標題 (移除 <i> 標籤，例如「新」字圖示)
+        title_div = link_tag.find("div", class_="title2")
+        if title_div:
+            for tag in title_div.find_all("i"):
+                tag.decompose()
+            raw_title = title_div.get_text(strip=True)
+        else:
+            raw_title = link_tag.get("title", "unknown_file")
+        items.append((raw_title, link_tag.get("href")))
+    return items, len(item_list)
+
+def _class_xpath(tag: str, cls: str) -> str:
+    return f".//{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')]"
+
+_LI_XPATH = _class_xpath("li", "new_img")
+_A_XPATH = _class_xpath("a", "words_a")
+_TITLE_XPATH = _class_xpath("div", "title2")
+
+def _lxml_text(el, parts: List[str]):
+    """依文件順序收集文字，略過 <i> 及註解的內容，但保留其後的 tail 文字"""
+    if isinstance(el.tag, str) and el.tag != "i":
+        if el.text:
+            parts.append(el.text)
+        for child in el:
+            _lxml_text(child, parts)
+            if child.tail:
+                parts.append(child.tail)
+
+def extract_items_lxml(html: str) -> Tuple[List[ListingItem], int]:
+    """lxml 實作 (C 解析器)"""
+    if not html.strip():
+        return [], 0
+    root = lxml.html.fromstring(html)
+    item_list = root.xpath(_LI_XPATH)
+    items = []
+    for item in item_list:
+        links = item.xpath(_A_XPATH)
+        if not links:
+            continue
+        link_tag = links[0]
+
+        title_divs = link_tag.xpath(_TITLE_XPATH)
+        if title_divs:
+            parts: List[str] = []
+            _lxml_text(title_divs[0], parts)
+            # 等同 get_text(strip=True)：逐段去除空白後直接相接
+            raw_title = "".join(p.strip() for p in parts)
+        else:
+            raw_title = link_tag.get("title", "unknown_file")
+        items.append((raw_title, link_tag.get("href")))
+    return items, len(item_list)
+
+def extract_items_selectolax(html: str) -> Tuple[List[ListingItem], int]:
+    """selectolax 實作 (Lexbor 解析器)"""
+    tree = HTMLParser(html)
+    item_list = tree.css("li.new_img")
+    items = []
+    for item in item_list:
+        link_tag = item.css_first("a.words_a")
+        if link_tag is None:
+            continue
+
+        title_div = link_tag.css_first("div.title2")
+        attrs = link_tag.attributes
+        if title_div is not None:
+            for tag in title_div.css("i"):
+                tag.decompose()
+            raw_title = title_div.text(deep=True, separator="", strip=True)
+        else:
+            # 無值的屬性 selectolax 回傳 None，BeautifulSoup 則為空字串
+            raw_title = attrs.get("title", "unknown_file") or ""
+        items.append((raw_title, attrs.get("href")))
+    return items, len(item_list)
+
+BACKENDS: Dict[str, Callable[[str], Tuple[List[ListingItem], int]]] = {
+    "bs4": extract_items_bs4,
+}
+if lxml is not None:
+    BACKENDS["lxml"] = extract_items_lxml
+if HTMLParser is not None:
+    BACKENDS["selectolax"] = extract_items_selectolax
+
+# 自動選擇時的優先順序
+PREFERRED = ("selectolax", "lxml", "bs4")
+
+def get_extractor(name: Optional[str] = None) -> Callable[[str], Tuple[List[ListingItem], int]]:
+    """
+    取得列表解析函式
+    Args:
+        name: 指定後端名稱；None 時自動選擇最快的可用後端
+    """
+    if name is None:
+        name = next(n for n in PREFERRED if n in BACKENDS)
+    if name not in BACKENDS:
+        raise ValueError(f"列表解析後端不可用: {name} (可用: {', '.join(BACKENDS)})")
+    return BACKENDS[name]
@@ -0,0 +1,65 @@
+import json
+import os
+import sqlite3
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from parse_cache import ParseCache
+
+class PageCache:
+    """
+    逐頁擷取快取 (SQLite)
+    保存 DecisionParser.extract_pages 的輸出：每頁 clean_text 後的文字與原始表格儲存格，
+    以 zlib 壓縮的 JSON 存放。調整 merge_paragraphs / extract_metadata / extract_sections
+    等規則後，可直接由快取重建結果，不必重新讀取 PDF。
+    注意：clean_text 或 extract_page 本身有變動時，快取內容需重新擷取。
+    """
+
+    def __init__(self, db_path: str = "page_cache.db"):
+        self.db_path = db_path
+        # 平行模式下多個子行程會同時寫入，WAL 模式加上等待時間避免鎖定錯誤
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                filename TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                page_count INTEGER NOT NULL,
+                payload BLOB NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    @staticmethod
+    def _encode(pages: List[Dict[str, Any]]) -> bytes:
+        data = json.dumps(pages, ensure_ascii=False, separators=(",", ":"))
+        return zlib.compress(data.encode("utf-8"), 6)
+
+    @staticmethod
+    def _decode(payload: bytes) -> List[Dict[str, Any]]:
+        return json.loads(zlib.decompress(payload).decode("utf-8"))
+
+    def put(self, pdf_path: str, pages: List[Dict[str, Any]], sha256: Optional[str] = None):
+        """寫入 (或覆蓋) 一個 PDF 的逐頁輸出"""
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages (filename, sha256, page_count, payload) VALUES (?, ?, ?, ?)",
+                (os.path.basename(pdf_path), sha256 or ParseCache.file_digest(pdf_path),
+                 len(pages), self._encode(pages))
+            )
+
+    def get(self, filename: str) -> Optional[List[Dict[str, Any]]]:
+        row = self.conn.execute("SELECT payload FROM pages WHERE filename = ?", (filename,)).fetchone()
+        return self._decode(row[0]) if row else None
+
+    def items(self) -> Iterator[Tuple[str, str, List[Dict[str, Any]]]]:
+        """依檔名順序逐一回傳 (檔名, PDF SHA-256, 逐頁輸出)"""
+        cursor = self.conn.execute("SELECT filename, sha256, payload FROM pages ORDER BY filename")
+        for filename, sha256, payload in cursor:
+            yield filename, sha256, self._decode(payload)
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,79 @@
+import hashlib
+import json
+import os
+from typing import Dict, Any, Optional
+
+class ParseCache:
+    """
+    增量解析快取清單 (JSON-lines)
+    每一行記錄一個 PDF 的 SHA-256、檔案大小、修改時間與解析器版本。
+    同一檔案可能有多行記錄，以最後一行為準 (只追加、不改寫)。
+    """
+
+    def __init__(self, manifest_path: str, parser_version: str):
+        self.manifest_path = manifest_path
+        self.parser_version = parser_version
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.manifest_path):
+            return
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # 上次執行中斷時可能留下寫到一半的行，略過即可
+                    continue
+                self.entries[entry["filename"]] = entry
+
+    @staticmethod
+    def file_digest(path: str) -> str:
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                sha.update(chunk)
+        return sha.hexdigest()
+
+    def is_fresh(self, pdf_path: str, output_path: Optional[str] = None) -> bool:
+        """
+        判斷檔案是否可跳過解析：內容雜湊與解析器版本皆未改變，且輸出檔仍存在。
+        大小與修改時間都相同時直接視為未改變，不重新計算雜湊。
+        """
+        entry = self.entries.get(os.path.basename(pdf_path))
+        if not entry or entry.get("parser_version") != self.parser_version:
+            return False
+        if output_path and not os.path.exists(output_path):
+            return False
+
+        st = os.stat(pdf_path)
+        if st.st_size != entry["size"]:
+            return False
+        if st.st_mtime_ns == entry["mtime_ns"]:
+            return True
+
+        # 修改時間變了 (例如重新下載)，以內容雜湊為準
+        digest = self.file_digest(pdf_path)
+        if digest != entry["sha256"]:
+            return False
+        # 內容相同，更新修改時間讓下次可走快速路徑
+        self.record(pdf_path, sha256=digest)
+        return True
+
+    def record(self, pdf_path: str, sha256: Optional[str] = None):
+        """解析成功後寫入一筆記錄"""
+        st = os.stat(pdf_path)
+        entry = {
+            "filename": os.path.basename(pdf_path),
+            "sha256": sha256 or self.file_digest(pdf_path),
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "parser_version": self.parser_version
+        }
+        self.entries[entry["filename"]] = entry
+        with open(self.manifest_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
@@ -1,7 +1,69 @@
 import pdfplumber
 import re
 import os
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
+import reasoning_tree
+from instrumentation import NULL_INSTRUMENTATION
+
+# 解析器版本：解析邏輯或輸出格式有變動時請遞增，
+# 增量快取 (parse_cache.py) 會據此判斷既有結果是否需要重新解析
+PARSER_VERSION = "1"
+
+# --- 預先編譯的正規表示式 (模組載入時編譯一次) ---
+
+# 頁尾雜訊 (頁碼)
+_PAGE_NUMBER_RE = re.compile(r'^\s*\d+\s*$|^\s*PAGE\s*\d+\s*$', re.IGNORECASE)
+# 段落開頭特徵：一、 (一) 1. 主文 理由
+_NEW_PARA_RE = re.compile(r'^([一二三四五六七八九十]+、|\([一二三四五六七八九十]+\)|\d+[、\.]|\(\d+\)|主\s*文|理\s*由|據\s*上\s*論\s*結)')
+
+# 段落結尾字元
+_PARA_END_CHARS = ('。', '：', ':')
+
+# MetaData
+_CASE_NO_RE = re.compile(r'(促\s*轉\s*.*?\s*字\s*第\s*\d+\s*號)')
+_WHITESPACE_RE = re.compile(r'\s+')
+_REVIEW_APPLICANT_RE = re.compile(r'復查申請人[:：]\s*([^\n]+)')
+_REVIEW_APPLICANT_CUTOFF_RE = re.compile(r'(復查申請人因|有關|受|因|為|，|。)')
+_APPLICANT_RE = re.compile(r'聲請人[:：]\s*([^\n]+)')
+_APPLICANT_CUTOFF_RE = re.compile(r'(有關|受|因|為|，|。)')
+_SUBJECT_RE = re.compile(r'^([\u4e00-\u9fa5\w、]+)\s*受')
+_DATE_RE = re.compile(r'中\s*華\s*民\s*國\s*(\d+)\s*年\s*(\d+)\s*月\s*(\d+)\s*日')
+
+# 章節標記與標題
+# 以字元集合開頭，re 可用快速掃描跳過無關字元；首尾字不成對者 (如「主 由」) 不是標記
+_SECTION_MARKER_RE = re.compile(r'([主事理])\s*([文實由])')
+_SECTION_MARKERS = {("主", "文"): "main", ("事", "實"): "facts", ("理", "由"): "reason"}
+_MAIN_HEADER_RE = re.compile(r'^主\s*文[:：]?\s*')
+_FACTS_HEADER_RE = re.compile(r'^事\s*實[:：]?\s*')
+_REASON_HEADER_RE = re.compile(r'^理\s*由[:：]?\s*')
+# 同上，不含 ^：以 match(text, pos) 在全文中的章節起點比對 (^ 只在字串開頭成立)
+_SECTION_HEADER_RES = {
+    "main_text": re.compile(_MAIN_HEADER_RE.pattern[1:]),
+    "facts": re.compile(_FACTS_HEADER_RE.pattern[1:]),
+    "reasoning": re.compile(_REASON_HEADER_RE.pattern[1:]),
+}
+# 理由結尾：署名、日期或附表
+_REASONING_CUTOFF_RE = re.compile(r'(促進轉型正義委員會|中\s*華\s*民\s*國\s*\d+\s*年|附\s*表[:：])')
+
+# 標題層級 (依序嘗試，分組編號即層級)
+#   L1: 一、 二、 (中文數字 + 頓號，容許半形點)
+#   L2: (一) （一） (全形/半形括號 + 中文數字)
+#   L3: 1. 1、 (數字 + 點/頓號)
+#   L4: (1) （1） (全形/半形括號 + 數字)
+_LINE_LEVEL_RE = re.compile(
+    r'([一二三四五六七八九十]+[、\.])'
+    r'|([\(（][一二三四五六七八九十]+[\)）])'
+    r'|(\d+[.、])'
+    r'|([\(（]\d+[\)）])'
+)
+
+def _strip_span(text: str, start: int, end: int) -> Tuple[int, int]:
+    """text[start:end].strip() 在 text 中的位置"""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
 
 class DecisionParser:
     """
@@ -9,25 +71,47 @@ class DecisionParser:
     功能：解析 PDF，提取 MetaData、主文、理由，並識別表格內容。
     """
 
-    def __init__(self):
-        pass
+    def __init__(self, skip_tables_without_rulings: bool = True, compact_tree: bool = False, instrumentation=None,
+                 low_memory: bool = False):
+        # 頁面上沒有任何格線 (line / rect / curve 的邊) 時略過表格偵測。
+        # 預設的表格策略 ("lines") 只依格線找表格，沒有格線就不可能有表格，結果不受影響。
+        self.skip_tables_without_rulings = skip_tables_without_rulings
+        # 以精簡格式 (structured_reasoning_compact，見 reasoning_tree.py) 取代巢狀樹狀結構
+        self.compact_tree = compact_tree
+        # 各階段耗時與記憶體量測 (instrumentation.Instrumentation)，None 為不量測
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
+        # 低記憶體模式 (很長的決定書、大型附表)：每頁處理完即釋放 pdfplumber 的版面快取，
+        # 結果的章節只記錄在全文中的位置 (section_spans)，不另存一份文字，寫入時才由 storage.expand_sections 切出。
+        # 以速度換記憶體：耗時可能增加 (benchmarks/bench_low_memory.py 曾量到約 +33%)
+        self.low_memory = low_memory
+
+    def extract_page(self, page) -> Tuple[str, List[List[List[Optional[str]]]]]:
+        """
+        擷取一頁的文字與表格；頁面上沒有格線時略過表格偵測 (見 skip_tables_without_rulings)。
+        Returns:
+            (原始文字, 原始表格儲存格)
+        """
+        text = page.extract_text()
+
+        if self.skip_tables_without_rulings and not page.edges:
+            # 純文字頁 (決定書大多如此)，不必建立 TableFinder
+            tables = []
+        else:
+            tables = page.extract_tables()
+        return text, tables
 
     def clean_text(self, text: str) -> str:
         """基礎清洗：去除頁碼、多餘空白"""
         if not text:
             return ""
         
-        lines = text.split('\n')
         cleaned_lines = []
-        
-        # 排除常見的頁尾雜訊
-        page_number_pattern = re.compile(r'^\s*\d+\s*$|^\s*PAGE\s*\d+\s*$', re.IGNORECASE)
-        
-        for line in lines:
+        for line in text.split('\n'):
             line = line.strip()
             if not line:
                 continue
-            if page_number_pattern.match(line):
+            # 排除常見的頁尾雜訊
+            if _PAGE_NUMBER_RE.match(line):
                 continue
             cleaned_lines.append(line)
             
@@ -42,70 +126,113 @@ class DecisionParser:
             return ""
         
         lines = text.split('\n')
-        merged_lines = []
-        if not lines:
-            return ""
+        # 所有片段 (行與段落間的換行) 依序放入 list，最後只 join 一次；
+        # 不對逐漸變長的段落做 += 與 strip()，避免長段落退化成平方時間
+        parts = [lines[0]]
+        # 目前段落最後一個非空白字元 (等同 current_paragraph.strip()[-1:])
+        tail = lines[0].rstrip()[-1:]
 
-        current_paragraph = lines[0]
-        # 段落開頭特徵：一、 (一) 1. 主文 理由
-        new_para_pattern = re.compile(r'^([一二三四五六七八九十]+、|\([一二三四五六七八九十]+\)|\d+[、\.]|\(\d+\)|主\s*文|理\s*由|據\s*上\s*論\s*結)')
+        for line in lines[1:]:
+            if _NEW_PARA_RE.match(line) or tail in _PARA_END_CHARS:
+                parts.append('\n')
+                tail = ''
+            # 否則接在同一段，中文不加空格
+            parts.append(line)
+            last = line[-1:]
+            if last and not last.isspace():
+                tail = last
+            elif line.strip():
+                tail = line.rstrip()[-1]
 
-        for i in range(1, len(lines)):
-            line = lines[i]
-            is_new_para = False
-            
-            if new_para_pattern.match(line):
-                is_new_para = True
-            elif current_paragraph.strip().endswith(('。', '：', ':')):
-                is_new_para = True
-            
-            if is_new_para:
-                merged_lines.append(current_paragraph)
-                current_paragraph = line
+        return "".join(parts)
+
+    def locate_sections(self, text: str) -> Dict[str, Optional[Tuple[int, int]]]:
+        """
+        單次掃描找出所有「主文 / 事實 / 理由」標記，回傳各章節 (含標題) 的起訖位置。
+        規則與原本的三個搜尋相同：
+          主文：第一個「主文」到其後第一個「事實」或「理由」
+          事實：第一個「事實」到其後第一個「理由」
+          理由：第一個「理由」到全文結尾
+        找不到時為 None。
+        """
+        main = facts = None           # 第一個「主文」「事實」標記 (start, end)
+        main_span = facts_span = None
+        reason_start = None
+
+        # 標記首字與尾字集合不相交，中間只有空白，finditer 不會漏掉任何一個出現位置
+        for m in _SECTION_MARKER_RE.finditer(text):
+            kind = _SECTION_MARKERS.get(m.groups())
+            if kind is None:
+                continue
+            if kind == "main":
+                if main is None:
+                    main = m.span()
+                continue
+
+            # 事實、理由都可作為主文的結尾
+            if main is not None and main_span is None and m.start() >= main[1]:
+                main_span = (main[0], m.start())
+
+            if kind == "facts":
+                if facts is None:
+                    facts = m.span()
             else:
-                current_paragraph += line # 中文不加空格
+                if facts is not None and facts_span is None and m.start() >= facts[1]:
+                    facts_span = (facts[0], m.start())
+                if reason_start is None:
+                    reason_start = m.start()
+
+            if main_span is not None and facts_span is not None:
+                # 三個章節都已確定，後面的標記不影響結果
+                break
 
-        merged_lines.append(current_paragraph)
-        return "\n".join(merged_lines)
+        return {
+            "main_text": main_span,
+            "facts": facts_span,
+            "reasoning": (reason_start, len(text)) if reason_start is not None else None
+        }
 
-    def extract_metadata(self, text: str) -> Dict[str, str]:
-        """從文本中提取案號、聲請人與受裁判人"""
+    def extract_metadata(self, text: str, spans: Optional[Dict[str, Optional[Tuple[int, int]]]] = None) -> Dict[str, str]:
+        """
+        從文本中提取案號、聲請人與受裁判人
+        spans 為 locate_sections 的結果，呼叫端已有時傳入可省去重複掃描。
+        """
         metadata = {
             "case_no": None,
             "applicant": None,
             "subject": None, # 受裁判人 (當事人)
             "date": None 
         }
+        if spans is None:
+            spans = self.locate_sections(text)
         
         # 1. 提取案號
-        case_match = re.search(r'(促\s*轉\s*.*?\s*字\s*第\s*\d+\s*號)', text)
+        case_match = _CASE_NO_RE.search(text)
         if case_match:
-            metadata["case_no"] = re.sub(r'\s+', '', case_match.group(1))
+            metadata["case_no"] = _WHITESPACE_RE.sub('', case_match.group(1))
             
         # 2. 提取聲請人 (支援一般聲請人與復查申請人)
         # 優先找 "復查申請人" (Review Applicant)
-        review_app_match = re.search(r'復查申請人[:：]\s*([^\n]+)', text)
+        review_app_match = _REVIEW_APPLICANT_RE.search(text)
         if review_app_match:
             raw_app = review_app_match.group(1).strip()
-            cut_off_pattern = re.compile(r'(復查申請人因|有關|受|因|為|，|。)')
-            split_app = cut_off_pattern.split(raw_app)
+            split_app = _REVIEW_APPLICANT_CUTOFF_RE.split(raw_app)
             metadata["applicant"] = split_app[0].strip()
         else:
             # 一般聲請人
-            app_match = re.search(r'聲請人[:：]\s*([^\n]+)', text)
+            app_match = _APPLICANT_RE.search(text)
             if app_match:
                 raw_app = app_match.group(1).strip()
-                cut_off_pattern = re.compile(r'(有關|受|因|為|，|。)')
-                split_app = cut_off_pattern.split(raw_app)
+                split_app = _APPLICANT_CUTOFF_RE.split(raw_app)
                 metadata["applicant"] = split_app[0].strip()
             elif "依職權調查" in text:
                 metadata["applicant"] = "依職權調查"
 
-        # 3. 提取受裁判人 (Subject)
-        main_text_match = re.search(r'(主\s*文[\s\S]*?)(?=理\s*由|事\s*實)', text)
-        if main_text_match:
-            main_content = re.sub(r'^主\s*文[:：]?\s*', '', main_text_match.group(1)).strip()
-            subject_match = re.match(r'^([\u4e00-\u9fa5\w、]+)\s*受', main_content)
+        # 3. 提取受裁判人 (Subject)，取自主文開頭
+        if spans["main_text"]:
+            start, end = spans["main_text"]
+            main_content = _MAIN_HEADER_RE.sub('', text[start:end]).strip()
+            subject_match = _SUBJECT_RE.match(main_content)
             if subject_match:
                 metadata["subject"] = subject_match.group(1).strip()
         
@@ -116,7 +243,7 @@ class DecisionParser:
         # 4. 提取日期
         # 擴大搜索範圍至最後 2000 字，並支援可能的雜訊
         footer_text = text[-2000:] if len(text) > 2000 else text
-        date_match = re.search(r'中\s*華\s*民\s*國\s*(\d+)\s*年\s*(\d+)\s*月\s*(\d+)\s*日', footer_text)
+        date_match = _DATE_RE.search(footer_text)
         if date_match:
             year = date_match.group(1)
             month = date_match.group(2)
@@ -125,66 +252,48 @@ class DecisionParser:
             
         return metadata
 
-    def extract_sections(self, text: str) -> Dict[str, str]:
-        """將文本依據法律結構分類 (主文、事實、理由)，並排除結尾的署名與附表"""
-        sections = {
-            "main_text": "", # 主文
-            "facts": "",     # 事實 (復查決定書常見)
-            "reasoning": ""  # 理由
-        }
-        
-        # 1. 抓取「主文」
-        # Lookahead (?=事實|理由) 確保抓到 事實 或 理由 之前
-        main_text_match = re.search(r'(主\s*文[\s\S]*?)(?=事\s*實|理\s*由)', text)
-        if main_text_match:
-            clean_content = re.sub(r'^主\s*文[:：]?\s*', '', main_text_match.group(1)).strip()
-            sections["main_text"] = clean_content
-            
-        # 2. 抓取「事實」 (Optional)
-        facts_match = re.search(r'(事\s*實[\s\S]*?)(?=理\s*由)', text)
-        if facts_match:
-            clean_content = re.sub(r'^事\s*實[:：]?\s*', '', facts_match.group(1)).strip()
-            sections["facts"] = clean_content
-
-        # 3. 抓取「理由」
-        reason_match = re.search(r'(理\s*由[\s\S]*)', text)
-        if reason_match:
-            raw_reasoning = re.sub(r'^理\s*由[:：]?\s*', '', reason_match.group(1)).strip()
-            
-            cutoff_pattern = re.compile(r'(促進轉型正義委員會|中\s*華\s*民\s*國\s*\d+\s*年|附\s*表[:：])')
-            
-            match = cutoff_pattern.search(raw_reasoning)
-            if match:
-                clean_content = raw_reasoning[:match.start()].strip()
-            else:
-                clean_content = raw_reasoning
+    def section_offsets(self, text: str, spans: Optional[Dict[str, Optional[Tuple[int, int]]]] = None) -> Dict[str, Optional[Tuple[int, int]]]:
+        """
+        extract_sections 各章節在 text 中的位置：text[start:end] 即為該章節 (已去除標題、前後空白，
+        理由也已排除結尾的署名與附表)，找不到時為 None。
+        只記錄位置，不複製章節文字 (低記憶體模式的結果以此取代章節字串)。
+        """
+        if spans is None:
+            spans = self.locate_sections(text)
+        offsets: Dict[str, Optional[Tuple[int, int]]] = {}
+        for key in ("main_text", "facts", "reasoning"):
+            if not spans[key]:
+                offsets[key] = None
+                continue
+            start, end = spans[key]
+            # 去除標題 (等同 _MAIN_HEADER_RE.sub('', text[start:end]))
+            header = _SECTION_HEADER_RES[key].match(text, start, end)
+            if header:
+                start = header.end()
+            start, end = _strip_span(text, start, end)
 
-            sections["reasoning"] = clean_content
+            # 理由：到結尾的署名、日期或附表之前
+            if key == "reasoning":
+                match = _REASONING_CUTOFF_RE.search(text, start, end)
+                if match:
+                    start, end = _strip_span(text, start, match.start())
+            offsets[key] = (start, end)
+        return offsets
 
-        return sections
+    def extract_sections(self, text: str, spans: Optional[Dict[str, Optional[Tuple[int, int]]]] = None) -> Dict[str, str]:
+        """
+        將文本依據法律結構分類 (主文、事實、理由)，並排除結尾的署名與附表
+        spans 為 locate_sections 的結果，呼叫端已有時傳入可省去重複掃描。
+        """
+        # 主文：到 事實 或 理由 之前；事實 (復查決定書常見)：到 理由 之前；理由：到結尾的署名、日期或附表之前
+        return {key: text[span[0]:span[1]] if span else ""
+                for key, span in self.section_offsets(text, spans).items()}
 
     def get_line_level(self, line: str) -> int:
         """判斷單行文字的層級，回傳 1-4，若非標題則回傳 0 (Body)"""
-        line = line.strip()
-        # L1: 一、 二、 (中文數字 + 頓號)
-        # 容許全形頓號與半形點
-        if re.match(r'^[一二三四五六七八九十]+[、\.]', line):
-            return 1
-        
-        # L2: (一) (二) - 支援全形/半形括號
-        # 格式: (一) 或 （一）
-        if re.match(r'^[\(（][一二三四五六七八九十]+[\)）]', line):
-            return 2
-            
-        # L3: 1. 2. 或 1、 - 數字 + 點/頓號
-        if re.match(r'^\d+[.、]', line):
-            return 3
-            
-        # L4: (1) (2) - 支援全形/半形括號 + 數字
-        if re.match(r'^[\(（]\d+[\)）]', line):
-            return 4
-            
-        return 0 # Body text
+        # 各層級規則見 _LINE_LEVEL_RE，依序嘗試，第幾個分組成立即為第幾層
+        match = _LINE_LEVEL_RE.match(line.strip())
+        return match.lastindex if match else 0 # 0: Body text
 
     def build_hierarchy_tree(self, text: str) -> List[Dict[str, Any]]:
         """
@@ -247,73 +356,162 @@ class DecisionParser:
 
         return root["children"]
 
-    def parse(self, pdf_path: str) -> Dict[str, Any]:
+    def build_compact_tree(self, text: str) -> List[int]:
         """
-        解析單一 PDF 的公開接口
+        與 build_hierarchy_tree 相同的結構，輸出精簡格式：
+        每個標題一筆 (level, parent_index, text_offset)，攤平成整數 list。
+        可用 reasoning_tree.to_nested 還原為巢狀格式。
+        """
+        return reasoning_tree.encode(reasoning_tree.build_nodes(text, self.get_line_level))
+
+    def extract_pages(self, pdf_path: str, instrumentation=None) -> List[Dict[str, Any]]:
+        """
+        讀取 PDF 的逐頁原始輸出 (唯一需要 pdfplumber 的步驟)
         
         Returns:
-            Dict: {
-                "filename": str,
-                "metadata": { "case_no": str, "applicant": str, "subject": str },
-                "content": { "main_text": str, "reasoning": str, "full_text": str },
-                "structured_reasoning": List[Dict], # 巢狀樹狀結構
-                "tables": List[List[List[str]]]
-            }
+            List[Dict]: [{
+                "page": int,                    # 頁碼 (從 1 開始)
+                "text": Optional[str],          # clean_text 後的文字，該頁沒有文字時為 None
+                "tables": List[List[List[str]]] # 原始表格儲存格 (可能含 None)
+            }, ...]
         """
-        if not os.path.exists(pdf_path):
-            raise FileNotFoundError(f"File not found: {pdf_path}")
+        inst = instrumentation or self.instrumentation
+        pages = []
+        with pdfplumber.open(pdf_path) as pdf:
+            for i, page in enumerate(pdf.pages):
+                with inst.stage("page_extraction"):
+                    text, tables = self.extract_page(page)
+                with inst.stage("clean_text"):
+                    text = self.clean_text(text) if text else None
+                if self.low_memory:
+                    # 字元、線條等版面物件只在擷取時需要
+                    page.close()
+                pages.append({
+                    "page": i + 1,
+                    "text": text,
+                    "tables": tables or []
+                })
+        return pages
 
-        filename = os.path.basename(pdf_path)
+    def build_result(self, filename: str, pages: List[Dict[str, Any]], instrumentation=None) -> Dict[str, Any]:
+        """
+        由逐頁輸出組出最終結果 (段落合併、MetaData、章節、樹狀結構)。
+        不需重新讀取 PDF，可搭配 page_cache.py 在調整規則後快速重建結果。
+        """
+        inst = instrumentation or self.instrumentation
         full_text_list = []
         all_tables = []
 
-        try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for i, page in enumerate(pdf.pages):
-                    # 1. 提取文字
-                    text = page.extract_text()
-                    if text:
-                        cleaned = self.clean_text(text)
-                        full_text_list.append(cleaned)
-                    
-                    # 2. 提取表格
-                    tables = page.extract_tables()
-                    if tables:
-                        for table in tables:
-                            cleaned_table = [
-                                [cell.strip().replace('\n', '') if cell else "" for cell in row]
-                                for row in table
-                            ]
-                            all_tables.append({
-                                "page": i + 1,
-                                "data": cleaned_table
-                            })
-
-        except Exception as e:
-            return {"error": f"PDF parsing failed: {str(e)}", "filename": filename}
+        for page in pages:
+            # 1. 文字
+            if page["text"] is not None:
+                full_text_list.append(page["text"])
+            
+            # 2. 表格
+            for table in page["tables"]:
+                cleaned_table = [
+                    [cell.strip().replace('\n', '') if cell else "" for cell in row]
+                    for row in table
+                ]
+                all_tables.append({
+                    "page": page["page"],
+                    "data": cleaned_table
+                })
 
         raw_full_text = "\n".join(full_text_list)
-        merged_text = self.merge_paragraphs(raw_full_text)
+        del full_text_list
+        with inst.stage("merge_paragraphs"):
+            merged_text = self.merge_paragraphs(raw_full_text)
+        del raw_full_text
         
-        meta = self.extract_metadata(merged_text)
-        sections = self.extract_sections(merged_text)
+        # 章節位置只掃描一次，MetaData 與章節共用
+        with inst.stage("locate_sections"):
+            spans = self.locate_sections(merged_text)
+        with inst.stage("extract_metadata"):
+            meta = self.extract_metadata(merged_text, spans)
+        with inst.stage("extract_sections"):
+            if self.low_memory:
+                offsets = self.section_offsets(merged_text, spans)
+                sections = {}
+            else:
+                sections = self.extract_sections(merged_text, spans)
         
-        # 使用新的樹狀解析方法
-        structured_reasoning = self.build_hierarchy_tree(sections.get("reasoning", ""))
-
         result = {
             "filename": filename,
             "metadata": meta,
             "content": {
                 "full_text": merged_text,
                 **sections
-            },
-            "structured_reasoning": structured_reasoning,
-            "tables": all_tables
+            }
         }
+        if self.low_memory:
+            result["section_spans"] = {key: list(span) if span else None for key, span in offsets.items()}
+            reasoning = merged_text[offsets["reasoning"][0]:offsets["reasoning"][1]] if offsets["reasoning"] else ""
+        else:
+            reasoning = sections.get("reasoning", "")
+
+        # 使用新的樹狀解析方法
+        if self.compact_tree:
+            with inst.stage("build_compact_tree"):
+                result["structured_reasoning_compact"] = self.build_compact_tree(reasoning)
+        else:
+            with inst.stage("build_hierarchy_tree"):
+                result["structured_reasoning"] = self.build_hierarchy_tree(reasoning)
+
+        result["tables"] = all_tables
+        result["page_count"] = len(pages)
+        inst.note(pages=len(pages), chars=len(merged_text), tables=len(all_tables))
         
         return result
 
+    def parse(self, pdf_path: str, page_cache=None, instrumentation=None, sha256: Optional[str] = None) -> Dict[str, Any]:
+        """
+        解析單一 PDF 的公開接口
+        
+        Args:
+            pdf_path: PDF 路徑
+            page_cache: 選用的 page_cache.PageCache，提供時會一併存下逐頁輸出
+            sha256: PDF 的 SHA-256 (呼叫端已算過時傳入，寫入逐頁快取時不再重新計算)
+            instrumentation: 選用的 instrumentation.Instrumentation (預設為建構時指定者)，
+                             記錄此檔案的耗時、各階段與記憶體，結束時送出一筆 "file" 事件
+        
+        Returns:
+            Dict: {
+                "filename": str,
+                "metadata": { "case_no": str, "applicant": str, "subject": str },
+                "content": { "main_text": str, "reasoning": str, "full_text": str },
+                                                    # (low_memory=True 時只有 full_text，另有
+                                                    #  "section_spans": {"main_text": [起, 迄], ...}，見 storage.expand_sections)
+                "structured_reasoning": List[Dict], # 巢狀樹狀結構
+                                                    # (compact_tree=True 時改為 "structured_reasoning_compact": List[int])
+                "tables": List[List[List[str]]],
+                "page_count": int
+            }
+        """
+        if not os.path.exists(pdf_path):
+            raise FileNotFoundError(f"File not found: {pdf_path}")
+
+        filename = os.path.basename(pdf_path)
+        inst = instrumentation or self.instrumentation
+
+        with inst.file(filename):
+            try:
+                pages = self.extract_pages(pdf_path, inst)
+            except Exception as e:
+                inst.note(error=str(e))
+                return {"error": f"PDF parsing failed: {str(e)}", "filename": filename}
+
+            if page_cache is not None:
+                # 逐頁快取只是選用的加速，寫入失敗 (例如 database is locked) 時記錄下來，仍回傳解析結果
+                try:
+                    with inst.stage("page_cache"):
+                        page_cache.put(pdf_path, pages, sha256=sha256)
+                except Exception as e:
+                    print(f"  [!] 逐頁快取寫入失敗: {filename} - {e}")
+                    inst.note(page_cache_error=str(e))
+
+            return self.build_result(filename, pages, inst)
+
 # 測試用區塊 (當此檔案被直接執行時)
 if __name__ == "__main__":
     import sys
@@ -1,71 +1,356 @@
-import json
+import argparse
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 from ey_crawler import EYCrawler
-from pdf_parser import DecisionParser
+from pdf_parser import DecisionParser, PARSER_VERSION
+from parse_cache import ParseCache
+from page_cache import PageCache
+from storage import JsonStore, DecisionStore, DEFAULT_DB_PATH
+from search_index import SearchIndex, DEFAULT_INDEX_PATH
+from instrumentation import Instrumentation, MetricsWriter, Summary, DEFAULT_METRICS_PATH, format_summary
+
+def result_path(filename, output_dir="results"):
+    """PDF 檔名對應的 JSON 輸出路徑"""
+    return JsonStore(output_dir).path_for(filename)
 
 def save_result(result, output_dir="results"):
     """
-    將解析結果儲存為 JSON 檔案，模擬資料庫寫入
+    將解析結果儲存為 JSON 檔案 (storage.JsonStore)
+    """
+    JsonStore(output_dir).add(result)
+
+# --- 平行模式 (Process Pool) ---
+# 每個子行程各自持有一個 DecisionParser 與逐頁快取連線，避免每個檔案重新建立
+_worker_parser = None
+_worker_page_cache = None
+_worker_instrumentation = None
+
+def _init_worker(page_cache_path=None, compact_tree=False, metrics=False, trace_memory=False, low_memory=False):
+    global _worker_parser, _worker_page_cache, _worker_instrumentation
+    if metrics:
+        # 子行程不直接寫量測檔，每個檔案的記錄放在摘要中交回主行程
+        _worker_instrumentation = Instrumentation(trace_memory=trace_memory)
+    _worker_parser = DecisionParser(compact_tree=compact_tree, instrumentation=_worker_instrumentation,
+                                    low_memory=low_memory)
+    if page_cache_path:
+        _worker_page_cache = PageCache(page_cache_path)
+
+def _worker_metrics(summary):
+    if _worker_instrumentation is not None and _worker_instrumentation.last is not None:
+        summary["metrics"] = dict(_worker_instrumentation.last, pid=os.getpid())
+        _worker_instrumentation.last = None
+    return summary
+
+def _parse_worker(pdf_path, output_dir, return_result=False):
+    """
+    子行程工作函式：解析並儲存單一檔案，回傳處理摘要。
+    output_dir 為 None 時 (SQLite 儲存) 不在子行程寫入，完整結果放在摘要的 result 欄位交回主行程批次寫入；
+    return_result 為 True 時 (需更新全文索引) 寫檔後也交回完整結果。
+    任何例外都轉成 error 欄位回傳，不讓單一檔案中斷整個管線。
     """
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
+    filename = os.path.basename(pdf_path)
+    try:
+        # 逐頁快取與增量快取共用同一次計算的雜湊
+        sha256 = ParseCache.file_digest(pdf_path) if _worker_page_cache is not None else None
+        parsed_data = _worker_parser.parse(pdf_path, page_cache=_worker_page_cache, sha256=sha256)
+        if "error" in parsed_data:
+            return _worker_metrics({"filename": filename, "pages": 0, "error": parsed_data["error"]})
+
+        summary = {
+            "filename": filename,
+            "path": pdf_path,
+            "pages": parsed_data.get("page_count", 0),
+            "case_no": parsed_data["metadata"].get("case_no"),
+            "tables": len(parsed_data["tables"]),
+            "sha256": sha256,
+        }
+        if output_dir is not None:
+            save_result(parsed_data, output_dir=output_dir)
+        if output_dir is None or return_result:
+            summary["result"] = parsed_data
+        return _worker_metrics(summary)
+    except Exception as e:
+        return _worker_metrics({"filename": filename, "pages": 0, "error": str(e)})
+
+def _is_cached(cache, pdf_path, store, stats, force=False):
+    """檔案內容與解析器版本皆未變動，且結果仍在儲存層中時跳過解析"""
+    if cache is None or force or not store.exists(os.path.basename(pdf_path)) or not cache.is_fresh(pdf_path):
+        return False
+    stats["skipped"] += 1
+    return True
+
+def run_serial(crawler, parser, store, max_pages, stats, cache=None, force=False, page_cache=None,
+               search_index=None):
+    """原本的逐一流程：下載一個 -> 解析一個"""
+    # fetch_new_files 是 Generator，會一個接一個吐出檔案路徑
+    for pdf_path in crawler.fetch_new_files(max_pages=max_pages):
+        stats["files"] += 1
+        if _is_cached(cache, pdf_path, store, stats, force):
+            continue
+        print(f"\n[{stats['files']}] 收到檔案，開始處理: {os.path.basename(pdf_path)}")
         
-    filename = result['filename'].replace(".pdf", ".json")
-    path = os.path.join(output_dir, filename)
-    
-    with open(path, 'w', encoding='utf-8') as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
-    
-    print(f"  -> 解析結果已儲存: {path}")
+        # 3. 呼叫解析器介面
+        # 這裡回傳的是乾淨的 Dictionary 結構
+        # 逐頁快取與增量快取共用同一次計算的雜湊
+        sha256 = ParseCache.file_digest(pdf_path) if page_cache is not None else None
+        parsed_data = parser.parse(pdf_path, page_cache=page_cache, sha256=sha256)
+        
+        if "error" in parsed_data:
+            print(f"  [X] 解析失敗: {parsed_data['error']}")
+            stats["errors"].append({"filename": os.path.basename(pdf_path), "error": parsed_data["error"]})
+            continue
+        
+        # 4. 顯示或儲存結果
+        meta = parsed_data['metadata']
+        tables = parsed_data['tables']
+        
+        print(f"  -> 案號: {meta.get('case_no', 'N/A')}")
+        print(f"  -> 聲請人: {meta.get('applicant', 'N/A')}")
+        print(f"  -> 發現表格數: {len(tables)}")
+        
+        # 寫入儲存層 (JSON 檔或 SQLite，後者批次寫入)
+        store.add(parsed_data)
+        if search_index is not None:
+            search_index.add(parsed_data)
+        stats["parsed"] += 1
+        stats["pages"] += parsed_data.get("page_count", 0)
+        if cache is not None:
+            cache.record(pdf_path, sha256=sha256)
+
+def _collect(done, stats, cache=None, store=None, search_index=None, instrumentation=None):
+    for future in done:
+        try:
+            summary = future.result()
+        except Exception as e:
+            # 子行程異常終止 (例如 BrokenProcessPool)
+            summary = {"filename": "?", "pages": 0, "error": str(e)}
+
+        metrics = summary.pop("metrics", None)
+        if metrics is not None and instrumentation is not None:
+            instrumentation.emit(metrics)
+
+        if "error" in summary:
+            print(f"  [X] 解析失敗: {summary['filename']} - {summary['error']}")
+            stats["errors"].append({"filename": summary["filename"], "error": summary["error"]})
+        else:
+            print(f"  -> 完成: {summary['filename']} (案號: {summary.get('case_no') or 'N/A'}, 表格: {summary['tables']})")
+            result = summary.pop("result", None)
+            if result is not None:
+                # JSON 儲存已由子行程寫檔
+                if not isinstance(store, JsonStore):
+                    store.add(result)
+                if search_index is not None:
+                    search_index.add(result)
+            stats["parsed"] += 1
+            stats["pages"] += summary["pages"]
+            if cache is not None:
+                cache.record(summary["path"], sha256=summary.get("sha256"))
+
+def run_parallel(crawler, store, max_pages, workers, queue_size, stats, cache=None, force=False,
+                 page_cache_path=None, compact_tree=False, search_index=None, instrumentation=None,
+                 low_memory=False):
+    """
+    平行模式：爬蟲在主行程下載，解析交給 Process Pool。
+    待處理的工作數量上限為 queue_size，滿了就先等任一工作完成 (Back-pressure)，
+    避免下載速度遠快於解析時無限制地堆積工作。
+    JSON 儲存由子行程直接寫檔；SQLite 儲存與全文索引由主行程集中批次寫入，避免多個行程搶寫資料庫。
+    instrumentation 的 hooks 只在主行程執行，子行程的量測記錄隨摘要交回。
+    """
+    output_dir = store.directory if isinstance(store, JsonStore) else None
+    pending = set()
+    metrics = instrumentation is not None
+    trace_memory = metrics and instrumentation.trace_memory
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(page_cache_path, compact_tree, metrics, trace_memory, low_memory)) as pool:
+        for pdf_path in crawler.fetch_new_files(max_pages=max_pages):
+            stats["files"] += 1
+            if _is_cached(cache, pdf_path, store, stats, force):
+                continue
+            print(f"\n[{stats['files']}] 收到檔案，排入解析佇列: {os.path.basename(pdf_path)}")
+
+            while len(pending) >= queue_size:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                _collect(done, stats, cache, store, search_index, instrumentation)
+
+            pending.add(pool.submit(_parse_worker, pdf_path, output_dir, search_index is not None))
+
+        # 等待剩餘工作
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            _collect(done, stats, cache, store, search_index, instrumentation)
+
+def reparse_from_cache(parser, page_cache, store, download_dir, stats, cache=None, search_index=None):
+    """
+    由逐頁快取重建所有解析結果，不讀取 PDF。
+    適合在調整段落合併、MetaData 或章節規則後快速重新產生 parsed_results。
+    未變動而略過解析的檔案，或逐頁快取寫入失敗的檔案不在快取中，無法重建；
+    這些檔案 (儲存層或下載目錄中有、快取中沒有者) 記錄在 stats["not_cached"]。
+    """
+    expected = set(store.filenames())
+    if os.path.isdir(download_dir):
+        expected.update(f for f in os.listdir(download_dir) if f.lower().endswith(".pdf"))
+    covered = set()
+    for filename, sha256, pages in page_cache.items():
+        covered.add(filename)
+        stats["files"] += 1
+        try:
+            with parser.instrumentation.file(filename):
+                parsed_data = parser.build_result(filename, pages)
+        except Exception as e:
+            print(f"  [X] 重建失敗: {filename} - {e}")
+            stats["errors"].append({"filename": filename, "error": str(e)})
+            continue
+
+        store.add(parsed_data)
+        if search_index is not None:
+            search_index.add(parsed_data)
+        stats["parsed"] += 1
+        stats["pages"] += parsed_data["page_count"]
+
+        # 原始 PDF 仍是快取時的內容，就以目前的解析器版本更新增量快取
+        pdf_path = os.path.join(download_dir, filename)
+        if cache is not None and os.path.exists(pdf_path) and ParseCache.file_digest(pdf_path) == sha256:
+            cache.record(pdf_path, sha256=sha256)
+
+    stats["not_cached"] = sorted(expected - covered)
+
+def print_summary(stats, elapsed):
+    print(f"\n處理檔案: {stats['files']}，成功解析: {stats['parsed']}，"
+          f"未變動略過: {stats['skipped']}，失敗: {len(stats['errors'])}")
+    if elapsed > 0:
+        print(f"耗時 {elapsed:.1f} 秒，吞吐量: {stats['files'] / elapsed:.2f} files/s, {stats['pages'] / elapsed:.2f} pages/s")
+    for err in stats["errors"]:
+        print(f"  [X] {err['filename']}: {err['error']}")
+    not_cached = stats.get("not_cached")
+    if not_cached:
+        print(f"\n逐頁快取中沒有 {len(not_cached)} 份檔案，未重建 (以 --force --page-cache 重新解析即可補齊快取):")
+        for filename in not_cached:
+            print(f"  [-] {filename}")
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="下載並解析促轉會決定書")
+    arg_parser.add_argument("--workers", type=int, default=0,
+                            help="解析用的子行程數量，0 表示在主行程逐一解析 (預設)")
+    arg_parser.add_argument("--queue-size", type=int, default=None,
+                            help="平行模式下待解析佇列上限 (預設為 workers 的兩倍)")
+    arg_parser.add_argument("--max-pages", type=int, default=5,
+                            help="最大爬取列表頁數")
+    arg_parser.add_argument("--stop-after-known", type=int, default=0,
+                            help="連續遇到 N 個未變動的檔案即停止翻頁 (0 表示不提前停止)")
+    arg_parser.add_argument("--incremental", action="store_true",
+                            help="增量模式：翻頁到上次看過的最新項目即停止")
+    arg_parser.add_argument("--page-cache", action="store_true",
+                            help="解析時一併把逐頁文字與表格存入 page_cache.db (供 --reparse-from-cache 使用；每個檔案多一次寫入)")
+    arg_parser.add_argument("--reparse-from-cache", action="store_true",
+                            help="不爬取也不讀取 PDF，直接由逐頁快取重建所有解析結果 (需先以 --page-cache 解析)")
+    arg_parser.add_argument("--force", action="store_true",
+                            help="忽略增量快取，重新解析所有檔案")
+    arg_parser.add_argument("--compact-tree", action="store_true",
+                            help="理由樹狀結構改存精簡格式 (structured_reasoning_compact，見 reasoning_tree.py)")
+    arg_parser.add_argument("--storage", choices=("json", "sqlite"), default="json",
+                            help="解析結果儲存方式：每份一個 JSON 檔 (預設) 或單一 SQLite 資料庫")
+    arg_parser.add_argument("--db", default=DEFAULT_DB_PATH,
+                            help="SQLite 資料庫路徑 (--storage sqlite)")
+    arg_parser.add_argument("--search-index", action="store_true",
+                            help=f"解析後同步更新全文檢索索引 ({DEFAULT_INDEX_PATH}，見 search_index.py)")
+    arg_parser.add_argument("--low-memory", action="store_true",
+                            help="低記憶體模式：每頁處理完即釋放版面快取，章節只記錄位置 (很長的決定書或子行程較多時使用，結果相同；解析可能較慢，200 頁的合成決定書曾量到耗時多約 33%%，記憶體足夠時請用預設模式)")
+    arg_parser.add_argument("--metrics", nargs="?", const=DEFAULT_METRICS_PATH, default=None,
+                            help=f"將每個檔案、各解析階段與爬蟲請求的量測記錄附加到 JSON Lines 檔 (預設 {DEFAULT_METRICS_PATH}，見 instrumentation.py)")
+    arg_parser.add_argument("--metrics-summary", action="store_true",
+                            help="結束時列出各階段與請求延遲的 p50 / p95 及最慢的檔案 (有 --metrics 時也寫入該檔)")
+    arg_parser.add_argument("--trace-memory", action="store_true",
+                            help="量測時以 tracemalloc 記錄每個檔案與階段的記憶體峰值 (較慢)")
+    args = arg_parser.parse_args(argv)
 
-def main():
     # 1. 初始化模組
     # 下載目錄
     download_dir = os.path.join(os.getcwd(), "downloads_ey_tjb")
     # 結果輸出目錄
     result_dir = os.path.join(os.getcwd(), "parsed_results")
     
-    crawler = EYCrawler(download_dir=download_dir)
-    parser = DecisionParser()
+    # 增量快取清單，與結果目錄放在一起
+    manifest_path = os.path.join(os.getcwd(), "parse_manifest.jsonl")
+    # 逐頁擷取快取 (文字與表格)，--page-cache 時寫入，供 --reparse-from-cache 使用
+    page_cache_path = os.path.join(os.getcwd(), "page_cache.db")
+    if args.reparse_from_cache and not os.path.exists(page_cache_path):
+        arg_parser.error(f"找不到逐頁快取 {page_cache_path}，請先以 --page-cache 解析")
+    
+    # 效能量測 (--metrics / --metrics-summary)
+    instrumentation = metrics_writer = summary = None
+    if args.metrics or args.metrics_summary:
+        hooks = []
+        if args.metrics:
+            metrics_writer = MetricsWriter(os.path.join(os.getcwd(), args.metrics))
+            hooks.append(metrics_writer)
+        if args.metrics_summary:
+            summary = Summary()
+            hooks.append(summary)
+        instrumentation = Instrumentation(hooks, trace_memory=args.trace_memory)
+
+    crawler = EYCrawler(download_dir=download_dir, stop_after_known=args.stop_after_known,
+                        incremental=args.incremental, instrumentation=instrumentation)
+    parser = DecisionParser(compact_tree=args.compact_tree, instrumentation=instrumentation,
+                            low_memory=args.low_memory)
+    # 輸出格式也記入版本，切換 --compact-tree 時既有結果會重新產生
+    cache = ParseCache(manifest_path, PARSER_VERSION + ("+compact" if args.compact_tree else ""))
+    page_cache = PageCache(page_cache_path) if args.page_cache or args.reparse_from_cache else None
+    if args.storage == "sqlite":
+        store = DecisionStore(os.path.join(os.getcwd(), args.db))
+    else:
+        store = JsonStore(result_dir)
+    search_index = SearchIndex(os.path.join(os.getcwd(), DEFAULT_INDEX_PATH)) if args.search_index else None
 
     print("=== 啟動自動化管線 (Pipeline) ===")
     print(f"下載目錄: {download_dir}")
-    print(f"結果目錄: {result_dir}")
+    print(f"結果儲存: {store.db_path if args.storage == 'sqlite' else result_dir}")
+    if args.workers > 0:
+        print(f"平行解析: {args.workers} 個子行程")
     print("--------------------------------")
 
     # 2. 執行管線 (Pipeline)
-    # fetch_new_files 是 Generator，會一個接一個吐出檔案路徑
-    # 這樣就達成「下載一個 -> 解析一個」的不閉塞流程
+    stats = {"files": 0, "parsed": 0, "skipped": 0, "pages": 0, "errors": []}
+    start = time.perf_counter()
     try:
-        count = 0
-        # 設定 max_pages=1 僅供演示，實際使用可加大或移除參數
-        for pdf_path in crawler.fetch_new_files(max_pages=5):
-            count += 1
-            print(f"\n[{count}] 收到檔案，開始處理: {os.path.basename(pdf_path)}")
-            
-            # 3. 呼叫解析器介面
-            # 這裡回傳的是乾淨的 Dictionary 結構
-            parsed_data = parser.parse(pdf_path)
-            
-            if "error" in parsed_data:
-                print(f"  [X] 解析失敗: {parsed_data['error']}")
-                continue
-            
-            # 4. 顯示或儲存結果
-            meta = parsed_data['metadata']
-            tables = parsed_data['tables']
-            
-            print(f"  -> 案號: {meta.get('case_no', 'N/A')}")
-            print(f"  -> 聲請人: {meta.get('applicant', 'N/A')}")
-            print(f"  -> 發現表格數: {len(tables)}")
-            
-            # 模擬資料庫寫入操作
-            save_result(parsed_data, output_dir=result_dir)
+        if args.reparse_from_cache:
+            print(f"由逐頁快取重建 {len(page_cache)} 份結果")
+            reparse_from_cache(parser, page_cache, store, download_dir, stats, cache=cache,
+                               search_index=search_index)
+        elif args.workers > 0:
+            queue_size = args.queue_size or args.workers * 2
+            run_parallel(crawler, store, args.max_pages, args.workers, queue_size, stats,
+                         cache=cache, force=args.force, page_cache_path=page_cache_path if args.page_cache else None,
+                         compact_tree=args.compact_tree, search_index=search_index,
+                         instrumentation=instrumentation, low_memory=args.low_memory)
+        else:
+            run_serial(crawler, parser, store, args.max_pages, stats,
+                       cache=cache, force=args.force, page_cache=page_cache,
+                       search_index=search_index)
             
     except KeyboardInterrupt:
         print("\n使用者中斷執行。")
+    finally:
+        # 寫入緩衝區中尚未寫入的結果
+        store.close()
+        if search_index is not None:
+            search_index.close()
     
+    elapsed = time.perf_counter() - start
+    print_summary(stats, elapsed)
+    if instrumentation is not None:
+        instrumentation.emit({"type": "run", "files": stats["files"], "parsed": stats["parsed"],
+                              "skipped": stats["skipped"], "errors": len(stats["errors"]), "pages": stats["pages"],
+                              "wall_ms": round(elapsed * 1000, 3), "workers": args.workers, "ts": round(time.time(), 3)})
+        if summary is not None:
+            report = summary.summary()
+            print("\n" + format_summary(report))
+            if metrics_writer is not None:
+                metrics_writer(report)
+        if metrics_writer is not None:
+            metrics_writer.close()
     print("\n=== 管線執行完畢 ===")
+    return stats
 
 if __name__ == "__main__":
     main()
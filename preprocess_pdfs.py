@@ -1,10 +1,19 @@
 import os
 from pypdf import PdfReader, PdfWriter
 
-def process_pdfs():
-    source_dir = "list"
-    output_dir = "processed_list"
-    
+# 前處理規則 (extract_tables.py 的 --fused 模式直接套用在原始檔案上，不另存 processed_list/)
+SKIP_PAGES = 1  # 一律移除第一頁
+
+def page_transform(filename):
+    """
+    Returns: (移除前幾頁, 順時針旋轉角度)，不處理的檔案為 None
+    檔名標註「都不要處理」者不處理；標註「不需」者不旋轉，其餘旋轉 90 度
+    """
+    if "都不要處理" in filename:
+        return None
+    return SKIP_PAGES, 0 if "不需" in filename else 90
+
+def process_pdfs(source_dir="list", output_dir="processed_list"):
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
         
@@ -19,32 +28,34 @@ def process_pdfs():
         dst_path = os.path.join(output_dir, filename)
         
         # 邏輯 0: 排除「都不要處理」
-        if "都不要處理" in filename:
+        transform = page_transform(filename)
+        if transform is None:
             print(f"[跳過] {filename} (標註為不處理)")
             continue
+        skip, rotation = transform
 
         try:
             reader = PdfReader(src_path)
             writer = PdfWriter()
             
             # 一律移除第一頁 (從 index 1 開始)
-            if len(reader.pages) <= 1:
+            if len(reader.pages) <= skip:
                 print(f"[警告] {filename} 只有一頁，移除首頁後將無內容，跳過處理。")
                 continue
                 
             print(f"[處理] {filename}")
-            do_rotate = "不需" not in filename
+            do_rotate = rotation != 0
             
             if do_rotate:
                 print(f"  -> 執行: 移除首頁 + 旋轉頁面")
             else:
                 print(f"  -> 執行: 僅移除首頁")
 
-            for i in range(1, len(reader.pages)):
+            for i in range(skip, len(reader.pages)):
                 page = reader.pages[i]
                 if do_rotate:
                     # 3次逆時針 = 270度逆時針 = 90度順時針
-                    page.rotate(90)
+                    page.rotate(rotation)
                 writer.add_page(page)
             
             with open(dst_path, "wb") as f_out:
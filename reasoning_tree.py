@@ -0,0 +1,127 @@
+from typing import Any, Callable, Dict, List, Optional
+
+# 精簡樹狀結構 (structured_reasoning_compact)
+# 巢狀格式每個標題都存一份 text / level / content / children，內文與理由全文重複，
+# 縮排後的 JSON 與 decision_data.js 因此膨脹。精簡格式只存每個標題的
+#   (level, parent_index, text_offset)
+# 三個整數，依文件順序 (前序) 攤平成一個 list：[level, parent, offset, level, parent, offset, ...]
+#   level:       標題層級 1-4
+#   parent:      父標題在 records 中的索引，最上層為 -1
+#   text_offset: 標題在理由文字 (content.reasoning) 中的行號 (以 '\n' 切分，從 0 開始)
+# 標題文字與內文都由理由文字還原：標題為該行去除空白，
+# 內文為該標題之後到下一個標題之前的所有非空行 (與 build_hierarchy_tree 的規則相同)。
+# 使用行號而非字元位置，前端 JavaScript (UTF-16) 與 Python 切出的結果才會一致。
+
+RECORD_SIZE = 3
+
+class TreeNode:
+    """精簡樹狀結構的單一標題"""
+    __slots__ = ("level", "parent", "offset")
+
+    def __init__(self, level: int, parent: int, offset: int):
+        self.level = level
+        self.parent = parent
+        self.offset = offset
+
+    def __repr__(self):
+        return f"TreeNode(level={self.level}, parent={self.parent}, offset={self.offset})"
+
+def build_nodes(text: str, get_level: Callable[[str], int]) -> List[TreeNode]:
+    """
+    單次掃描理由文字，建立標題節點 (依文件順序)
+    get_level 為判斷單行層級的函式 (DecisionParser.get_line_level)，0 表示內文
+    """
+    nodes: List[TreeNode] = []
+    if not text:
+        return nodes
+
+    # Stack 只存節點索引，-1 代表虛擬根節點 (Level 0)
+    stack = [-1]
+    for line_no, line in enumerate(text.split('\n')):
+        line = line.strip()
+        if not line:
+            continue
+        level = get_level(line)
+        if level == 0:
+            continue
+        # 與 build_hierarchy_tree 相同：層級 <= Stack 頂端者代表上一層結束
+        while stack[-1] != -1 and nodes[stack[-1]].level >= level:
+            stack.pop()
+        nodes.append(TreeNode(level, stack[-1], line_no))
+        stack.append(len(nodes) - 1)
+    return nodes
+
+def encode(nodes: List[TreeNode]) -> List[int]:
+    """節點 -> 攤平的整數 list"""
+    records: List[int] = []
+    for node in nodes:
+        records.extend((node.level, node.parent, node.offset))
+    return records
+
+def decode(records: List[int]) -> List[TreeNode]:
+    """攤平的整數 list -> 節點"""
+    if len(records) % RECORD_SIZE:
+        raise ValueError(f"精簡樹狀結構長度必須是 {RECORD_SIZE} 的倍數: {len(records)}")
+    return [TreeNode(*records[i:i + RECORD_SIZE]) for i in range(0, len(records), RECORD_SIZE)]
+
+def to_nested(text: str, records: List[int]) -> List[Dict[str, Any]]:
+    """
+    精簡格式 -> 巢狀格式 (與 DecisionParser.build_hierarchy_tree 的輸出相同)
+    text 必須是產生 records 時使用的理由文字
+    """
+    nodes = decode(records)
+    if not nodes:
+        return []
+
+    lines = text.split('\n')
+    roots: List[Dict[str, Any]] = []
+    built: List[Dict[str, Any]] = []
+    for i, node in enumerate(nodes):
+        # 內文：到下一個標題 (文件順序) 之前
+        end = nodes[i + 1].offset if i + 1 < len(nodes) else len(lines)
+        content = [line for line in (l.strip() for l in lines[node.offset + 1:end]) if line]
+        item = {
+            "text": lines[node.offset].strip(),
+            "level": node.level,
+            "content": content,
+            "children": []
+        }
+        (roots if node.parent < 0 else built[node.parent]["children"]).append(item)
+        built.append(item)
+    return roots
+
+def from_nested(tree: List[Dict[str, Any]], text: str) -> List[int]:
+    """
+    巢狀格式 -> 精簡格式
+    tree 必須是由 text 建立的 (標題依前序即文件順序)，每個標題依序對應到 text 中的一行
+    """
+    lines = text.split('\n') if text else []
+    records: List[int] = []
+    line_no = 0
+
+    # 以明確的 Stack 走訪前序，避免深層巢狀時的遞迴
+    stack = [(node, -1) for node in reversed(tree)]
+    while stack:
+        node, parent = stack.pop()
+        while line_no < len(lines) and lines[line_no].strip() != node["text"]:
+            line_no += 1
+        if line_no >= len(lines):
+            raise ValueError(f"理由文字中找不到標題: {node['text'][:30]}")
+        index = len(records) // RECORD_SIZE
+        records.extend((node["level"], parent, line_no))
+        line_no += 1
+        stack.extend((child, index) for child in reversed(node.get("children") or []))
+    return records
+
+def load_tree(result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    由解析結果取得巢狀樹狀結構，不論儲存的是巢狀或精簡格式
+    (供 build_viewer_data、test_demo 等需要巢狀格式的地方使用)
+    """
+    if result.get("structured_reasoning") is not None:
+        return result["structured_reasoning"]
+    records: Optional[List[int]] = result.get("structured_reasoning_compact")
+    if not records:
+        return []
+    reasoning = (result.get("content") or {}).get("reasoning") or ""
+    return to_nested(reasoning, records)
@@ -0,0 +1,216 @@
+import argparse
+import re
+import sys
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from storage import open_store, json_name
+
+# 撤銷名冊 -> 決定書連結
+# 名冊第二類 (經促轉會決定撤銷) 的每一筆是一個人，決定書的當事人 (metadata.subject) 則可能是多人：
+#   "曾木根、藍春盛"、"洪萬福洪陳玉真" (無分隔)、"杜孝生、廖麗川所" (解析殘留)，或缺少當事人欄位。
+# 連結時以兩種索引找出候選決定書並計分：
+#   姓名索引     當事人拆成個人後的姓名 (異體字統一)，完全相符
+#   子字串索引   當事人字串的所有子字串，用於無分隔或有殘留字的當事人 (必須再由案號確認)
+#   案號         名冊的 case_id 與決定書主文引用的原判決案號 ((41)安潔字第2437號 / 41年度安潔字第 2437 號)
+# 皆只需查表，名冊筆數 N、決定書 M 份時為 O(N + M) (不含子字串數，當事人字串很短)。
+
+# 連結規則變動時遞增 (建置快取的名冊片段隨之失效)
+LINKER_VERSION = 1
+
+# 計分：姓名完全相符 2、子字串相符 1、案號相符 +4
+SCORE_NAME = 2
+SCORE_FUZZY = 1
+SCORE_CASE = 4
+
+# 名冊與決定書用字不一致的異體字 (統一為右側)
+VARIANTS = str.maketrans({
+    "臺": "台", "峯": "峰", "羣": "群", "裏": "裡", "眞": "真", "啓": "啟",
+    "温": "溫", "衞": "衛", "爲": "為", "敎": "教", "淸": "清", "靑": "青",
+    "册": "冊", "户": "戶", "黄": "黃", "徳": "德", "濶": "闊",
+})
+
+_SEPARATORS = re.compile(r"[、，,；;／/\s]+")
+_MIN_FUZZY = 2
+_MAX_FUZZY = 5
+
+def normalize_name(name):
+    """移除姓名中的空白與特殊字元並統一異體字，方便比對"""
+    if not name: return ""
+    return re.sub(r"\s", "", unicodedata.normalize("NFKC", name)).translate(VARIANTS)
+
+def split_names(subject):
+    """當事人字串 -> 個人姓名清單 ("曾木根、藍春盛" -> ["曾木根", "藍春盛"])"""
+    return [n for n in (normalize_name(p) for p in _SEPARATORS.split(subject or "")) if n]
+
+# 主文開頭的當事人 (當事人欄位缺少時使用)："黃添才之台灣省保安司令部..."、"林志森、王濟甫受國防部..."
+_MAIN_TEXT_PARTIES = re.compile(r"^\s*([^\s，,。:：()（）]{2,40}?)(?:受|之|等)")
+
+def decision_parties(metadata, main_text=None):
+    parties = split_names((metadata or {}).get("subject"))
+    if not parties and main_text:
+        m = _MAIN_TEXT_PARTIES.match(main_text)
+        if m:
+            parties = split_names(m.group(1))
+    return parties
+
+# --- 案號 ---
+# (年, 字別, 號) 三元組，年與號轉為整數 (0738 與 738 相同)。
+# 一個案號欄位可能含多個號碼："(52)警審特字第15.19號"；名冊中被斷開的 "(37)訴字第384"、"658號" 沿用前一個的年與字別。
+
+_CASE_REF = re.compile(r"(?:\((\d+)\)|(\d+)年度?)([^\d\s]{1,10}?)字(?:第)?(\d[\d.、,]*)號?")
+_CASE_NUMBERS_ONLY = re.compile(r"^第?(\d[\d.、,]*)號")
+
+def _numbers(text):
+    return [int(n) for n in re.split(r"[.、,]", text) if n]
+
+def case_refs(texts):
+    """案號文字 (字串或清單) -> 排序後的 [年, 字別, 號] 清單"""
+    if isinstance(texts, str):
+        texts = [texts]
+    refs: Set[Tuple[int, str, int]] = set()
+    last = None
+    for text in texts or ():
+        text = re.sub(r"\s", "", unicodedata.normalize("NFKC", text or "")).translate(VARIANTS)
+        found = False
+        for m in _CASE_REF.finditer(text):
+            year = int(m.group(1) or m.group(2))
+            # "覆高(映)字" 的括號保留，字別開頭的標點 (例如 "(47)、覆高字") 去除
+            word = m.group(3).lstrip("、，,；;:：")
+            last = (year, word)
+            refs.update((year, word, n) for n in _numbers(m.group(4)))
+            found = True
+        if not found and last:
+            m = _CASE_NUMBERS_ONLY.match(text)
+            if m:
+                refs.update((last[0], last[1], n) for n in _numbers(m.group(1)))
+    return [list(r) for r in sorted(refs)]
+
+def decision_record(data):
+    """解析結果 -> 連結所需的欄位 {"id", "parties", "case_refs"}"""
+    main_text = (data.get("content") or {}).get("main_text")
+    return {
+        "id": json_name(data["filename"]).replace(".", "_"),
+        "parties": decision_parties(data.get("metadata"), main_text),
+        "case_refs": case_refs(main_text),
+    }
+
+# --- 連結 ---
+
+class RevocationLinker:
+    """
+    decisions: [{"id", "parties", "case_refs"}]，順序即同分時的優先順序 (前端的決定書排序)
+    """
+
+    def __init__(self, decisions: Iterable[Dict[str, Any]]):
+        self.decisions = list(decisions)
+        self.by_name: Dict[str, Set[int]] = {}
+        self.by_substring: Dict[str, Set[int]] = {}
+        self.case_sets: List[Set[Tuple[int, str, int]]] = []
+        for i, d in enumerate(self.decisions):
+            for name in d.get("parties") or ():
+                self.by_name.setdefault(name, set()).add(i)
+                for k in range(len(name)):
+                    for length in range(_MIN_FUZZY, min(_MAX_FUZZY, len(name) - k) + 1):
+                        self.by_substring.setdefault(name[k:k + length], set()).add(i)
+            self.case_sets.append({tuple(r) for r in d.get("case_refs") or ()})
+
+    def signature(self) -> List[Any]:
+        """影響連結結果的資料 (建置快取用)"""
+        return [LINKER_VERSION, [[d["id"], d.get("parties") or [], d.get("case_refs") or []]
+                                 for d in self.decisions]]
+
+    def candidates(self, name: str, refs: Set[Tuple[int, str, int]]) -> List[Tuple[int, int, str]]:
+        """
+        Returns: [(分數, 決定書位置, 方式)]，依分數由高至低、同分依決定書順序
+        只有子字串相符者必須案號也相符
+        """
+        exact = self.by_name.get(name, set())
+        fuzzy = self.by_substring.get(name, set()) - exact if len(name) <= _MAX_FUZZY else set()
+        scored = []
+        for i in exact | fuzzy:
+            case_match = bool(refs & self.case_sets[i])
+            if i in exact:
+                score, method = SCORE_NAME, "name"
+            elif case_match:
+                score, method = SCORE_FUZZY, "fuzzy"
+            else:
+                continue
+            if case_match:
+                score += SCORE_CASE
+                method += "+case"
+            scored.append((score, i, method))
+        scored.sort(key=lambda c: (-c[0], c[1]))
+        return scored
+
+    def link(self, revocations: List[Dict[str, Any]], details: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        在第二類的記錄中加入 `linked_decision_id`
+        details: 傳入清單時附加每筆同分 (ambiguous) 與找不到 (unmatched) 的記錄
+        Returns: 統計 {"total", "linked", "methods", "case_confirmed", "ambiguous", "unmatched"}
+        """
+        stats = {"total": 0, "linked": 0, "methods": {}, "case_confirmed": 0, "ambiguous": 0, "unmatched": 0}
+        for r in revocations:
+            # 只針對第二類 (Category 2) 嘗試連結
+            if r.get("category") != 2:
+                continue
+            stats["total"] += 1
+            name = normalize_name(r.get("name"))
+            scored = self.candidates(name, {tuple(x) for x in case_refs(r.get("case_id"))}) if name else []
+            if not scored:
+                stats["unmatched"] += 1
+                if details is not None:
+                    details.append({"status": "unmatched", "id": r.get("id"), "name": r.get("name"),
+                                    "case_id": r.get("case_id")})
+                continue
+            score, best, method = scored[0]
+            r["linked_decision_id"] = self.decisions[best]["id"]
+            stats["linked"] += 1
+            stats["methods"][method] = stats["methods"].get(method, 0) + 1
+            if method.endswith("+case"):
+                stats["case_confirmed"] += 1
+            tied = [self.decisions[i]["id"] for s, i, _ in scored if s == score]
+            if len(tied) > 1:
+                # 同分時取排序在前者 (與原本取第一個候選相同)
+                stats["ambiguous"] += 1
+                if details is not None:
+                    details.append({"status": "ambiguous", "id": r.get("id"), "name": r.get("name"),
+                                    "case_id": r.get("case_id"), "candidates": tied})
+        return stats
+
+def format_stats(stats):
+    methods = ", ".join(f"{k} {v}" for k, v in sorted(stats["methods"].items()))
+    return (f"Linked {stats['linked']} of {stats['total']} category 2 revocation records to decisions"
+            + (f" ({methods})" if methods else "")
+            + f"; case number confirmed {stats['case_confirmed']}, ambiguous {stats['ambiguous']}, "
+              f"unmatched {stats['unmatched']}.")
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="撤銷名冊與決定書的連結統計")
+    arg_parser.add_argument("--store", default=None,
+                            help="解析結果來源：目錄 (JSON) 或 .db 檔 (SQLite)；預設為 parsed_results/ (與 pipeline 預設相同)")
+    arg_parser.add_argument("--show-ambiguous", action="store_true", help="列出同分 (多個候選) 的記錄")
+    arg_parser.add_argument("--show-unmatched", action="store_true", help="列出找不到決定書的記錄")
+    args = arg_parser.parse_args(argv)
+
+    from build_viewer_data import decision_sort_key
+
+    store = open_store(args.store)
+    try:
+        decisions = sorted(store.iter_decisions(), key=decision_sort_key)
+        revocations = store.revocations()
+    finally:
+        store.close()
+    linker = RevocationLinker(decision_record(d) for d in decisions)
+    details: List[Dict[str, Any]] = []
+    stats = linker.link(revocations, details)
+    print(format_stats(stats))
+    for item in details:
+        if (item["status"] == "ambiguous" and args.show_ambiguous) or \
+           (item["status"] == "unmatched" and args.show_unmatched):
+            extra = f" -> {', '.join(item['candidates'])}" if "candidates" in item else ""
+            print(f"  [{item['status']}] {item['id']} {item['name']} {item['case_id']}{extra}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
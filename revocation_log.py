@@ -0,0 +1,187 @@
+import argparse
+import json
+import os
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+# 撤銷名冊的擷取記錄 (JSON Lines)
+# extract_tables.py / extract_special.py 每處理完一頁就把該頁的資料列附加到記錄檔，
+# 接著寫一行進度 (檢查點)，中途中斷時已完成的頁面不會遺失，下次可由中斷處繼續：
+#   {"source": ..., "category": 1, "name": ...}          資料列 (與 all_revocations.json 的元素相同)
+#   {"_page": {"source", "page", "state"}}                該頁的資料列已全部寫入；state 為跨頁延續的狀態
+#   {"_done": "檔名"}                                     該檔案已處理完畢
+# 沒有檢查點跟在後面的資料列 (寫到一半中斷) 讀取時捨棄，開啟記錄檔時也會截掉。
+# all_revocations.json (陣列格式) 由 compact 產生；只新增資料列時以 append_to_array 就地附加。
+
+DEFAULT_LOG_PATH = "all_revocations.jsonl"
+
+def _dumps(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+def scan(path: str) -> Tuple[int, Dict[str, Tuple[int, Any]], Set[str], int]:
+    """
+    讀取記錄檔的進度
+    Returns: (已完成頁面的資料列數, 檔名 -> (最後完成的頁碼, 狀態), 已處理完畢的檔名,
+              最後一個檢查點之後的位置 (之後的內容為未完成的頁面))
+    """
+    count = pending = committed = 0
+    progress: Dict[str, Tuple[int, Any]] = {}
+    done: Set[str] = set()
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                obj = json.loads(line)
+            except ValueError:
+                break  # 寫到一半的最後一行
+            if "_page" in obj:
+                page = obj["_page"]
+                if page.get("source") is not None:
+                    progress[page["source"]] = (page["page"], page.get("state"))
+                count += pending
+                pending = 0
+            elif "_done" in obj:
+                done.add(obj["_done"])
+            else:
+                pending += 1
+                continue
+            committed = f.tell()
+    return count, progress, done, committed
+
+class RevocationLog:
+    """
+    reset=True 時清空記錄檔 (重新擷取全部名冊)，否則保留既有記錄，可由 resume_point 繼續
+    """
+
+    def __init__(self, path: str = DEFAULT_LOG_PATH, reset: bool = False):
+        self.path = path
+        self.count = 0
+        self.progress: Dict[str, Tuple[int, Any]] = {}
+        self.done: Set[str] = set()
+        if reset or not os.path.exists(path):
+            self.f = open(path, "w", encoding="utf-8")
+            return
+        self.count, self.progress, self.done, committed = scan(path)
+        self.f = open(path, "r+", encoding="utf-8")
+        self.f.seek(committed)
+        self.f.truncate()
+
+    def append_page(self, source: Optional[str], page: int, rows: List[Dict[str, Any]], state: Any = None):
+        """附加一頁的資料列與檢查點 (單次寫入後 flush)"""
+        lines = [_dumps(r) for r in rows]
+        lines.append(_dumps({"_page": {"source": source, "page": page, "state": state}}))
+        self.f.write("\n".join(lines) + "\n")
+        self.f.flush()
+        self.count += len(rows)
+        if source is not None:
+            self.progress[source] = (page, state)
+
+    def finish(self, source: str):
+        self.f.write(_dumps({"_done": source}) + "\n")
+        self.f.flush()
+        self.done.add(source)
+
+    def import_records(self, records: List[Dict[str, Any]]):
+        """匯入既有的 all_revocations.json (尚無記錄檔時)，其中的檔案都視為已處理完畢"""
+        self.append_page(None, -1, records)
+        for source in dict.fromkeys(r.get("source") for r in records):
+            if source:
+                self.finish(source)
+
+    def is_done(self, source: str) -> bool:
+        return source in self.done
+
+    def resume_point(self, source: str) -> Optional[Tuple[int, Any]]:
+        """Returns: (下一頁的頁碼, 狀態) 或 None (尚未處理過)"""
+        if source not in self.progress:
+            return None
+        page, state = self.progress[source]
+        return page + 1, state
+
+    def close(self):
+        self.f.close()
+
+def read_records(path: str = DEFAULT_LOG_PATH, source: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """依寫入順序讀出已完成頁面的資料列 (source 限定檔名)"""
+    pending: List[Dict[str, Any]] = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                obj = json.loads(line)
+            except ValueError:
+                break
+            if "_page" in obj:
+                yield from pending
+                pending = []
+            elif "_done" not in obj and (source is None or obj.get("source") == source):
+                pending.append(obj)
+
+def _array_item(record: Dict[str, Any]) -> str:
+    # 與 json.dump(陣列, indent=2) 中的一個元素相同
+    return "\n".join("  " + line for line in json.dumps(record, ensure_ascii=False, indent=2).split("\n"))
+
+def write_array(records: Iterable[Dict[str, Any]], output_file: str) -> int:
+    """逐筆寫出陣列格式 (與 json.dump(list, indent=2) 的結果相同)，Returns: 筆數"""
+    count = 0
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write("[")
+        for record in records:
+            f.write(("," if count else "") + "\n" + _array_item(record))
+            count += 1
+        f.write("\n]" if count else "]")
+    return count
+
+def compact(log_path: str = DEFAULT_LOG_PATH, output_file: str = "all_revocations.json") -> int:
+    """記錄檔 -> all_revocations.json"""
+    return write_array(read_records(log_path), output_file)
+
+def append_to_array(output_file: str, records: List[Dict[str, Any]]) -> int:
+    """
+    在既有的 all_revocations.json 結尾附加資料列 (只寫入新增的部分)
+    檔案不存在或結尾不是 json.dump 的格式時整份重寫
+    Returns: 附加的筆數
+    """
+    if not records:
+        return 0
+    if os.path.exists(output_file):
+        with open(output_file, "rb+") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size > 3:
+                f.seek(size - 2)
+                if f.read(2) == b"\n]":
+                    f.seek(size - 2)
+                    f.truncate()
+                    f.write(("," + ",".join("\n" + _array_item(r) for r in records) + "\n]").encode("utf-8"))
+                    return len(records)
+    existing = []
+    if os.path.exists(output_file):
+        with open(output_file, encoding="utf-8") as f:
+            existing = json.load(f)
+    write_array(existing + list(records), output_file)
+    return len(records)
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="撤銷名冊擷取記錄 (JSON Lines)")
+    arg_parser.add_argument("--log", default=DEFAULT_LOG_PATH)
+    sub = arg_parser.add_subparsers(dest="command", required=True)
+    compact_cmd = sub.add_parser("compact", help="由記錄檔產生 all_revocations.json (陣列格式)")
+    compact_cmd.add_argument("--output", default="all_revocations.json")
+    sub.add_parser("status", help="列出已完成的檔案與進度")
+    args = arg_parser.parse_args(argv)
+
+    if not os.path.exists(args.log):
+        print(f"找不到記錄檔: {args.log}")
+        return 1
+    if args.command == "compact":
+        count = compact(args.log, args.output)
+        print(f"已寫出 {args.output}: {count} 筆")
+    else:
+        count, progress, done, _ = scan(args.log)
+        print(f"{args.log}: {count} 筆")
+        for source in sorted(set(progress) | done):
+            page = f" (已處理至第 {progress[source][0] + 1} 頁)" if source in progress else ""
+            print(f"  {'完成' if source in done else '未完成'}  {source}{page}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
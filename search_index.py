@@ -0,0 +1,286 @@
+import argparse
+import hashlib
+import re
+import sqlite3
+import sys
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from storage import open_store, section_text
+
+# 全文檢索索引 (SQLite FTS5)
+# 中文沒有空白分詞，改以「相鄰兩字」(bigram) 為索引單位：
+#   "促轉司字" -> "促轉 轉司 司字 字"
+# 每段連續的文字 (str.isalnum，標點與空白為分隔) 產生所有 bigram，並在結尾補上最後一個字的 unigram，
+# 讓單字查詢也能以前綴比對找到任何位置的字。FTS5 保存每個 token 的位置 (detail=full)，
+# 查詢字串以相同方式切成 bigram 後成為 FTS5 片語，連續 bigram 相符即代表原文含有該子字串。
+
+DEFAULT_INDEX_PATH = "search_index.db"
+FIELDS = ("full_text", "main_text", "reasoning")
+
+def normalize(text: str) -> str:
+    """全形/半形統一 (NFKC) 並轉小寫，索引與查詢使用同一規則"""
+    return unicodedata.normalize("NFKC", text).casefold()
+
+def _runs(text: str) -> List[str]:
+    """切出連續的文字片段 (標點、空白為分隔)"""
+    runs = []
+    start = None
+    for i, ch in enumerate(text):
+        if ch.isalnum():
+            if start is None:
+                start = i
+        elif start is not None:
+            runs.append(text[start:i])
+            start = None
+    if start is not None:
+        runs.append(text[start:])
+    return runs
+
+def bigram_tokens(text: str) -> List[str]:
+    """文字 -> bigram token 序列 (每段結尾補上最後一個字)"""
+    tokens = []
+    for run in _runs(normalize(text or "")):
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        tokens.append(run[-1])
+    return tokens
+
+def _phrase(term: str) -> Optional[str]:
+    """
+    查詢詞 -> FTS5 片語
+    最後一段的結尾 unigram 不列入 (原文中該字之後可能還有字)；
+    最後一段只有一個字時改用前綴比對，涵蓋該字作為 bigram 首字或片段結尾的情況。
+    """
+    runs = _runs(normalize(term))
+    if not runs:
+        return None
+    tokens = []
+    for run in runs[:-1]:
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        tokens.append(run[-1])
+    last = runs[-1]
+    if len(last) == 1:
+        return '"' + " ".join(tokens + [last]) + '" *'
+    tokens.extend(last[i:i + 2] for i in range(len(last) - 1))
+    return '"' + " ".join(tokens) + '"'
+
+_QUERY_TOKEN_RE = re.compile(r'"([^"]*)"|(\()|(\))|([^\s()"]+)')
+
+def compile_query(query: str, fields: Optional[Iterable[str]] = None) -> str:
+    """
+    使用者查詢 -> FTS5 MATCH 運算式
+      空白分隔的詞為 AND；支援 OR、AND、NOT 關鍵字、括號與 "片語"；-詞 表示排除 (NOT)
+      優先順序同 FTS5：NOT > AND > OR，例如 (叛亂 OR 死刑) -駁回
+      每個詞都是子字串比對；"片語" 內的空白代表原文在該處必須有標點或空白分隔
+    fields 限定搜尋的欄位 (full_text / main_text / reasoning)
+    """
+    parts: List[str] = []
+    # 上一個元素是否為運算元 (用於判斷是否需補 AND)
+    prev_operand = False
+    for m in _QUERY_TOKEN_RE.finditer(query):
+        quoted, lparen, rparen, word = m.groups()
+        if lparen:
+            if prev_operand:
+                parts.append("AND")
+            parts.append("(")
+            prev_operand = False
+            continue
+        if rparen:
+            parts.append(")")
+            prev_operand = True
+            continue
+        if word in ("AND", "OR", "NOT"):
+            parts.append(word)
+            prev_operand = False
+            continue
+
+        negate = False
+        if quoted is None and word.startswith("-") and len(word) > 1:
+            negate, word = True, word[1:]
+        phrase = _phrase(quoted if quoted is not None else word)
+        if phrase is None:
+            continue
+        if negate:
+            if not parts:
+                raise ValueError("排除條件 (-詞) 前需有其他查詢條件")
+            parts.append("NOT")
+        elif prev_operand:
+            parts.append("AND")
+        parts.append(phrase)
+        prev_operand = True
+
+    if not parts:
+        raise ValueError("查詢內容為空")
+    if parts[0] == "NOT":
+        raise ValueError("NOT 前需有其他查詢條件")
+    expr = " ".join(parts)
+    if fields:
+        unknown = set(fields) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"不支援的欄位: {', '.join(sorted(unknown))}")
+        expr = "{" + " ".join(fields) + "} : (" + expr + ")"
+    return expr
+
+class SearchIndex:
+    """
+    決定書全文索引 (SQLite FTS5)
+    docs:     每份決定書一列，記錄內容摘要值，重建時只更新有變動的文件
+    postings: FTS5 虛擬表，三個欄位各自保存 bigram token 與位置
+    寫入先放在緩衝區，累積 batch_size 筆 (或呼叫 flush) 後以單一交易寫入。
+    """
+
+    def __init__(self, db_path: str = DEFAULT_INDEX_PATH, batch_size: int = 50):
+        self.db_path = db_path
+        self.batch_size = max(1, batch_size)
+        self._pending: Dict[str, Dict[str, Any]] = {}
+
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        try:
+            self.conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS postings USING fts5("
+                              "full_text, main_text, reasoning, tokenize='unicode61 remove_diacritics 0')")
+        except sqlite3.OperationalError as e:
+            self.conn.close()
+            raise RuntimeError(f"此 SQLite ({sqlite3.sqlite_version}) 不支援 FTS5: {e}")
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS docs (
+                doc_id INTEGER PRIMARY KEY,
+                filename TEXT UNIQUE NOT NULL,
+                digest TEXT NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    @staticmethod
+    def _fields(result: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(section_text(result, f) or "" for f in FIELDS)
+
+    @staticmethod
+    def digest(result: Dict[str, Any]) -> str:
+        sha = hashlib.sha1()
+        for text in SearchIndex._fields(result):
+            sha.update(text.encode("utf-8"))
+            sha.update(b"\0")
+        return sha.hexdigest()
+
+    def add(self, result: Dict[str, Any]):
+        """加入或更新一份決定書 (加入緩衝區，滿 batch_size 筆時寫入)"""
+        self._pending[result["filename"]] = result
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        with self.conn:
+            for filename, result in self._pending.items():
+                digest = self.digest(result)
+                row = self.conn.execute("SELECT doc_id, digest FROM docs WHERE filename = ?", (filename,)).fetchone()
+                if row and row[1] == digest:
+                    continue
+                if row:
+                    doc_id = row[0]
+                    self.conn.execute("DELETE FROM postings WHERE rowid = ?", (doc_id,))
+                    self.conn.execute("UPDATE docs SET digest = ? WHERE doc_id = ?", (digest, doc_id))
+                else:
+                    doc_id = self.conn.execute("INSERT INTO docs (filename, digest) VALUES (?, ?)",
+                                               (filename, digest)).lastrowid
+                self.conn.execute("INSERT INTO postings (rowid, full_text, main_text, reasoning) VALUES (?, ?, ?, ?)",
+                                  (doc_id, *(" ".join(bigram_tokens(t)) for t in self._fields(result))))
+        self._pending.clear()
+
+    def remove(self, filename: str):
+        self._pending.pop(filename, None)
+        with self.conn:
+            row = self.conn.execute("SELECT doc_id FROM docs WHERE filename = ?", (filename,)).fetchone()
+            if row:
+                self.conn.execute("DELETE FROM postings WHERE rowid = ?", (row[0],))
+                self.conn.execute("DELETE FROM docs WHERE doc_id = ?", (row[0],))
+
+    def sync(self, results: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        以目前的解析結果更新索引：新增或內容變動者重新索引，不在 results 中者移除
+        Returns: {"indexed", "unchanged", "removed"}
+        """
+        known = dict(self.conn.execute("SELECT filename, digest FROM docs"))
+        stats = {"indexed": 0, "unchanged": 0, "removed": 0}
+        seen = set()
+        for result in results:
+            filename = result["filename"]
+            seen.add(filename)
+            if known.get(filename) == self.digest(result):
+                stats["unchanged"] += 1
+                continue
+            self.add(result)
+            stats["indexed"] += 1
+        self.flush()
+        for filename in set(known) - seen:
+            self.remove(filename)
+            stats["removed"] += 1
+        return stats
+
+    def search(self, query: str, fields: Optional[Iterable[str]] = None,
+               limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        查詢，依相關度 (bm25，越小越相關) 排序
+        Returns: [(filename, score)]
+        """
+        self.flush()
+        sql = ("SELECT docs.filename, bm25(postings) AS score FROM postings "
+               "JOIN docs ON docs.doc_id = postings.rowid WHERE postings MATCH ? ORDER BY score")
+        params: List[Any] = [compile_query(query, fields)]
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        try:
+            return [(filename, score) for filename, score in self.conn.execute(sql, params)]
+        except sqlite3.OperationalError as e:
+            # 例如括號不成對、( 之後直接接排除條件
+            raise ValueError(f"查詢語法錯誤: {e}")
+
+    def __len__(self):
+        self.flush()
+        return self.conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="決定書全文檢索索引 (bigram + SQLite FTS5)")
+    arg_parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help="索引資料庫路徑")
+    sub = arg_parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="由解析結果建立或更新索引 (只處理有變動的文件)")
+    build.add_argument("--store", default=None,
+                       help="解析結果來源：目錄 (JSON) 或 .db 檔 (SQLite)；預設為 parsed_results/ (與 pipeline 預設相同)")
+
+    query = sub.add_parser("query", help="查詢")
+    query.add_argument("query", help='查詢字串，例: (叛亂 OR 死刑) 有期徒刑 -駁回')
+    query.add_argument("--field", action="append", choices=FIELDS, help="限定欄位 (可重複)")
+    query.add_argument("--limit", type=int, default=20)
+
+    args = arg_parser.parse_args(argv)
+    index = SearchIndex(args.index)
+    try:
+        if args.command == "build":
+            store = open_store(args.store)
+            stats = index.sync(store.iter_decisions())
+            store.close()
+            print(f"索引更新完成: 新增/更新 {stats['indexed']}，未變動 {stats['unchanged']}，移除 {stats['removed']}，"
+                  f"共 {len(index)} 份")
+        else:
+            try:
+                hits = index.search(args.query, fields=args.field, limit=args.limit)
+            except ValueError as e:
+                print(e)
+                return 1
+            print(f"符合 {len(hits)} 份 (依相關度排序，最多列出 {args.limit} 份)")
+            for filename, score in hits:
+                print(f"  {score:8.2f}  {filename}")
+    finally:
+        index.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,472 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+from typing import Any, Dict, Iterator, List, Optional
+
+# 解析結果的儲存層
+#   JsonStore:     每份決定書一個 JSON 檔 (parsed_results/，原本的格式)
+#   DecisionStore: 單一 SQLite 資料庫，MetaData 與章節拆成欄位，案號 / 受裁判人 / 日期建有索引
+# 兩者介面相同，pipeline 寫入、build_viewer_data / generate_index / check_status 讀取都透過這裡。
+# 鍵值一律是解析結果的 filename (PDF 檔名)。
+
+DEFAULT_JSON_DIR = "parsed_results"
+DEFAULT_DB_PATH = "decisions.db"
+DEFAULT_REVOCATIONS_FILE = "all_revocations.json"
+
+METADATA_FIELDS = ("case_no", "applicant", "subject", "date")
+SECTION_FIELDS = ("full_text", "main_text", "facts", "reasoning")
+
+def section_text(result: Dict[str, Any], field: str) -> Optional[str]:
+    """
+    解析結果的章節文字 (SECTION_FIELDS 之一)
+    低記憶體模式 (DecisionParser(low_memory=True)) 的結果只有 full_text，章節為 section_spans 中的位置，由全文切出
+    """
+    content = result.get("content") or {}
+    spans = result.get("section_spans")
+    if spans is None or field not in spans:
+        return content.get(field)
+    span = spans[field]
+    return content["full_text"][span[0]:span[1]] if span else ""
+
+def expand_sections(result: Dict[str, Any]) -> Dict[str, Any]:
+    """section_spans -> 一般格式 (content 含各章節字串，欄位順序相同)；一般格式原樣回傳"""
+    if "section_spans" not in result:
+        return result
+    expanded = {}
+    for key, value in result.items():
+        if key == "section_spans":
+            continue
+        if key == "content":
+            value = {field: section_text(result, field) for field in SECTION_FIELDS}
+        expanded[key] = value
+    return expanded
+
+def json_name(filename: str) -> str:
+    """PDF 檔名對應的 JSON 檔名 (與 pipeline.result_path 相同)"""
+    return filename.replace(".pdf", ".json")
+
+def _file_digest(path: Optional[str]) -> str:
+    """檔案內容的雜湊；檔案不存在時為空字串"""
+    if not path or not os.path.exists(path):
+        return ""
+    sha = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+def _load_revocations_file(path: Optional[str]) -> List[Dict[str, Any]]:
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+class JsonStore:
+    """每份決定書一個 JSON 檔 (縮排格式，方便人工檢視與版本控制)"""
+
+    def __init__(self, directory: str = DEFAULT_JSON_DIR, revocations_file: Optional[str] = DEFAULT_REVOCATIONS_FILE):
+        self.directory = directory
+        self.revocations_file = revocations_file
+
+    def path_for(self, filename: str) -> str:
+        return os.path.join(self.directory, json_name(filename))
+
+    def add(self, result: Dict[str, Any]):
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+        path = self.path_for(result["filename"])
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(expand_sections(result), f, ensure_ascii=False, indent=2)
+        print(f"  -> 解析結果已儲存: {path}")
+
+    def add_many(self, results):
+        for result in results:
+            self.add(result)
+
+    def flush(self):
+        pass
+
+    def exists(self, filename: str) -> bool:
+        return os.path.exists(self.path_for(filename))
+
+    def filenames(self) -> List[str]:
+        """已儲存的決定書 (PDF 檔名)，依檔名排序"""
+        if not os.path.exists(self.directory):
+            return []
+        names = [f for f in os.listdir(self.directory) if f.lower().endswith(".json")]
+        return [f[:-len(".json")] + ".pdf" for f in sorted(names)]
+
+    def get(self, filename: str) -> Optional[Dict[str, Any]]:
+        path = self.path_for(filename)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def iter_decisions(self) -> Iterator[Dict[str, Any]]:
+        """依檔名順序逐一讀出完整結果；無法讀取的檔案顯示警告後略過"""
+        for filename in self.filenames():
+            try:
+                result = self.get(filename)
+            except Exception as e:
+                print(f"Skipping {json_name(filename)}: {e}")
+                continue
+            if result is not None:
+                yield result
+
+    def list_metadata(self) -> List[Dict[str, Any]]:
+        """[{"filename", "metadata"}]：JSON 格式只能逐檔讀取"""
+        return [{"filename": r.get("filename"), "metadata": r.get("metadata", {})} for r in self.iter_decisions()]
+
+    def find(self, **filters) -> List[Dict[str, Any]]:
+        """依 MetaData 欄位 (case_no / subject / date ...) 完全比對"""
+        return [item for item in self.list_metadata()
+                if all(item["metadata"].get(k) == v for k, v in filters.items())]
+
+    def revocations(self) -> List[Dict[str, Any]]:
+        return _load_revocations_file(self.revocations_file)
+
+    def fingerprints(self) -> Dict[str, str]:
+        """每份決定書的內容雜湊 (JSON 檔的雜湊，依檔名排序)，供增量建置判斷是否變動"""
+        return {filename: _file_digest(self.path_for(filename)) for filename in self.filenames()}
+
+    def revocations_fingerprint(self) -> str:
+        return _file_digest(self.revocations_file)
+
+    def __len__(self):
+        return len(self.filenames())
+
+    def close(self):
+        pass
+
+class DecisionStore:
+    """
+    SQLite 儲存 (單一檔案)
+    decisions:       每份決定書一列，MetaData 與章節為獨立欄位，樹狀結構為 JSON 字串
+    decision_tables: 表格，每個表格一列
+    revocations:     撤銷名冊，每筆一列 (原始記錄以 JSON 保存，欄位不一的記錄也不會遺失)
+    寫入先放在緩衝區，累積 batch_size 筆 (或呼叫 flush) 後以單一交易寫入。
+    """
+
+    SCHEMA_VERSION = 1
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, batch_size: int = 100,
+                 revocations_file: Optional[str] = DEFAULT_REVOCATIONS_FILE):
+        self.db_path = db_path
+        self.batch_size = max(1, batch_size)
+        # 資料庫尚未匯入撤銷名冊時改讀此檔
+        self.revocations_file = revocations_file
+        self._pending: Dict[str, Dict[str, Any]] = {}
+
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS decisions (
+                filename TEXT PRIMARY KEY,
+                case_no TEXT,
+                applicant TEXT,
+                subject TEXT,
+                date TEXT,
+                full_text TEXT,
+                main_text TEXT,
+                facts TEXT,
+                reasoning TEXT,
+                tree_format TEXT NOT NULL,
+                tree TEXT,
+                page_count INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS idx_decisions_case_no ON decisions(case_no);
+            CREATE INDEX IF NOT EXISTS idx_decisions_subject ON decisions(subject);
+            CREATE INDEX IF NOT EXISTS idx_decisions_date ON decisions(date);
+
+            CREATE TABLE IF NOT EXISTS decision_tables (
+                filename TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                page INTEGER,
+                data TEXT NOT NULL,
+                PRIMARY KEY (filename, seq)
+            );
+
+            CREATE TABLE IF NOT EXISTS revocations (
+                seq INTEGER PRIMARY KEY,
+                category INTEGER,
+                name TEXT,
+                record TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_revocations_category ON revocations(category);
+            CREATE INDEX IF NOT EXISTS idx_revocations_name ON revocations(name);
+        """)
+        self.conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        self.conn.commit()
+
+    # --- 寫入 ---
+
+    @staticmethod
+    def _row(result: Dict[str, Any]) -> tuple:
+        meta = result.get("metadata") or {}
+        if "structured_reasoning_compact" in result:
+            tree_format, tree = "compact", result["structured_reasoning_compact"]
+        else:
+            tree_format, tree = "nested", result.get("structured_reasoning")
+        return (
+            result["filename"],
+            *(meta.get(k) for k in METADATA_FIELDS),
+            *(section_text(result, k) for k in SECTION_FIELDS),
+            tree_format,
+            json.dumps(tree, ensure_ascii=False, separators=(",", ":")) if tree is not None else None,
+            result.get("page_count")
+        )
+
+    def add(self, result: Dict[str, Any]):
+        """加入緩衝區，滿 batch_size 筆時寫入"""
+        self._pending[result["filename"]] = result
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def add_many(self, results):
+        for result in results:
+            self.add(result)
+        self.flush()
+
+    def flush(self):
+        """以單一交易寫入緩衝區中的所有結果 (同檔名者覆蓋)"""
+        if not self._pending:
+            return
+        results = list(self._pending.values())
+        filenames = [(r["filename"],) for r in results]
+        tables = [
+            (r["filename"], seq, table.get("page"), json.dumps(table.get("data"), ensure_ascii=False, separators=(",", ":")))
+            for r in results for seq, table in enumerate(r.get("tables") or [])
+        ]
+        placeholders = ", ".join("?" * (1 + len(METADATA_FIELDS) + len(SECTION_FIELDS) + 3))
+        with self.conn:
+            self.conn.executemany("DELETE FROM decision_tables WHERE filename = ?", filenames)
+            self.conn.executemany(f"INSERT OR REPLACE INTO decisions VALUES ({placeholders})",
+                                  [self._row(r) for r in results])
+            self.conn.executemany("INSERT INTO decision_tables VALUES (?, ?, ?, ?)", tables)
+        self._pending.clear()
+
+    def put_revocations(self, records: List[Dict[str, Any]]):
+        """以新名冊整批取代 (保留原始順序)"""
+        rows = [(seq, r.get("category"), r.get("name"), json.dumps(r, ensure_ascii=False, separators=(",", ":")))
+                for seq, r in enumerate(records)]
+        with self.conn:
+            self.conn.execute("DELETE FROM revocations")
+            self.conn.executemany("INSERT INTO revocations VALUES (?, ?, ?, ?)", rows)
+
+    # --- 讀取 ---
+
+    def _build(self, row: tuple, tables: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """資料列 -> 與 DecisionParser.build_result 相同結構的 dict"""
+        filename, *values = row
+        meta_values = values[:len(METADATA_FIELDS)]
+        section_values = values[len(METADATA_FIELDS):len(METADATA_FIELDS) + len(SECTION_FIELDS)]
+        tree_format, tree, page_count = values[-3:]
+        result = {
+            "filename": filename,
+            "metadata": dict(zip(METADATA_FIELDS, meta_values)),
+            "content": dict(zip(SECTION_FIELDS, section_values)),
+        }
+        key = "structured_reasoning_compact" if tree_format == "compact" else "structured_reasoning"
+        result[key] = json.loads(tree) if tree is not None else None
+        result["tables"] = tables
+        if page_count is not None:
+            result["page_count"] = page_count
+        return result
+
+    _COLUMNS = ", ".join(("filename",) + METADATA_FIELDS + SECTION_FIELDS + ("tree_format", "tree", "page_count"))
+
+    def exists(self, filename: str) -> bool:
+        if filename in self._pending:
+            return True
+        return self.conn.execute("SELECT 1 FROM decisions WHERE filename = ?", (filename,)).fetchone() is not None
+
+    def filenames(self) -> List[str]:
+        self.flush()
+        return [r[0] for r in self.conn.execute("SELECT filename FROM decisions ORDER BY filename")]
+
+    def get(self, filename: str) -> Optional[Dict[str, Any]]:
+        self.flush()
+        row = self.conn.execute(f"SELECT {self._COLUMNS} FROM decisions WHERE filename = ?", (filename,)).fetchone()
+        if row is None:
+            return None
+        tables = [{"page": page, "data": json.loads(data)} for page, data in self.conn.execute(
+            "SELECT page, data FROM decision_tables WHERE filename = ? ORDER BY seq", (filename,))]
+        return self._build(row, tables)
+
+    def iter_decisions(self) -> Iterator[Dict[str, Any]]:
+        """依檔名順序逐一讀出完整結果 (表格以一次查詢依序合併，不逐筆查詢)"""
+        self.flush()
+        table_rows = self.conn.execute(
+            "SELECT filename, page, data FROM decision_tables ORDER BY filename, seq")
+        next_table = table_rows.fetchone()
+        for row in self.conn.execute(f"SELECT {self._COLUMNS} FROM decisions ORDER BY filename"):
+            tables = []
+            # 兩邊都依檔名排序，表格游標只需前進、不必回頭
+            while next_table is not None and next_table[0] <= row[0]:
+                if next_table[0] == row[0]:
+                    tables.append({"page": next_table[1], "data": json.loads(next_table[2])})
+                next_table = table_rows.fetchone()
+            yield self._build(row, tables)
+
+    def list_metadata(self) -> List[Dict[str, Any]]:
+        """[{"filename", "metadata"}]：只讀 MetaData 欄位，不載入全文"""
+        self.flush()
+        cols = ", ".join(METADATA_FIELDS)
+        return [{"filename": row[0], "metadata": dict(zip(METADATA_FIELDS, row[1:]))}
+                for row in self.conn.execute(f"SELECT filename, {cols} FROM decisions ORDER BY filename")]
+
+    def find(self, **filters) -> List[Dict[str, Any]]:
+        """依 MetaData 欄位完全比對 (case_no / subject / date 走索引)"""
+        unknown = set(filters) - set(METADATA_FIELDS)
+        if unknown:
+            raise ValueError(f"不支援的查詢欄位: {', '.join(sorted(unknown))}")
+        self.flush()
+        cols = ", ".join(METADATA_FIELDS)
+        where = " AND ".join(f"{k} = ?" for k in filters) or "1"
+        rows = self.conn.execute(f"SELECT filename, {cols} FROM decisions WHERE {where} ORDER BY filename",
+                                 tuple(filters.values()))
+        return [{"filename": row[0], "metadata": dict(zip(METADATA_FIELDS, row[1:]))} for row in rows]
+
+    def revocations(self, category: Optional[int] = None) -> List[Dict[str, Any]]:
+        """撤銷名冊 (原始順序)；資料庫尚未匯入時讀取 revocations_file"""
+        if category is None:
+            rows = self.conn.execute("SELECT record FROM revocations ORDER BY seq").fetchall()
+        else:
+            rows = self.conn.execute("SELECT record FROM revocations WHERE category = ? ORDER BY seq",
+                                     (category,)).fetchall()
+        if rows:
+            return [json.loads(r[0]) for r in rows]
+        if self.conn.execute("SELECT 1 FROM revocations LIMIT 1").fetchone() is not None:
+            return []
+        records = _load_revocations_file(self.revocations_file)
+        return [r for r in records if category is None or r.get("category") == category]
+
+    def fingerprints(self) -> Dict[str, str]:
+        """每份決定書的內容雜湊 (依檔名排序)：只讀取欄位文字，不組成結果、不解析 JSON"""
+        self.flush()
+        digests: Dict[str, Any] = {}
+        for row in self.conn.execute(f"SELECT {self._COLUMNS} FROM decisions ORDER BY filename"):
+            sha = hashlib.sha1()
+            for value in row:
+                sha.update(repr(value).encode("utf-8"))
+                sha.update(b"\0")
+            digests[row[0]] = sha
+        for filename, page, data in self.conn.execute(
+                "SELECT filename, page, data FROM decision_tables ORDER BY filename, seq"):
+            sha = digests.get(filename)
+            if sha is not None:
+                sha.update(f"{page!r}\0{data}\0".encode("utf-8"))
+        return {filename: sha.hexdigest() for filename, sha in digests.items()}
+
+    def revocations_fingerprint(self) -> str:
+        """撤銷名冊的雜湊 (與 revocations() 的來源相同：資料庫尚未匯入時為 revocations_file)"""
+        if self.conn.execute("SELECT 1 FROM revocations LIMIT 1").fetchone() is None:
+            return _file_digest(self.revocations_file)
+        sha = hashlib.sha1()
+        for (record,) in self.conn.execute("SELECT record FROM revocations ORDER BY seq"):
+            sha.update(record.encode("utf-8"))
+            sha.update(b"\0")
+        return sha.hexdigest()
+
+    def export_json(self, directory: str = DEFAULT_JSON_DIR) -> int:
+        """匯出為每份一個 JSON 檔 (與 JsonStore 格式相同)，回傳筆數"""
+        target = JsonStore(directory)
+        count = 0
+        for result in self.iter_decisions():
+            target.add(result)
+            count += 1
+        return count
+
+    def __len__(self):
+        self.flush()
+        return self.conn.execute("SELECT COUNT(*) FROM decisions").fetchone()[0]
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+def _newest_mtime(*paths: str) -> float:
+    """檔案中最新的修改時間；都不存在時為 0"""
+    newest = 0.0
+    for path in paths:
+        try:
+            newest = max(newest, os.stat(path).st_mtime)
+        except OSError:
+            pass
+    return newest
+
+def _newest_json_mtime(directory: str) -> float:
+    if not os.path.isdir(directory):
+        return 0.0
+    with os.scandir(directory) as entries:
+        return max((e.stat().st_mtime for e in entries if e.name.endswith(".json")), default=0.0)
+
+def stale_db_warnings(db_path: str, json_dir: str = DEFAULT_JSON_DIR,
+                      revocations_file: Optional[str] = DEFAULT_REVOCATIONS_FILE) -> List[str]:
+    """
+    資料庫比 JSON 來源舊時的警告訊息
+    pipeline 預設仍寫入 parsed_results/，extract_tables 寫入 all_revocations.json；
+    匯入資料庫後再更新這兩者，從資料庫讀取的腳本就會看不到新的結果。
+    """
+    db_mtime = _newest_mtime(db_path, db_path + "-wal")
+    if not db_mtime:
+        return []
+    warnings = []
+    if _newest_json_mtime(json_dir) > db_mtime:
+        warnings.append(f"{json_dir}/ 有比 {db_path} 新的解析結果")
+    if revocations_file and _newest_mtime(revocations_file) > db_mtime:
+        warnings.append(f"{revocations_file} 比 {db_path} 新")
+    return warnings
+
+def open_store(path: Optional[str] = None, **kwargs):
+    """
+    依路徑開啟儲存層：目錄 -> JsonStore，其他 (.db 檔) -> DecisionStore。
+    未指定時使用 parsed_results/ (與 pipeline 預設的 --storage json 相同)；資料庫需以路徑明確指定。
+    開啟資料庫時，若 parsed_results/ 或 all_revocations.json 比資料庫新，印出警告
+    (請重新執行 python storage.py import，或以 --store parsed_results 讀取 JSON)。
+    """
+    if path is None:
+        path = DEFAULT_JSON_DIR
+    if os.path.isdir(path) or not path.endswith(".db"):
+        return JsonStore(path, **kwargs)
+    for warning in stale_db_warnings(path, revocations_file=kwargs.get("revocations_file", DEFAULT_REVOCATIONS_FILE)):
+        # 寫到 stderr，不影響 check_status --json - 等輸出到 stdout 的結果
+        print(f"警告: {warning}，資料庫的內容可能已過期 (重新執行 python storage.py import 以更新)", file=sys.stderr)
+    return DecisionStore(path, **kwargs)
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="解析結果儲存層：JSON 目錄與 SQLite 資料庫互轉")
+    sub = arg_parser.add_subparsers(dest="command", required=True)
+
+    imp = sub.add_parser("import", help="將 JSON 目錄與撤銷名冊匯入資料庫")
+    imp.add_argument("--json-dir", default=DEFAULT_JSON_DIR)
+    imp.add_argument("--revocations", default=DEFAULT_REVOCATIONS_FILE)
+    imp.add_argument("--db", default=DEFAULT_DB_PATH)
+
+    exp = sub.add_parser("export", help="將資料庫匯出為 JSON 目錄")
+    exp.add_argument("--db", default=DEFAULT_DB_PATH)
+    exp.add_argument("--json-dir", default=DEFAULT_JSON_DIR)
+
+    args = arg_parser.parse_args(argv)
+
+    if args.command == "import":
+        store = DecisionStore(args.db, batch_size=500)
+        store.add_many(JsonStore(args.json_dir).iter_decisions())
+        revocations = _load_revocations_file(args.revocations)
+        if revocations:
+            store.put_revocations(revocations)
+        print(f"已匯入 {len(store)} 份決定書、{len(revocations)} 筆撤銷名冊至 {args.db}")
+        store.close()
+    else:
+        store = DecisionStore(args.db)
+        count = store.export_json(args.json_dir)
+        print(f"已匯出 {count} 份決定書至 {args.json_dir}")
+        store.close()
+    return 0
+
+if __name__ == "__main__":
+    main()
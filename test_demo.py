@@ -1,6 +1,7 @@
 import os
 import json
 from pdf_parser import DecisionParser
+from reasoning_tree import load_tree
 
 def print_tree(nodes, f, indent_level=0):
     """遞迴列印樹狀結構"""
@@ -59,7 +60,8 @@ def test_demo_files():
                 # f.write(f"5. [理由] (前 100 字): {reasoning[:100]}...\n" if reasoning else "5. [理由] 未抓取到\n")
                 
                 # 新增結構化展示區塊 (Tree View)
-                struct_reason = result.get('structured_reasoning', [])
+                # 巢狀或精簡格式都還原為巢狀格式
+                struct_reason = load_tree(result)
                 if struct_reason:
                     f.write("\n   --- [理由結構化樹狀預覽] ---\n")
                     print_tree(struct_reason, f)